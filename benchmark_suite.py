@@ -0,0 +1,373 @@
+"""
+Search Benchmark Suite
+======================
+
+Headless, reproducible timings for the search engine. Synthetic PDFs and
+workbooks are generated from a fixed seed (once, into --data-dir) and the
+suite times:
+
+    pdf.load          load_pdf_file (page count only)
+    pdf.search_cold   search_pdf_ultra_fast with no cached page text
+    pdf.search_warm   the same search again, page text in memory
+    excel.load        load_excel_file with the workbook cache disabled
+    excel.search      search_excel over all columns
+
+and, where tkinter is available,
+
+    pdf.render        formatting the search results as the results pane does
+    excel.render      the same for the Excel search results
+    app.import        a fresh interpreter importing file_search_app
+    app.first_window  launching the app until its window is first drawn
+                      (needs a display)
+
+Each timing is the best of --repeat runs. Results are written as JSON;
+pass an earlier file with --compare to flag anything that got slower than
+--tolerance allows (the exit code is then 1).
+
+Examples:
+    python benchmark_suite.py --json baseline.json
+    python benchmark_suite.py --preset full --json after.json --compare baseline.json
+    python benchmark_suite.py --pdf-pages 10,500 --excel-rows 1000 --repeat 5
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+import openpyxl
+import pandas as pd
+
+from pdf_extractors import DEFAULT_EXTRACTOR
+from search_engine import ExcelFrameCache, PageTextCache, ResultCache, SearchEngine
+
+
+SUITE_VERSION = 1  # Bump when the generated data or the benchmarks change
+MIN_REGRESSION_SECONDS = 0.005  # Slowdowns smaller than this are timer noise
+
+PRESETS = {
+    'quick': {'pdf_pages': [10, 100], 'excel_rows': [1000, 10000]},
+    'full': {'pdf_pages': [10, 100, 1000, 5000], 'excel_rows': [1000, 10000, 100000, 1000000]},
+}
+
+PDF_LINES_PER_PAGE = 40
+PDF_QUERY = 'warranty'  # On about one line in five
+EXCEL_QUERY = 'Harbor'  # One of the cities, in about one row in eight
+
+WORDS = ("agreement amount buyer clause contract delivery invoice liability "
+         "notice order part payment price quantity seller supplier term "
+         "warranty shipment schedule").split()
+FIRST_NAMES = "Ana Ben Chen David Elena Farah George Hana Ivan Julia Kofi Lena".split()
+LAST_NAMES = "Smith Garcia Khan Nguyen Okafor Rossi Schmidt Tanaka Weber Young".split()
+CITIES = "Ashford Brookvale Cedar Dunmore Easton Fairview Glenwood Harbor".split()
+
+
+def write_synthetic_pdf(path: str, pages: int, seed: int = 1):
+    """Write a text-only PDF of the given page count.
+
+    The file is assembled directly (one Helvetica content stream per page)
+    so no PDF library is needed to generate it.
+    """
+    rng = random.Random(seed)
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', b'',
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    page_ids = []
+    for page_num in range(1, pages + 1):
+        lines = []
+        for line_num in range(1, PDF_LINES_PER_PAGE + 1):
+            words = ' '.join(rng.choice(WORDS) for _ in range(9))
+            if rng.random() < 0.05:
+                words += f" PN-{rng.randint(0, 99999):05d}"
+            lines.append(f"Section {page_num}.{line_num} {words}")
+        stream = ("BT /F1 10 Tf 40 800 Td 12 TL "
+                  + ' '.join(f"({line}) '" for line in lines) + " ET").encode('latin-1')
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+                       b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % len(objects))
+        page_ids.append(len(objects))
+    objects[1] = (b'<< /Type /Pages /Kids [' + b' '.join(b'%d 0 R' % i for i in page_ids)
+                  + b'] /Count %d >>' % pages)
+
+    # Objects, then the cross-reference table pointing at each of them
+    output = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(output)
+    output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    output += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    output += (b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+               % (len(objects) + 1, xref))
+    with open(path, 'wb') as f:
+        f.write(output)
+
+
+def write_synthetic_workbook(path: str, rows: int, seed: int = 1):
+    """Write a one-sheet customer/order workbook with the given row count."""
+    rng = random.Random(seed)
+    start = datetime.date(2020, 1, 1)
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Orders')
+    sheet.append(['Order ID', 'Customer', 'City', 'Product', 'Quantity', 'Amount', 'Date'])
+    for row in range(rows):
+        sheet.append([
+            f"ORD-{row:07d}",
+            f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            rng.choice(CITIES),
+            f"{rng.choice(WORDS).title()} {rng.randint(1, 500)}",
+            rng.randint(1, 100),
+            round(rng.random() * 10000, 2),
+            start + datetime.timedelta(days=row % 2000)
+        ])
+    workbook.save(path)
+
+
+def fixture(data_dir: str, kind: str, size: int) -> str:
+    """Return the path of a generated data file, creating it if needed."""
+    os.makedirs(data_dir, exist_ok=True)
+    if kind == 'pdf':
+        path = os.path.join(data_dir, f"bench_v{SUITE_VERSION}_{size}_pages.pdf")
+        writer = write_synthetic_pdf
+    else:
+        path = os.path.join(data_dir, f"bench_v{SUITE_VERSION}_{size}_rows.xlsx")
+        writer = write_synthetic_workbook
+    if not os.path.exists(path):
+        print(f"Generating {path}...", file=sys.stderr)
+        writer(path + '.tmp', size)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def new_engine(extractor: str) -> SearchEngine:
+    """An engine with memory-only page text and no workbook or result cache, so every run is cold."""
+    return SearchEngine(page_cache=PageTextCache(cache_dir=None),
+                        frame_cache=ExcelFrameCache(cache_dir=None), extractor=extractor,
+                        result_cache=ResultCache(max_entries=0))
+
+
+def best_of(repeat: int, run: Callable[[], Tuple[float, Any]]) -> Tuple[List[float], Any]:
+    """Call run (which returns (seconds, value)) repeat times; returns all timings and the last value."""
+    timings = []
+    value = None
+    for _ in range(repeat):
+        seconds, value = run()
+        timings.append(seconds)
+    return timings, value
+
+
+def timed(function: Callable[[], Any]) -> Tuple[float, Any]:
+    """Time one call of function."""
+    start = time.perf_counter()
+    value = function()
+    return time.perf_counter() - start, value
+
+
+def render_results(results: List[Dict[str, Any]]) -> str:
+    """Format results exactly as the desktop app's results pane does."""
+    from file_search_app import FileSearchApp
+    renderer = FileSearchApp.__new__(FileSearchApp)  # Formatting needs no window
+    return renderer.format_results(results)
+
+
+def record(rows: List[Dict[str, Any]], name: str, size: int, unit: str,
+           timings: List[float], **extra):
+    """Add one benchmark row and echo it."""
+    row = {'name': name, 'size': size, 'unit': unit,
+           'seconds': round(min(timings), 6), 'runs': [round(t, 6) for t in timings]}
+    row.update(extra)
+    rows.append(row)
+    print(f"{name:<18} {size:>9} {unit:<6} {row['seconds']:>10.4f}s"
+          + ''.join(f"  {key}={value}" for key, value in extra.items()))
+
+
+def benchmark_pdf(rows: List[Dict[str, Any]], path: str, pages: int, repeat: int,
+                  workers: int, extractor: str, render: bool):
+    """Time loading, cold and warm searching and rendering of one PDF."""
+    timings, _ = best_of(repeat, lambda: timed(lambda: new_engine(extractor).load_pdf_file(path)))
+    record(rows, 'pdf.load', pages, 'pages', timings)
+
+    cold, warm = [], []
+    results = []
+    for _ in range(repeat):
+        engine = new_engine(extractor)
+        engine.load_pdf_file(path)
+        seconds, results = timed(lambda: engine.search_pdf_ultra_fast(PDF_QUERY, workers=workers))
+        cold.append(seconds)
+        warm.append(timed(lambda: engine.search_pdf_ultra_fast(PDF_QUERY, workers=workers))[0])
+        engine.shutdown()
+    record(rows, 'pdf.search_cold', pages, 'pages', cold, matches=len(results))
+    record(rows, 'pdf.search_warm', pages, 'pages', warm, matches=len(results))
+
+    if render:
+        timings, _ = best_of(repeat, lambda: timed(lambda: render_results(results)))
+        record(rows, 'pdf.render', pages, 'pages', timings, matches=len(results))
+
+
+def benchmark_excel(rows: List[Dict[str, Any]], path: str, row_count: int, repeat: int,
+                    render: bool):
+    """Time loading, searching and rendering of one workbook."""
+    engine = new_engine(DEFAULT_EXTRACTOR)
+
+    def load():
+        engine.clear()
+        return timed(lambda: engine.load_excel_file(path))
+
+    timings, _ = best_of(repeat, load)
+    record(rows, 'excel.load', row_count, 'rows', timings)
+
+    timings, results = best_of(repeat, lambda: timed(lambda: engine.search_excel(EXCEL_QUERY)))
+    record(rows, 'excel.search', row_count, 'rows', timings, matches=len(results))
+
+    if render:
+        timings, _ = best_of(repeat, lambda: timed(lambda: render_results(results)))
+        record(rows, 'excel.render', row_count, 'rows', timings, matches=len(results))
+    engine.shutdown()
+
+
+def benchmark_startup(rows: List[Dict[str, Any]], repeat: int):
+    """Time the desktop app's import and, with a display, its first window."""
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, FILE_SEARCH_TIMING_LOG='')
+    code = ("import time; started = time.perf_counter(); import file_search_app; "
+            "print(time.perf_counter() - started)")
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], cwd=app_dir, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        timings.append(float(output.split()[-1]))
+    record(rows, 'app.import', 1, 'app', timings)
+
+    # Wall-clock time from launch, so interpreter start-up is included
+    timings = []
+    for _ in range(repeat):
+        seconds, process = timed(lambda: subprocess.run(
+            [sys.executable, 'file_search_app.py', '--startup-time'], cwd=app_dir, env=env,
+            capture_output=True, text=True))
+        if process.returncode != 0:
+            print("Note: app.first_window not benchmarked (the window could not be opened)",
+                  file=sys.stderr)
+            return
+        timings.append(seconds)
+    record(rows, 'app.first_window', 1, 'app', timings)
+
+
+def environment() -> Dict[str, Any]:
+    """Describe the machine and library versions the numbers were taken on."""
+    import numpy
+    import pdfplumber
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'pandas': pd.__version__,
+        'openpyxl': openpyxl.__version__,
+        'pdfplumber': pdfplumber.__version__,
+    }
+
+
+def compare(rows: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    """Compare rows with an earlier run; returns a message per regression."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(row['name'], row['size'], row['unit']): row['seconds']
+                for row in baseline.get('results', [])}
+
+    regressions = []
+    print(f"\nCompared with {baseline_path} (tolerance {tolerance:.0%}):")
+    for row in rows:
+        before = previous.get((row['name'], row['size'], row['unit']))
+        if before is None:
+            continue
+        ratio = row['seconds'] / before if before > 0 else 1.0
+        flag = ''
+        if ratio > 1 + tolerance and row['seconds'] - before >= MIN_REGRESSION_SECONDS:
+            flag = '  REGRESSION'
+            regressions.append(f"{row['name']} ({row['size']} {row['unit']}): "
+                               f"{before:.4f}s -> {row['seconds']:.4f}s")
+        print(f"  {row['name']:<18} {row['size']:>9} {row['unit']:<6} "
+              f"{before:>9.4f}s -> {row['seconds']:>9.4f}s  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def parse_sizes(text: Optional[str]) -> Optional[List[int]]:
+    """Parse a comma-separated list of sizes."""
+    if text is None:
+        return None
+    return [int(size) for size in text.split(',') if size.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the suite; returns the process exit code."""
+    parser = argparse.ArgumentParser(
+        description="Time PDF and Excel loading, searching and rendering on synthetic data.")
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='quick',
+                        help="Data sizes to run (quick: up to 100 pages / 10k rows; "
+                             "full: up to 5,000 pages / 1M rows)")
+    parser.add_argument('--pdf-pages', help="Comma-separated PDF page counts (overrides the preset)")
+    parser.add_argument('--excel-rows', help="Comma-separated workbook row counts (overrides the preset)")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per timing; the best is kept")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="PDF extraction processes for searches (default: 1)")
+    parser.add_argument('--extractor', default=DEFAULT_EXTRACTOR, help="PDF text extraction backend")
+    parser.add_argument('--data-dir', default='benchmark_data',
+                        help="Where generated files are kept between runs (default: benchmark_data)")
+    parser.add_argument('--no-render', action='store_true', help="Skip the rendering benchmark")
+    parser.add_argument('--json', dest='json_path', help="Write the results to this JSON file")
+    parser.add_argument('--compare', help="Earlier JSON results to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed slowdown against --compare before flagging (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    pdf_pages = parse_sizes(args.pdf_pages) or PRESETS[args.preset]['pdf_pages']
+    excel_rows = parse_sizes(args.excel_rows) or PRESETS[args.preset]['excel_rows']
+    render = not args.no_render
+    if render:
+        try:
+            import file_search_app  # noqa: F401 - needs tkinter
+        except ImportError as e:
+            print(f"Note: rendering not benchmarked ({e})", file=sys.stderr)
+            render = False
+
+    rows: List[Dict[str, Any]] = []
+    if render:
+        benchmark_startup(rows, args.repeat)
+    for pages in pdf_pages:
+        benchmark_pdf(rows, fixture(args.data_dir, 'pdf', pages), pages, args.repeat,
+                      args.workers, args.extractor, render)
+    for row_count in excel_rows:
+        benchmark_excel(rows, fixture(args.data_dir, 'excel', row_count), row_count,
+                        args.repeat, render)
+
+    if args.json_path:
+        report = {
+            'suite_version': SUITE_VERSION,
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'environment': environment(),
+            'config': {'repeat': args.repeat, 'workers': args.workers,
+                       'extractor': args.extractor, 'pdf_query': PDF_QUERY,
+                       'excel_query': EXCEL_QUERY},
+            'results': rows
+        }
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        regressions = compare(rows, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s):", file=sys.stderr)
+            for message in regressions:
+                print(f"  {message}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,11 +13,43 @@ Date: August 2025
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
-import pandas as pd
-import pdfplumber
 import os
-import re
-from typing import List, Dict, Any, Optional, Tuple
+import queue
+import logging
+import argparse
+import importlib.util
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from pdf_extractors import available_extractors
+from result_export import EXPORT_FORMATS, export_results
+from search_engine import (
+    DEFAULT_CACHE_DIR, DEFAULT_EXTRACTION_WORKERS, PDF_EXTENSIONS, EXCEL_EXTENSIONS, SEARCH_MODES,
+    SearchEngine, parse_page_range, warm_imports
+)
+from timing import PhaseTimer, append_timing_log, profile_call
+
+logger = logging.getLogger(__name__)
+
+
+# Background task settings
+UI_POLL_INTERVAL_MS = 50  # How often the Tk thread drains the UI queue
+UI_QUEUE_BATCH = 200  # Most queued UI updates applied per poll
+
+# Results view settings
+RESULTS_PAGE_SIZE = 100  # Results rendered in the results pane at once
+
+# Search-as-you-type settings
+LIVE_SEARCH_DELAY_MS = 300  # Pause in typing before the query is searched
+
+# Timing and profiling settings (set FILE_SEARCH_TIMING_LOG to '' to turn the log off)
+TIMING_LOG_PATH = os.environ.get('FILE_SEARCH_TIMING_LOG',
+                                 os.path.join(DEFAULT_CACHE_DIR, 'timings.jsonl'))
+PROFILE_DIR = os.path.join(DEFAULT_CACHE_DIR, 'profiles')
+PROFILE_BY_DEFAULT = os.environ.get('FILE_SEARCH_PROFILE', '') not in ('', '0')  # cProfile every operation
 
 
 class FileSearchApp:
@@ -30,16 +62,36 @@ class FileSearchApp:
         self.root.geometry("900x700")
         self.root.minsize(800, 600)
         
-        # Application state
+        # Application state - loading and matching live in the engine
+        self.engine = SearchEngine()
         self.loaded_file_path: Optional[str] = None
-        self.loaded_file_type: Optional[str] = None  # 'pdf' or 'excel'
-        self.excel_data: Optional[pd.DataFrame] = None
-        self.pdf_text_data: List[Dict[str, Any]] = []  # Store text by page
-        self.pdf_file_path: Optional[str] = None  # For lazy loading
-        self.cancel_loading = False  # Flag for canceling long operations
+        
+        # Loading and searching run on a worker thread; it hands UI updates
+        # back to the Tk thread through ui_queue
+        self.task_executor = ThreadPoolExecutor(max_workers=1)
+        self.ui_queue: "queue.Queue[Tuple[Any, tuple]]" = queue.Queue()
+        self.busy = False
+        self.current_results: Sequence[Dict[str, Any]] = []  # Full result set (a list or ExcelMatches)
+        self.current_query = ""
+        self.current_header = ""  # Heading shown above the results
+        self.results_page = 0  # Page of current_results shown in the pane
+        self.result_limit: Optional[int] = None  # Max results of the running search
+        self.operation_timer: Optional[PhaseTimer] = None  # Phase timings of the running load/search
+        self.live_search_job: Optional[str] = None  # Pending debounced search (Tk after id)
+        self.live_search_running = False  # The running search was started by typing
         
         # Setup the GUI
         self.setup_gui()
+        self.root.after(UI_POLL_INTERVAL_MS, self.process_ui_queue)
+        
+    @property
+    def cancel_loading(self) -> bool:
+        """Flag for canceling long operations (shared with the engine)."""
+        return self.engine.cancel_loading
+        
+    @cancel_loading.setter
+    def cancel_loading(self, value: bool):
+        self.engine.cancel_loading = value
         
     def setup_gui(self):
         """Setup the main GUI components."""
@@ -65,6 +117,20 @@ class FileSearchApp:
         # Status bar
         self.setup_status_bar(main_frame)
         
+        # Menu bar
+        self.setup_menu()
+        
+    def setup_menu(self):
+        """Setup the menu bar."""
+        menubar = tk.Menu(self.root)
+        tools_menu = tk.Menu(menubar, tearoff=0)
+        
+        # Profile loads and searches with cProfile (also FILE_SEARCH_PROFILE=1)
+        self.profile_var = tk.BooleanVar(value=PROFILE_BY_DEFAULT)
+        tools_menu.add_checkbutton(label="Profile Loads and Searches", variable=self.profile_var)
+        menubar.add_cascade(label="Tools", menu=tools_menu)
+        self.root.config(menu=menubar)
+        
     def setup_file_section(self, parent):
         """Setup the file loading section."""
         # File loading frame
@@ -87,6 +153,16 @@ class FileSearchApp:
                                         command=self.clear_file, state=tk.DISABLED)
         self.clear_file_btn.grid(row=0, column=2, padx=(10, 0), pady=5)
         
+        # Search a whole folder of files
+        self.search_folder_btn = ttk.Button(file_frame, text="Search Folder...",
+                                           command=self.search_folder)
+        self.search_folder_btn.grid(row=0, column=3, padx=(10, 0), pady=5)
+        
+        # Empty the on-disk page text and workbook caches
+        self.clear_cache_btn = ttk.Button(file_frame, text="Clear Cache",
+                                         command=self.clear_caches)
+        self.clear_cache_btn.grid(row=0, column=4, padx=(10, 0), pady=5)
+        
     def setup_search_section(self, parent):
         """Setup the search controls section."""
         # Search frame
@@ -133,6 +209,7 @@ class FileSearchApp:
         self.search_entry = ttk.Entry(search_frame, textvariable=self.search_var, width=50)
         self.search_entry.grid(row=1, column=1, sticky=(tk.W, tk.E), padx=(10, 0), pady=(10, 2))
         self.search_entry.bind('<Return>', lambda e: self.perform_search())
+        self.search_var.trace_add('write', lambda *args: self.schedule_live_search())
         
         # Search options frame
         options_frame = ttk.Frame(search_frame)
@@ -143,14 +220,81 @@ class FileSearchApp:
         ttk.Checkbutton(options_frame, text="Case sensitive", 
                        variable=self.case_sensitive_var).grid(row=0, column=0, sticky=tk.W)
         
+        # Background search index for PDFs
+        self.build_index_var = tk.BooleanVar()
+        ttk.Checkbutton(options_frame, text="Build search index",
+                       variable=self.build_index_var,
+                       command=self.toggle_page_index).grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        
+        # Stream large .xlsx workbooks instead of loading them into memory
+        self.low_memory_var = tk.BooleanVar()
+        ttk.Checkbutton(options_frame, text="Low-memory Excel mode",
+                       variable=self.low_memory_var).grid(row=1, column=1, sticky=tk.W,
+                                                          padx=(20, 0), pady=(5, 0))
+        
         # Search method info
         ttk.Label(options_frame, text="Using Ultra-Fast Search", 
                  foreground="green").grid(row=0, column=1, sticky=tk.W, padx=(20, 0))
         
+        # Number of processes used to extract uncached PDF pages
+        ttk.Label(options_frame, text="Workers:").grid(row=0, column=2, sticky=tk.W, padx=(20, 0))
+        self.workers_var = tk.IntVar(value=DEFAULT_EXTRACTION_WORKERS)
+        ttk.Spinbox(options_frame, from_=1, to=max(1, os.cpu_count() or 1),
+                   textvariable=self.workers_var, width=4).grid(row=0, column=3, sticky=tk.W, padx=(5, 0))
+        
+        # PDF text extraction backend
+        ttk.Label(options_frame, text="PDF text:").grid(row=1, column=2, sticky=tk.W,
+                                                        padx=(20, 0), pady=(5, 0))
+        self.extractor_var = tk.StringVar(value=self.engine.extractor)
+        extractor_combo = ttk.Combobox(options_frame, textvariable=self.extractor_var,
+                                       values=available_extractors(), state="readonly", width=11)
+        extractor_combo.grid(row=1, column=3, sticky=tk.W, padx=(5, 0), pady=(5, 0))
+        extractor_combo.bind('<<ComboboxSelected>>', lambda e: self.change_extractor())
+        
+        # Limits for quick lookups on large files
+        self.first_hit_var = tk.BooleanVar()
+        ttk.Checkbutton(options_frame, text="First hit per page",
+                       variable=self.first_hit_var).grid(row=2, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Label(options_frame, text="Max results:").grid(row=2, column=2, sticky=tk.W,
+                                                           padx=(20, 0), pady=(5, 0))
+        self.max_results_var = tk.IntVar(value=0)  # 0 means no limit
+        ttk.Spinbox(options_frame, from_=0, to=1000000, increment=10,
+                   textvariable=self.max_results_var, width=8).grid(row=2, column=3, sticky=tk.W,
+                                                                  padx=(5, 0), pady=(5, 0))
+        ttk.Label(options_frame, text="Pages:").grid(row=3, column=2, sticky=tk.W,
+                                                     padx=(20, 0), pady=(5, 0))
+        self.page_range_var = tk.StringVar()  # e.g. "10-40"; empty means all pages
+        ttk.Entry(options_frame, textvariable=self.page_range_var,
+                 width=10).grid(row=3, column=3, sticky=tk.W, padx=(5, 0), pady=(5, 0))
+        
+        # Excel match mode - fuzzy tolerates typos and ranks by similarity
+        mode_frame = ttk.Frame(options_frame)
+        mode_frame.grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        ttk.Label(mode_frame, text="Excel match:").grid(row=0, column=0, sticky=tk.W)
+        self.search_mode_var = tk.StringVar(value=SEARCH_MODES[0].capitalize())
+        ttk.Combobox(mode_frame, textvariable=self.search_mode_var, state="readonly", width=10,
+                    values=[mode.capitalize() for mode in SEARCH_MODES]).grid(row=0, column=1,
+                                                                              padx=(5, 0))
+        
+        # Search while typing, once the query stops changing for a moment
+        self.live_search_var = tk.BooleanVar()
+        ttk.Checkbutton(options_frame, text="Search as you type",
+                       variable=self.live_search_var,
+                       command=self.schedule_live_search).grid(row=4, column=0, sticky=tk.W, pady=(5, 0))
+        
+        # Search buttons
+        button_frame = ttk.Frame(search_frame)
+        button_frame.grid(row=3, column=1, sticky=tk.E, padx=(10, 0), pady=(10, 0))
+        
+        # Multi-term search button
+        self.term_list_btn = ttk.Button(button_frame, text="Term List...",
+                                       command=self.open_term_list_dialog, state=tk.DISABLED)
+        self.term_list_btn.grid(row=0, column=0, padx=(0, 10))
+        
         # Search button
-        self.search_btn = ttk.Button(search_frame, text="Search", 
+        self.search_btn = ttk.Button(button_frame, text="Search", 
                                     command=self.perform_search, state=tk.DISABLED)
-        self.search_btn.grid(row=3, column=1, sticky=tk.E, padx=(10, 0), pady=(10, 0))
+        self.search_btn.grid(row=0, column=1)
         
         # Initially hide column selection widgets
         self.hide_column_widgets()
@@ -167,6 +311,7 @@ class FileSearchApp:
         self.results_text = scrolledtext.ScrolledText(results_frame, wrap=tk.WORD, 
                                                      height=20, state=tk.DISABLED)
         self.results_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.results_text.tag_configure('match', background='#fff59d')
         
         # Results control frame
         control_frame = ttk.Frame(results_frame)
@@ -187,6 +332,18 @@ class FileSearchApp:
         self.results_count_label.grid(row=0, column=2, sticky=tk.E, padx=(20, 0))
         control_frame.columnconfigure(2, weight=1)
         
+        # Paging controls - only one page of results is rendered at a time
+        self.prev_page_btn = ttk.Button(control_frame, text="◀ Prev", width=8,
+                                       command=lambda: self.show_results_page(self.results_page - 1),
+                                       state=tk.DISABLED)
+        self.prev_page_btn.grid(row=0, column=3, padx=(20, 0), sticky=tk.E)
+        self.page_label = ttk.Label(control_frame, text="")
+        self.page_label.grid(row=0, column=4, padx=(5, 5), sticky=tk.E)
+        self.next_page_btn = ttk.Button(control_frame, text="Next ▶", width=8,
+                                       command=lambda: self.show_results_page(self.results_page + 1),
+                                       state=tk.DISABLED)
+        self.next_page_btn.grid(row=0, column=5, sticky=tk.E)
+        
     def setup_status_bar(self, parent):
         """Setup the status bar with progress bar."""
         status_frame = ttk.Frame(parent)
@@ -228,8 +385,104 @@ class FileSearchApp:
         self.status_var.set("Canceling...")
         self.cancel_btn.config(state=tk.DISABLED)
         
+    def set_busy(self, busy: bool):
+        """Enable or disable the controls that start new operations."""
+        self.busy = busy
+        state = tk.DISABLED if busy else tk.NORMAL
+        self.load_btn.config(state=state)
+        self.search_folder_btn.config(state=state)
+        self.clear_cache_btn.config(state=state)
+        has_file = self.loaded_file_path is not None
+        self.search_btn.config(state=tk.NORMAL if has_file and not busy else tk.DISABLED)
+        self.term_list_btn.config(state=tk.NORMAL if has_file and not busy else tk.DISABLED)
+        self.clear_file_btn.config(state=tk.NORMAL if has_file and not busy else tk.DISABLED)
+        
+    def run_in_background(self, work, on_done, on_error):
+        """Run work() on the worker thread.
+        
+        on_done(result) or on_error(exception) is then called on the Tk
+        thread. While the task runs it may call post_to_ui to update the UI.
+        """
+        def task():
+            try:
+                result = work()
+            except Exception as e:
+                self.post_to_ui(on_error, e)
+            else:
+                self.post_to_ui(on_done, result)
+                
+        self.task_executor.submit(task)
+        
+    def post_to_ui(self, callback, *args):
+        """Queue callback(*args) to run on the Tk thread (thread-safe)."""
+        self.ui_queue.put((callback, args))
+        
+    def process_ui_queue(self):
+        """Apply queued UI updates from the worker thread."""
+        try:
+            for _ in range(UI_QUEUE_BATCH):
+                callback, args = self.ui_queue.get_nowait()
+                callback(*args)
+        except queue.Empty:
+            pass
+        finally:
+            self.root.after(UI_POLL_INTERVAL_MS, self.process_ui_queue)
+            
+    def start_timing(self, operation: str, **details: Any):
+        """Start timing a load or search; the engine records its phases on the same timer."""
+        self.operation_timer = self.engine.timer = PhaseTimer(operation, **details)
+        
+    def timed_work(self, work):
+        """Wrap work for the worker thread, under cProfile if profiling is switched on."""
+        timer = self.operation_timer
+        if timer is None or not self.profile_var.get():
+            return work
+            
+        def profiled():
+            result, path = profile_call(work, PROFILE_DIR, timer.operation)
+            timer.details['profile'] = path
+            return result
+        return profiled
+        
+    def render_phase(self):
+        """Context manager timing Tk rendering towards the running operation."""
+        if self.operation_timer is None:
+            return nullcontext()
+        return self.operation_timer.span('render')
+        
+    def finish_timing(self, **details: Any) -> str:
+        """Stop timing the running operation and append it to the timing log.
+        
+        Returns the phase breakdown for the status bar.
+        """
+        timer = self.operation_timer
+        if timer is None:
+            return ""
+        self.operation_timer = self.engine.timer = None
+        timer.stop()
+        timer.details.update(details)
+        append_timing_log(timer.record(), TIMING_LOG_PATH)
+        
+        summary = timer.summary()
+        if 'profile' in timer.details:
+            summary += f" - profile saved to {timer.details['profile']}"
+        return summary
+        
+    def report_progress(self, progress: float, message: str):
+        """Update the progress bar and status text from the worker thread."""
+        self.post_to_ui(self.show_progress_status, progress, message)
+        
+    def show_progress_status(self, progress: float, message: str):
+        """Show progress posted by the worker thread."""
+        if self.busy and not self.cancel_loading:
+            self.progress_var.set(progress)
+            self.status_var.set(message)
+        
     def load_file(self):
         """Load a PDF or Excel file."""
+        if self.busy:
+            return
+            
         file_path = filedialog.askopenfilename(
             title="Select PDF or Excel file",
             filetypes=[
@@ -243,69 +496,58 @@ class FileSearchApp:
         if not file_path:
             return
             
+        file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext not in PDF_EXTENSIONS + EXCEL_EXTENSIONS:
+            messagebox.showerror("Error", "Unsupported file format. Please select a PDF or Excel file.")
+            return
+            
         # Show progress for loading
         self.show_progress()
+        self.set_busy(True)
         self.status_var.set("Loading file...")
-        self.root.update()
-        
-        try:
-            file_ext = os.path.splitext(file_path)[1].lower()
+        low_memory = self.low_memory_var.get()
+        workers = self.get_extraction_workers()
+        self.start_timing('load', file=file_path)
+        work = lambda: self.engine.load_file(file_path, low_memory, workers)
+        self.run_in_background(self.timed_work(work),
+                               lambda status: self.finish_load_file(file_path, status),
+                               self.fail_load_file)
+        
+    def finish_load_file(self, file_path: str, status: str):
+        """Update the interface once a file has loaded in the background."""
+        self.hide_progress()
+        if not self.cancel_loading:  # Only update if not canceled
+            self.loaded_file_path = file_path
+            self.file_label.config(text=os.path.basename(file_path), foreground="black")
+            self.set_busy(False)
+            self.clear_results()
             
-            if file_ext == '.pdf':
-                self.load_pdf_file(file_path)
-            elif file_ext in ['.xlsx', '.xls']:
-                self.load_excel_file(file_path)
-            else:
-                messagebox.showerror("Error", "Unsupported file format. Please select a PDF or Excel file.")
-                return
-                
-            if not self.cancel_loading:  # Only update if not canceled
-                self.loaded_file_path = file_path
-                self.file_label.config(text=os.path.basename(file_path), foreground="black")
-                self.clear_file_btn.config(state=tk.NORMAL)
-                self.search_btn.config(state=tk.NORMAL)
-                self.clear_results()
-            else:
-                # Reset if canceled
-                self.clear_file()
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load file: {str(e)}")
-            self.status_var.set("Error loading file")
-        finally:
-            self.hide_progress()
+            with self.render_phase():
+                if self.engine.loaded_file_type == 'excel':
+                    self.show_excel_columns()
+                else:
+                    self.hide_column_widgets()
+                    if self.build_index_var.get():
+                        self.start_page_index()
+            self.status_var.set(f"{status} | {self.finish_timing()}")
+        else:
+            # Reset if canceled
+            self.finish_timing(canceled=True)
+            self.set_busy(False)
+            self.clear_file()
             
-    def load_pdf_file(self, file_path: str):
-        """Ultra-fast PDF loading - just stores file reference."""
-        self.loaded_file_type = 'pdf'
-        self.pdf_text_data = []
-        self.pdf_file_path = file_path
-        
-        try:
-            # Only open PDF to get page count - no text extraction
-            with pdfplumber.open(file_path) as pdf:
-                total_pages = len(pdf.pages)
-                
-            # Store only minimal page references - no text extraction at all
-            for page_num in range(1, total_pages + 1):
-                self.pdf_text_data.append({
-                    'page': page_num,
-                    'loaded': False  # Text will be loaded only when searching this page
-                })
-                
-            self.hide_column_widgets()
-            self.status_var.set(f"PDF loaded instantly - {total_pages} pages ready for search")
+    def fail_load_file(self, error: Exception):
+        """Report a file that failed to load in the background."""
+        self.hide_progress()
+        self.set_busy(False)
+        self.clear_results()  # The engine has already let go of the previous file
+        self.finish_timing(error=str(error))
+        messagebox.showerror("Error", f"Failed to load file: {str(error)}")
+        self.status_var.set("Error loading file")
             
-        except Exception as e:
-            raise Exception(f"Failed to load PDF: {str(e)}")
-        
-    def load_excel_file(self, file_path: str):
-        """Load and process an Excel file."""
-        self.loaded_file_type = 'excel'
-        self.excel_data = pd.read_excel(file_path)
-        
-        # Populate column selection widgets
-        columns = list(self.excel_data.columns)
+    def show_excel_columns(self):
+        """Populate the column selection widgets for the loaded workbook."""
+        columns = list(self.engine.excel_columns)
         self.column_combo['values'] = columns
         
         # Clear and populate listbox
@@ -314,25 +556,80 @@ class FileSearchApp:
             self.column_listbox.insert(tk.END, col)
             
         self.show_column_widgets()
-        self.status_var.set(f"Excel loaded - {len(self.excel_data)} rows, {len(columns)} columns")
         
     def clear_file(self):
         """Clear the loaded file and reset the interface."""
+        self.engine.clear()
         self.loaded_file_path = None
-        self.loaded_file_type = None
-        self.excel_data = None
-        self.pdf_text_data = []
-        self.pdf_file_path = None
         
         self.file_label.config(text="No file loaded", foreground="gray")
         self.clear_file_btn.config(state=tk.DISABLED)
         self.search_btn.config(state=tk.DISABLED)
+        self.term_list_btn.config(state=tk.DISABLED)
         self.export_btn.config(state=tk.DISABLED)
         
         self.hide_column_widgets()
         self.clear_results()
         self.status_var.set("Ready - Load a PDF or Excel file to begin")
         
+    def clear_caches(self):
+        """Delete cached page text and parsed workbooks after confirmation."""
+        if self.busy:
+            return
+            
+        size_mb = self.engine.frame_cache.size_bytes() / (1024 * 1024)
+        if not messagebox.askyesno("Clear Cache",
+                                   "Delete cached PDF page text and parsed Excel workbooks "
+                                   f"({size_mb:.1f} MB of workbooks)?\n\n"
+                                   "Files will load more slowly the next time they are opened."):
+            return
+            
+        try:
+            self.engine.clear_caches()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to clear cache: {str(e)}")
+            return
+        self.status_var.set("Cache cleared")
+        
+    def change_extractor(self):
+        """Switch the PDF text extraction backend."""
+        if self.busy:
+            # The worker thread may be extracting pages right now
+            self.extractor_var.set(self.engine.extractor)
+            return
+            
+        self.engine.set_extractor(self.extractor_var.get())
+        if self.engine.loaded_file_type == 'pdf':
+            cached = sum(1 for page_data in self.engine.pdf_text_data if page_data['loaded'])
+            self.status_var.set(f"PDF text now extracted with {self.engine.extractor} "
+                                f"({cached} pages cached)")
+            if self.build_index_var.get():
+                self.start_page_index()
+                
+    def toggle_page_index(self):
+        """Start or stop the background indexer when the option changes."""
+        if self.build_index_var.get():
+            if self.engine.loaded_file_type == 'pdf' and self.engine.page_index is None:
+                self.start_page_index()
+        else:
+            self.engine.stop_page_index()
+            
+    def start_page_index(self):
+        """Start the engine's background indexer and track its progress."""
+        self.engine.start_page_index()
+        self.root.after(250, self.poll_index_progress, self.engine.page_index)
+        
+    def poll_index_progress(self, index):
+        """Show background indexing progress in the status bar."""
+        if index is not self.engine.page_index:
+            return  # Indexer was stopped or replaced
+        total_pages = len(self.engine.pdf_text_data)
+        if self.engine.index_running():
+            self.status_var.set(f"Indexing pages {self.engine.index_progress}/{total_pages}...")
+            self.root.after(250, self.poll_index_progress, index)
+        else:
+            self.status_var.set(f"Search index ready - {len(index.snapshot_pages())} pages indexed")
+            
     def toggle_column_selection(self):
         """Toggle between single and multi-column selection."""
         if self.multi_select_var.get():
@@ -353,6 +650,21 @@ class FileSearchApp:
         self.multi_select_cb.grid_remove()
         self.column_listbox_frame.grid_remove()
         
+    def get_extraction_workers(self) -> int:
+        """Get the configured number of PDF extraction and sheet parsing processes."""
+        try:
+            return max(1, int(self.workers_var.get()))
+        except (tk.TclError, ValueError):
+            return 1
+            
+    def get_max_results(self) -> Optional[int]:
+        """Get the result limit, or None when it is 0 (no limit)."""
+        try:
+            max_results = int(self.max_results_var.get())
+        except (tk.TclError, ValueError):
+            return None
+        return max_results if max_results > 0 else None
+        
     def get_selected_columns(self) -> List[str]:
         """Get the selected columns for Excel search."""
         if not self.multi_select_var.get():
@@ -365,296 +677,553 @@ class FileSearchApp:
             return [self.column_listbox.get(i) for i in selected_indices]
             
     def perform_search(self):
-        """Perform search based on the loaded file type."""
-        if not self.loaded_file_path:
-            messagebox.showwarning("Warning", "Please load a file first.")
+        """Perform search based on the loaded file type.
+        
+        The search runs on the worker thread; PDF matches are streamed into
+        the results pane page by page.
+        """
+        if self.busy:
             return
             
         query = self.search_var.get().strip()
-        if not query:
+        if self.loaded_file_path and not query:
             messagebox.showwarning("Warning", "Please enter a search query.")
             return
+        self.start_search(query)
+        
+    def schedule_live_search(self):
+        """Restart the search-as-you-type delay after the query changed."""
+        if self.live_search_job is not None:
+            self.root.after_cancel(self.live_search_job)
+            self.live_search_job = None
+        if self.live_search_var.get() and self.loaded_file_path:
+            self.live_search_job = self.root.after(LIVE_SEARCH_DELAY_MS, self.run_live_search)
             
-        # Show progress for search
-        self.show_progress()
-        self.cancel_loading = False
-        self.status_var.set("Searching...")
-        self.root.update()
+    def run_live_search(self):
+        """Search for the query once typing has paused.
+        
+        A search started by earlier typing is outdated, so it is canceled;
+        other operations are waited for. Either way the search is retried
+        after another delay.
+        """
+        self.live_search_job = None
+        query = self.search_var.get().strip()
+        if not query or not self.live_search_var.get() or not self.loaded_file_path:
+            return
+        if self.busy:
+            if self.live_search_running:
+                self.cancel_loading = True
+            self.live_search_job = self.root.after(LIVE_SEARCH_DELAY_MS, self.run_live_search)
+            return
+        self.start_search(query, live=True)
         
-        try:
-            if self.loaded_file_type == 'pdf':
-                results = self.search_pdf(query)
-            elif self.loaded_file_type == 'excel':
-                results = self.search_excel(query)
-            else:
-                return
-                
-            if not self.cancel_loading:
-                self.display_results(results, query)
+    def perform_multi_search(self, terms: List[str]):
+        """Search for every term in the list with a single pass over the file."""
+        if self.busy:
+            return
+            
+        if not terms:
+            messagebox.showwarning("Warning", "Please enter at least one search term.")
+            return
+        self.start_search(f"{len(terms)} terms", terms)
+        
+    def start_search(self, query: str, terms: Optional[List[str]] = None, live: bool = False):
+        """Start a background search for a query, or for a list of terms.
+        
+        Live searches (started by typing) report problems in the status bar
+        rather than interrupting with a dialog. Query searches narrow to the
+        pages or rows an earlier search matched when they can.
+        """
+        def warn(message: str):
+            if live:
+                self.status_var.set(message)
             else:
-                self.status_var.set("Search canceled")
+                messagebox.showwarning("Warning", message)
                 
-        except Exception as e:
-            messagebox.showerror("Error", f"Search failed: {str(e)}")
-            self.status_var.set("Search error")
-        finally:
-            self.hide_progress()
+        if not self.loaded_file_path:
+            warn("Please load a file first.")
+            return
             
-    def search_pdf_ultra_fast(self, query: str) -> List[Dict[str, Any]]:
-        """Ultra-fast PDF search - loads and searches pages on-demand."""
-        results = []
+        # Read every Tk setting here; the worker thread must not touch widgets
         case_sensitive = self.case_sensitive_var.get()
-        total_pages = len(self.pdf_text_data)
-        
-        # Prepare search pattern
-        if case_sensitive:
-            search_lower = None
+        workers = self.get_extraction_workers()
+        selected_columns = None
+        if self.engine.loaded_file_type == 'excel':
+            selected_columns = self.get_selected_columns()
+            if not selected_columns:
+                warn("Please select at least one column to search.")
+                return
+        try:
+            page_range = parse_page_range(self.page_range_var.get())
+        except ValueError as e:
+            warn(str(e))
+            return
+        max_results = self.get_max_results()
+        mode = (self.search_mode_var.get() or SEARCH_MODES[0]).lower()
+        if mode != 'substring' and terms is None and self.engine.loaded_file_type != 'excel':
+            warn(f"{mode.capitalize()} matching is only available for Excel files.")
+            return
+        options = {
+            'on_results': self.post_results,
+            'progress': self.report_progress,
+            'max_results': max_results,
+            'page_range': page_range,
+            'first_hit': self.first_hit_var.get()
+        }
+        
+        # PDF pages and low-memory Excel chunks stream in as they are searched
+        if terms is None:
+            work = lambda: self.engine.search(query, case_sensitive, selected_columns,
+                                              workers, mode=mode, narrow=True, **options)
         else:
-            search_lower = query.lower()
-        
-        self.status_var.set("Starting search...")
-        self.root.update()
-        
+            work = lambda: self.engine.search_terms(terms, case_sensitive, selected_columns,
+                                                    workers, **options)
+            
+        # Show progress for search
+        self.show_progress()
+        self.set_busy(True)
+        self.status_var.set("Searching...")
+        self.begin_results(query)
+        self.result_limit = max_results
+        self.live_search_running = live
+        self.start_timing('search', file=self.loaded_file_path, query=query,
+                          mode=mode if terms is None else 'terms', live=live)
+        self.run_in_background(self.timed_work(work), self.finish_search, self.fail_search)
+        
+    def search_folder(self):
+        """Search every PDF and workbook in a folder for the current query."""
+        if self.busy:
+            return
+            
+        query = self.search_var.get().strip()
+        if not query:
+            messagebox.showwarning("Warning", "Please enter a search query first.")
+            return
+            
+        directory = filedialog.askdirectory(title="Select folder to search")
+        if not directory:
+            return
+            
+        # Read every Tk setting here; the worker thread must not touch widgets
+        case_sensitive = self.case_sensitive_var.get()
+        workers = self.get_extraction_workers()
         try:
-            with pdfplumber.open(self.pdf_file_path) as pdf:
-                for i, page_data in enumerate(self.pdf_text_data):
-                    if self.cancel_loading:
-                        break
-                    
-                    page_num = page_data['page']
-                    
-                    # Update progress every 10 pages
-                    if i % 10 == 0:
-                        progress = (i / total_pages) * 100
-                        self.progress_var.set(progress)
-                        self.status_var.set(f"Searching page {page_num}/{total_pages}...")
-                        self.root.update()
-                    
-                    try:
-                        # Extract text from this page only
-                        page = pdf.pages[page_num - 1]
-                        
-                        # Super fast text extraction with minimal processing
-                        text = page.extract_text(layout=False, x_tolerance=3, y_tolerance=3)
-                        
-                        if not text:
-                            continue
-                        
-                        # Quick check if query exists before detailed processing
-                        if case_sensitive:
-                            if query not in text:
-                                continue
-                        else:
-                            if search_lower not in text.lower():
-                                continue
-                        
-                        # Found a match - now get better context
-                        lines = text.split('\n')
-                        
-                        # Find all lines containing the search term
-                        matching_lines = []
-                        for line_idx, line in enumerate(lines):
-                            line_check = line if case_sensitive else line.lower()
-                            query_check = query if case_sensitive else search_lower
-                            
-                            if query_check in line_check:
-                                # Get context around matching line
-                                start_idx = max(0, line_idx - 1)
-                                end_idx = min(len(lines), line_idx + 2)
-                                context_lines = lines[start_idx:end_idx]
-                                context = '\n'.join(context_lines).strip()
-                                
-                                if context and context not in [r['context'] for r in matching_lines]:
-                                    matching_lines.append({
-                                        'context': context,
-                                        'line_number': line_idx + 1
-                                    })
-                        
-                        # Add all unique contexts from this page
-                        for match_info in matching_lines:
-                            results.append({
-                                'page': page_num,
-                                'context': match_info['context'],
-                                'line_number': match_info['line_number']
-                            })
-                    
-                    except Exception as e:
-                        # Skip problematic pages
-                        print(f"Warning: Could not search page {page_num}: {e}")
-                        continue
-                        
-        except Exception as e:
-            raise Exception(f"Search failed: {str(e)}")
-        
-        return results
-
-    def search_pdf(self, query: str) -> List[Dict[str, Any]]:
-        """Search through PDF content - uses ultra-fast method."""
-        # Always use ultra-fast search for instant loading
-        return self.search_pdf_ultra_fast(query)
-        
-    def search_excel(self, query: str) -> List[Dict[str, Any]]:
-        """Search through Excel content."""
-        selected_columns = self.get_selected_columns()
+            page_range = parse_page_range(self.page_range_var.get())
+        except ValueError as e:
+            messagebox.showwarning("Warning", str(e))
+            return
+        # The limits apply to each file; the mode to how workbooks are matched
+        options = {
+            'max_results': self.get_max_results(),
+            'page_range': page_range,
+            'first_hit': self.first_hit_var.get(),
+            'mode': (self.search_mode_var.get() or SEARCH_MODES[0]).lower()
+        }
         
-        if not selected_columns:
-            messagebox.showwarning("Warning", "Please select at least one column to search.")
-            return []
+        self.show_progress()
+        self.set_busy(True)
+        self.status_var.set("Searching folder...")
+        self.begin_results(query, f"Folder Search Results for: '{query}' in {directory}")
+        self.start_timing('folder search', directory=directory, query=query, mode=options['mode'])
+        self.run_in_background(self.timed_work(
+            lambda: self.engine.search_corpus(directory, [query], case_sensitive, workers=workers,
+                                              on_results=self.post_results,
+                                              progress=self.report_progress, **options)),
+            self.finish_search, self.fail_search)
+        
+    def open_term_list_dialog(self):
+        """Ask for a list of terms (pasted or loaded from a file) to search at once."""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Search Term List")
+        dialog.geometry("400x400")
+        dialog.transient(self.root)
+        dialog.columnconfigure(0, weight=1)
+        dialog.rowconfigure(1, weight=1)
+        
+        ttk.Label(dialog, text="One search term per line:").grid(
+            row=0, column=0, columnspan=3, sticky=tk.W, padx=10, pady=(10, 5))
+        terms_text = scrolledtext.ScrolledText(dialog, wrap=tk.NONE, height=15)
+        terms_text.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), padx=10)
+        
+        def load_terms():
+            file_path = filedialog.askopenfilename(
+                parent=dialog,
+                title="Load search terms",
+                filetypes=[("Text files", "*.txt;*.csv"), ("All files", "*.*")]
+            )
+            if file_path:
+                try:
+                    with open(file_path, 'r', encoding='utf-8') as f:
+                        terms_text.delete(1.0, tk.END)
+                        terms_text.insert(tk.END, f.read())
+                except Exception as e:
+                    messagebox.showerror("Error", f"Failed to load terms: {str(e)}", parent=dialog)
+                    
+        def search_terms():
+            terms = [line.strip() for line in terms_text.get(1.0, tk.END).splitlines()]
+            terms = [term for term in terms if term]
+            dialog.destroy()
+            self.perform_multi_search(terms)
             
-        results = []
-        case_sensitive = self.case_sensitive_var.get()
+        ttk.Button(dialog, text="Load File...", command=load_terms).grid(
+            row=2, column=0, sticky=tk.W, padx=10, pady=10)
+        ttk.Button(dialog, text="Cancel", command=dialog.destroy).grid(
+            row=2, column=1, sticky=tk.E, pady=10)
+        ttk.Button(dialog, text="Search All", command=search_terms).grid(
+            row=2, column=2, sticky=tk.E, padx=10, pady=10)
+        terms_text.focus_set()
+        
+    def post_results(self, results: List[Dict[str, Any]]):
+        """Stream a batch of results to the results pane (worker thread)."""
+        self.post_to_ui(self.append_results, results)
+        
+    def finish_search(self, results: List[Dict[str, Any]]):
+        """Show the outcome of a background search."""
+        self.hide_progress()
+        self.set_busy(False)
+        self.live_search_running = False
+        
+        # Results not streamed while searching are shown now
+        if len(results) > len(self.current_results):
+            self.append_results(results[len(self.current_results):])
+            
+        if self.cancel_loading:
+            if self.current_results:
+                self.export_btn.config(state=tk.NORMAL)
+            self.finish_timing(results=len(self.current_results), canceled=True)
+            self.status_var.set(f"Search canceled - {len(self.current_results)} results so far")
+        else:
+            self.finish_results()
+            timing = self.finish_timing(results=len(self.current_results))
+            self.status_var.set(f"{self.status_var.get()} | {timing}")
+            
+    def fail_search(self, error: Exception):
+        """Report a background search that raised an error.
+        
+        Searches started by typing only report it in the status bar, so a
+        half-typed query does not interrupt the user with a dialog.
+        """
+        self.hide_progress()
+        self.set_busy(False)
+        live = self.live_search_running
+        self.live_search_running = False
+        self.finish_timing(error=str(error))
+        if live:
+            self.status_var.set(f"Search error: {error}")
+            return
+        messagebox.showerror("Error", f"Search failed: {str(error)}")
+        self.status_var.set("Search error")
+            
+    def begin_results(self, query: str, title: Optional[str] = None):
+        """Clear the results pane for a new search."""
+        self.clear_results()
+        self.current_query = query
+        self.result_limit = None
+        self.current_header = self.format_results_header(query, title)
         
-        # Convert query to appropriate type for numeric searches
-        numeric_query = None
-        try:
-            numeric_query = float(query)
-        except ValueError:
-            pass
+    def append_results(self, results: List[Dict[str, Any]]):
+        """Add a batch of results to the result set.
+        
+        Only the results that fall on the page currently shown are rendered;
+        the rest stay in current_results until their page is opened.
+        """
+        if not results:
+            return
             
-        for idx, row in self.excel_data.iterrows():
-            match_found = False
-            matched_columns = []
+        first = len(self.current_results)
+        if not first and not isinstance(results, list):
+            # Excel matches are kept as they are; rows are only read when shown or exported
+            self.current_results = results
+        else:
+            if not isinstance(self.current_results, list):
+                self.current_results = list(self.current_results)
+            self.current_results.extend(results)
+        
+        page_start = self.results_page * RESULTS_PAGE_SIZE
+        page_end = page_start + RESULTS_PAGE_SIZE
+        visible = results[max(0, page_start - first):max(0, page_end - first)]
+        if visible:
+            with self.render_phase():
+                self.results_text.config(state=tk.NORMAL)
+                if first == 0:
+                    self.results_text.delete(1.0, tk.END)
+                    self.results_text.insert(tk.END, self.current_header)
+                self.insert_results(visible, max(first, page_start) + 1)
+                self.results_text.config(state=tk.DISABLED)
             
-            for column in selected_columns:
-                cell_value = row[column]
-                
-                # Skip NaN/None values
-                if pd.isna(cell_value):
-                    continue
-                    
-                # Convert to string for text search
-                cell_str = str(cell_value)
-                
-                # Perform search
-                if case_sensitive:
-                    text_match = query in cell_str
-                else:
-                    text_match = query.lower() in cell_str.lower()
-                    
-                # Also check for numeric exact match
-                numeric_match = False
-                if numeric_query is not None and isinstance(cell_value, (int, float)):
-                    numeric_match = abs(cell_value - numeric_query) < 1e-10
-                    
-                if text_match or numeric_match:
-                    match_found = True
-                    matched_columns.append(column)
-                    
-            if match_found:
-                # Convert row to dictionary and include metadata
-                row_dict = row.to_dict()
-                results.append({
-                    'row_index': idx + 2,  # +2 because Excel is 1-indexed and has header
-                    'matched_columns': matched_columns,
-                    'data': row_dict
-                })
-                
-        return results
+        self.results_count_label.config(text=f"{len(self.current_results)} result(s) found")
+        self.update_page_controls()
+        
+    def show_results_page(self, page: int):
+        """Render one page of the current result set."""
+        page_count = max(1, -(-len(self.current_results) // RESULTS_PAGE_SIZE))
+        self.results_page = min(max(0, page), page_count - 1)
+        start = self.results_page * RESULTS_PAGE_SIZE
         
-    def display_results(self, results: List[Dict[str, Any]], query: str):
-        """Display search results in the results text widget."""
         self.results_text.config(state=tk.NORMAL)
         self.results_text.delete(1.0, tk.END)
-        
+        if self.current_results:
+            self.results_text.insert(tk.END, self.current_header)
+            self.insert_results(self.current_results[start:start + RESULTS_PAGE_SIZE], start + 1)
+        self.results_text.config(state=tk.DISABLED)
+        self.results_text.yview_moveto(0)
+        self.update_page_controls()
+        
+    def update_page_controls(self):
+        """Refresh the page label and Prev/Next buttons."""
+        total = len(self.current_results)
+        if total <= RESULTS_PAGE_SIZE:
+            self.page_label.config(text="")
+            self.prev_page_btn.config(state=tk.DISABLED)
+            self.next_page_btn.config(state=tk.DISABLED)
+            return
+            
+        start = self.results_page * RESULTS_PAGE_SIZE
+        end = min(total, start + RESULTS_PAGE_SIZE)
+        self.page_label.config(text=f"{start + 1}-{end} of {total}")
+        self.prev_page_btn.config(state=tk.NORMAL if start > 0 else tk.DISABLED)
+        self.next_page_btn.config(state=tk.NORMAL if end < total else tk.DISABLED)
+        
+    def finish_results(self):
+        """Update the results summary once a search has completed."""
+        results = self.current_results
         if not results:
+            self.results_text.config(state=tk.NORMAL)
+            self.results_text.delete(1.0, tk.END)
             self.results_text.insert(tk.END, "No matches found.")
+            self.results_text.config(state=tk.DISABLED)
             self.results_count_label.config(text="")
             self.export_btn.config(state=tk.DISABLED)
             self.status_var.set("Search completed - No results")
-            self.results_text.config(state=tk.DISABLED)
             return
             
-        # Display results based on file type
-        if self.loaded_file_type == 'pdf':
-            self.display_pdf_results(results, query)
-        elif self.loaded_file_type == 'excel':
-            self.display_excel_results(results, query)
-            
         self.results_count_label.config(text=f"{len(results)} result(s) found")
         self.export_btn.config(state=tk.NORMAL)
-        self.status_var.set(f"Search completed - {len(results)} results found")
-        self.results_text.config(state=tk.DISABLED)
+        if self.result_limit is not None and len(results) >= self.result_limit:
+            self.status_var.set(f"Search stopped at the {self.result_limit} result limit")
+        else:
+            self.status_var.set(f"Search completed - {len(results)} results found")
         
-    def display_pdf_results(self, results: List[Dict[str, Any]], query: str):
-        """Display PDF search results."""
-        self.results_text.insert(tk.END, f"PDF Search Results for: '{query}'\n")
-        self.results_text.insert(tk.END, "=" * 50 + "\n\n")
-        
-        for i, result in enumerate(results, 1):
-            self.results_text.insert(tk.END, f"Result #{i} - Page {result['page']}:\n")
-            self.results_text.insert(tk.END, "-" * 30 + "\n")
-            self.results_text.insert(tk.END, result['context'])
-            self.results_text.insert(tk.END, "\n\n")
-            
-    def display_excel_results(self, results: List[Dict[str, Any]], query: str):
-        """Display Excel search results."""
-        self.results_text.insert(tk.END, f"Excel Search Results for: '{query}'\n")
-        self.results_text.insert(tk.END, "=" * 50 + "\n\n")
-        
-        # Get all column names for display
-        all_columns = list(self.excel_data.columns)
-        
-        for i, result in enumerate(results, 1):
-            self.results_text.insert(tk.END, f"Result #{i} - Row {result['row_index']}:\n")
-            self.results_text.insert(tk.END, f"Matched columns: {', '.join(result['matched_columns'])}\n")
-            self.results_text.insert(tk.END, "-" * 50 + "\n")
-            
-            # Display all columns of the matched row
-            for col in all_columns:
-                value = result['data'][col]
-                # Highlight matched columns
-                if col in result['matched_columns']:
-                    self.results_text.insert(tk.END, f"★ {col}: {value}\n")
-                else:
-                    self.results_text.insert(tk.END, f"  {col}: {value}\n")
-                    
-            self.results_text.insert(tk.END, "\n")
+    def format_results_header(self, query: str, title: Optional[str] = None) -> str:
+        """Format the results heading for the loaded file type."""
+        if title is None:
+            if self.engine.loaded_file_type == 'pdf':
+                title = f"PDF Search Results for: '{query}'"
+            else:
+                title = f"Excel Search Results for: '{query}'"
+        return title + "\n" + "=" * 50 + "\n\n"
+        
+    def format_results(self, results: List[Dict[str, Any]], start: int = 1) -> str:
+        """Format results, numbering them from start.
+        
+        PDF and Excel results may be mixed (folder searches).
+        """
+        return ''.join(self.format_pdf_result(result, i) if 'page' in result
+                       else self.format_excel_result(result, i)
+                       for i, result in enumerate(results, start))
+        
+    def insert_results(self, results: List[Dict[str, Any]], start: int = 1):
+        """Append formatted results to the results pane, highlighting matches.
+        
+        PDF results carry the offsets of their matches within the context,
+        so the 'match' tag is applied directly without searching the text.
+        """
+        segments = []
+        for number, result in enumerate(results, start):
+            if 'page' not in result:
+                segments.extend((self.format_excel_result(result, number), ()))
+                continue
+                
+            text = self.format_pdf_result(result, number)
+            # The context is the last part of the formatted result
+            context_start = len(text) - len(result['context']) - 2
+            position = 0
+            for span_start, span_end in result.get('match_spans', ()):
+                span_start = max(context_start + span_start, position)
+                span_end = context_start + span_end
+                if span_end <= span_start:
+                    continue
+                segments.extend((text[position:span_start], (), text[span_start:span_end], ('match',)))
+                position = span_end
+            segments.extend((text[position:], ()))
+            
+        if segments:
+            self.results_text.insert(tk.END, *segments)
+            
+    def format_pdf_result(self, result: Dict[str, Any], number: int) -> str:
+        """Format one PDF search result."""
+        parts = [f"Result #{number} - Page {result['page']}:\n"]
+        if 'file' in result:
+            parts.append(f"File: {result['file']}\n")
+        if 'terms' in result:
+            parts.append(f"Terms: {', '.join(result['terms'])}\n")
+        parts.append("-" * 30 + "\n")
+        parts.append(result['context'])
+        parts.append("\n\n")
+        return ''.join(parts)
+            
+    def format_excel_result(self, result: Dict[str, Any], number: int) -> str:
+        """Format one Excel search result with all columns of its row."""
+        if 'sheet' in result:
+            parts = [f"Result #{number} - Sheet '{result['sheet']}', Row {result['row_index']}:\n"]
+        else:
+            parts = [f"Result #{number} - Row {result['row_index']}:\n"]
+        if 'file' in result:
+            parts.append(f"File: {result['file']}\n")
+        parts.append(f"Matched columns: {', '.join(map(str, result['matched_columns']))}\n")
+        if 'score' in result:
+            parts.append(f"Similarity: {result['score']:.2f}\n")
+        if 'terms' in result:
+            parts.append(f"Terms: {', '.join(result['terms'])}\n")
+        parts.append("-" * 50 + "\n")
+        
+        # Display all columns of the matched row
+        for col, value in result['data'].items():
+            # Highlight matched columns
+            if col in result['matched_columns']:
+                parts.append(f"★ {col}: {value}\n")
+            else:
+                parts.append(f"  {col}: {value}\n")
+                
+        parts.append("\n")
+        return ''.join(parts)
             
     def clear_results(self):
         """Clear the results display."""
+        self.current_results = []
+        self.results_page = 0
         self.results_text.config(state=tk.NORMAL)
         self.results_text.delete(1.0, tk.END)
         self.results_text.config(state=tk.DISABLED)
         self.results_count_label.config(text="")
         self.export_btn.config(state=tk.DISABLED)
+        self.update_page_controls()
         
     def export_results(self):
-        """Export search results to a file."""
-        if not self.results_text.get(1.0, tk.END).strip():
+        """Export every result (not just the page shown) on the worker thread.
+        
+        CSV, JSON Lines and .xlsx files are written straight from the result
+        objects (see result_export); .txt files get the text shown in the pane.
+        """
+        if self.busy:
+            return
+        if not self.current_results:
             messagebox.showwarning("Warning", "No results to export.")
             return
             
         file_path = filedialog.asksaveasfilename(
             title="Export Results",
-            defaultextension=".txt",
-            filetypes=[
-                ("Text files", "*.txt"),
-                ("All files", "*.*")
-            ]
+            defaultextension=".csv",
+            filetypes=[(description, f"*{extension}")
+                       for extension, description in EXPORT_FORMATS.items()]
+                      + [("Text files", "*.txt"), ("All files", "*.*")]
         )
+        if not file_path:
+            return
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension not in EXPORT_FORMATS and extension != '.txt':
+            messagebox.showwarning("Warning", "Please export to a .csv, .jsonl, .xlsx or .txt file.")
+            return
+            
+        # The worker gets its own copy (a cheap view for Excel matches)
+        results = self.current_results[:]
+        if extension == '.txt':
+            header = self.current_header
+            work = lambda: self.write_text_export(results, header, file_path)
+        else:
+            work = lambda: export_results(results, file_path, progress=self.report_progress)
+            
+        self.show_progress()
+        self.cancel_btn.grid_remove()  # Exports run to the end
+        self.set_busy(True)
+        self.status_var.set("Exporting...")
+        self.start_timing('export', file=file_path, results=len(results))
+        timer = self.operation_timer
+        
+        def timed_export():
+            with timer.span('write'):
+                return work()
+        self.run_in_background(self.timed_work(timed_export),
+                               lambda count: self.finish_export(file_path, count),
+                               self.fail_export)
+        
+    def write_text_export(self, results: List[Dict[str, Any]], header: str, file_path: str) -> int:
+        """Write results as the formatted text shown in the results pane (worker thread)."""
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(header)
+            for start in range(0, len(results), RESULTS_PAGE_SIZE):
+                f.write(self.format_results(results[start:start + RESULTS_PAGE_SIZE], start + 1))
+        return len(results)
+        
+    def finish_export(self, file_path: str, count: int):
+        """Report a finished export."""
+        self.hide_progress()
+        self.set_busy(False)
+        timing = self.finish_timing()
+        self.status_var.set(f"Exported {count} results to {file_path} | {timing}")
+        messagebox.showinfo("Success", f"Results exported to {file_path}")
+        
+    def fail_export(self, error: Exception):
+        """Report an export that raised an error."""
+        self.hide_progress()
+        self.set_busy(False)
+        self.finish_timing(error=str(error))
+        messagebox.showerror("Error", f"Failed to export results: {str(error)}")
+        self.status_var.set("Export error")
+        
+    def time_startup(self, timer: PhaseTimer, exit_when_drawn: bool = False):
+        """Finish timing start-up once the window has been drawn.
+        
+        The time to the first window is logged (and printed when
+        exit_when_drawn is set, which then closes the app), and the heavy
+        imports are warmed on a background thread.
+        """
+        def window_drawn():
+            self.root.update_idletasks()
+            timer.add('first draw', timer.total - sum(timer.phases.values()))
+            timer.stop()
+            append_timing_log(timer.record(), TIMING_LOG_PATH)
+            if exit_when_drawn:
+                print(f"Time to first window: {timer.total:.3f}s ({timer.summary()})")
+                self.root.destroy()
+                return
+            threading.Thread(target=self.warm_imports, daemon=True).start()
+            
+        self.root.after_idle(window_drawn)
         
-        if file_path:
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(self.results_text.get(1.0, tk.END))
-                messagebox.showinfo("Success", f"Results exported to {file_path}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to export results: {str(e)}")
-                
+    def warm_imports(self):
+        """Import pandas, numpy and pdfplumber ahead of the first load (background thread)."""
+        try:
+            warm_imports()
+        except ImportError as e:
+            # The load itself will report it
+            logger.warning("Could not preload %s: %s", e.name, e)
+            
     def run(self):
         """Start the application."""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.cancel_loading = True
+            self.task_executor.shutdown(wait=False, cancel_futures=True)
+            self.engine.shutdown()
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Main function to run the application."""
-    try:
-        # Check for required dependencies
-        import pandas as pd
-        import pdfplumber
-    except ImportError as e:
+    parser = argparse.ArgumentParser(description="Search PDF and Excel files.")
+    parser.add_argument('--startup-time', action='store_true',
+                        help="Print the time until the window is first drawn, then exit")
+    args = parser.parse_args(argv)
+    startup = PhaseTimer('startup')
+    
+    # Check for required dependencies without importing them; pandas and
+    # pdfplumber are loaded in the background once the window is up
+    missing = [name for name in ('pandas', 'openpyxl', 'pdfplumber')
+               if importlib.util.find_spec(name) is None]
+    if missing:
         error_msg = f"""
-Missing required dependency: {e}
+Missing required dependency: {', '.join(missing)}
 
 Please install the required packages:
 pip install pandas openpyxl pdfplumber
@@ -674,9 +1243,13 @@ Then run the application again.
         return
         
     # Create and run the application
-    app = FileSearchApp()
+    with startup.span('window'):
+        app = FileSearchApp()
+    app.time_startup(startup, exit_when_drawn=args.startup_time)
     app.run()
 
 
 if __name__ == "__main__":
+    # Required for extraction worker processes in frozen executables
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,205 @@
+"""
+PDF Text Extraction Backends
+============================
+
+Every PDF page is turned into plain text by an extractor backend before it
+is searched. pdfplumber is the default and the most faithful; the other
+backends trade some layout fidelity for speed and are offered when their
+packages are installed:
+
+    pdfplumber - full character objects, x/y tolerance grouping (default)
+    pdfminer   - pdfminer.six layout analysis with box ordering turned off
+    pypdf      - pypdf's content-stream text extraction (optional package)
+
+Use benchmark_extractors.py to compare their speed and output on your own
+documents.
+
+The backend packages are imported when a document is first opened with
+them (or by preload_extractor), so importing this module is cheap.
+"""
+
+import abc
+import importlib
+import importlib.util
+import io
+import logging
+from typing import List, Dict, Optional, Tuple, Type
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXTRACTOR = 'pdfplumber'
+
+
+class PdfExtractor(abc.ABC):
+    """Open PDF document that extracts the text of single pages.
+
+    Subclasses implement page_count and _extract_page. Instances hold the
+    file open until close() (or the end of a with block).
+    """
+
+    name = ''
+    modules: Tuple[str, ...] = ()  # Packages the backend imports
+
+    def __init__(self, file_path: str):
+        """Open the PDF at file_path."""
+        self.file_path = file_path
+
+    @property
+    @abc.abstractmethod
+    def page_count(self) -> int:
+        """Number of pages in the document."""
+
+    def extract_page(self, page_num: int) -> Optional[str]:
+        """Extract the text of a 1-based page.
+
+        Returns None if the page could not be read.
+        """
+        try:
+            return self._extract_page(page_num) or ''
+        except Exception as e:
+            # Skip problematic pages
+            logger.warning("Could not search page %s: %s", page_num, e)
+            return None
+
+    @abc.abstractmethod
+    def _extract_page(self, page_num: int) -> str:
+        """Backend-specific extraction; may raise on unreadable pages."""
+
+    def close(self):
+        """Release the open document."""
+
+    def __enter__(self) -> 'PdfExtractor':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PdfplumberExtractor(PdfExtractor):
+    """pdfplumber text extraction (accurate, builds full character objects)."""
+
+    name = 'pdfplumber'
+    modules = ('pdfplumber',)
+
+    def __init__(self, file_path: str):
+        import pdfplumber
+        super().__init__(file_path)
+        self.pdf = pdfplumber.open(file_path)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pdf.pages)
+
+    def _extract_page(self, page_num: int) -> str:
+        page = self.pdf.pages[page_num - 1]
+        # Super fast text extraction with minimal processing
+        return page.extract_text(layout=False, x_tolerance=3, y_tolerance=3)
+
+    def close(self):
+        self.pdf.close()
+
+
+class PdfminerExtractor(PdfExtractor):
+    """pdfminer.six layout analysis without the costly reading-order pass.
+
+    boxes_flow=None keeps text boxes in content-stream order instead of
+    sorting them by position, which is most of pdfminer's layout time.
+    """
+
+    name = 'pdfminer'
+    modules = ('pdfminer.converter', 'pdfminer.layout', 'pdfminer.pdfdocument',
+               'pdfminer.pdfinterp', 'pdfminer.pdfpage', 'pdfminer.pdfparser')
+
+    def __init__(self, file_path: str):
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfinterp import PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfparser import PDFParser
+        super().__init__(file_path)
+        self.file = open(file_path, 'rb')
+        try:
+            self.document = PDFDocument(PDFParser(self.file))
+            self.pages = list(PDFPage.create_pages(self.document))
+        except Exception:
+            self.file.close()
+            raise
+        self.resources = PDFResourceManager(caching=True)
+        self.laparams = LAParams(char_margin=2.0, line_margin=0.5, word_margin=0.1,
+                                 boxes_flow=None)
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    def _extract_page(self, page_num: int) -> str:
+        from pdfminer.converter import TextConverter
+        from pdfminer.pdfinterp import PDFPageInterpreter
+        output = io.StringIO()
+        device = TextConverter(self.resources, output, laparams=self.laparams)
+        try:
+            PDFPageInterpreter(self.resources, device).process_page(self.pages[page_num - 1])
+        finally:
+            device.close()
+        # Text boxes end with a newline and the page with a form feed
+        return output.getvalue().replace('\x0c', '').strip('\n')
+
+    def close(self):
+        self.file.close()
+
+
+class PypdfExtractor(PdfExtractor):
+    """pypdf content-stream text extraction (fast, no layout analysis)."""
+
+    name = 'pypdf'
+    modules = ('pypdf',)
+
+    def __init__(self, file_path: str):
+        import pypdf
+        super().__init__(file_path)
+        self.file = open(file_path, 'rb')
+        try:
+            self.reader = pypdf.PdfReader(self.file)
+        except Exception:
+            self.file.close()
+            raise
+
+    @property
+    def page_count(self) -> int:
+        return len(self.reader.pages)
+
+    def _extract_page(self, page_num: int) -> str:
+        return self.reader.pages[page_num - 1].extract_text()
+
+    def close(self):
+        self.file.close()
+
+
+EXTRACTORS: Dict[str, Type[PdfExtractor]] = {
+    PdfplumberExtractor.name: PdfplumberExtractor,
+    PdfminerExtractor.name: PdfminerExtractor,
+    PypdfExtractor.name: PypdfExtractor,
+}
+
+
+def available_extractors() -> List[str]:
+    """Names of the backends whose packages are installed, default first."""
+    names = list(EXTRACTORS)
+    if importlib.util.find_spec('pypdf') is None:  # Optional backend
+        names.remove(PypdfExtractor.name)
+    return names
+
+
+def preload_extractor(name: str):
+    """Import a backend's packages ahead of its first use."""
+    for module in EXTRACTORS[name].modules:
+        importlib.import_module(module)
+
+
+def open_extractor(name: str, file_path: str) -> PdfExtractor:
+    """Open a PDF with the named backend."""
+    if name not in available_extractors():
+        raise ValueError(f"PDF extractor '{name}' is not available "
+                         f"(choose from: {', '.join(available_extractors())})")
+    return EXTRACTORS[name](file_path)
@@ -0,0 +1,151 @@
+"""
+Result Export
+=============
+
+Writes search results straight from the result dicts to CSV, JSON Lines or
+an .xlsx workbook. Nothing is formatted for display first. Rows are written
+in chunks, so memory use stays flat and the time taken grows only with the
+number of results:
+
+    count = export_results(results, 'hits.csv')
+
+PDF results become page, line_number and context. Excel results become
+sheet, row_index, matched_columns and one column per cell of the row. The
+tags added by folder and term-list searches (file, query, terms) are kept.
+"""
+
+import csv
+import itertools
+import json
+import os
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from search_engine import ExcelMatches, openpyxl, to_jsonable
+
+# Supported export file types
+EXPORT_FORMATS = {'.csv': 'CSV files', '.jsonl': 'JSON Lines files', '.xlsx': 'Excel workbooks'}
+EXPORT_CHUNK_ROWS = 5000  # Results converted and written at a time
+
+# Result fields written before the row data (in this order) when any result has them
+RESULT_FIELDS = ['file', 'query', 'terms', 'sheet', 'page', 'line_number', 'context',
+                 'row_index', 'matched_columns']
+
+XLSX_MAX_ROWS = 1048576  # Rows per worksheet, including the header
+
+
+def export_columns(results: List[Dict[str, Any]]) -> Tuple[List[str], List[Any]]:
+    """Return the result fields present and the Excel row columns, in first-seen order."""
+    if isinstance(results, ExcelMatches):
+        # Every row of a part has the same fields, and its columns are those of the searched frames
+        present = {'row_index', 'matched_columns'}
+        for sheet, *_, extras in results.parts:
+            if sheet is not None:
+                present.add('sheet')
+            present.update(extras)
+        return [field for field in RESULT_FIELDS if field in present], results.data_columns()
+    present = set(itertools.chain.from_iterable(results))
+    fields = [field for field in RESULT_FIELDS if field in present]
+    data_columns = dict.fromkeys(itertools.chain.from_iterable(
+        result['data'] for result in results if 'data' in result))
+    return fields, list(data_columns)
+
+
+def flat_value(value: Any) -> Any:
+    """Convert a value for a CSV or worksheet cell (lists are joined with '; ')."""
+    if isinstance(value, str):
+        return value
+    value = to_jsonable(value)
+    if isinstance(value, list):
+        return '; '.join(str(item) for item in value)
+    return value
+
+
+def iter_row_chunks(results: List[Dict[str, Any]], fields: List[str], data_columns: List[Any],
+                    chunk_rows: int = EXPORT_CHUNK_ROWS,
+                    progress: Optional[Callable[[float, str], None]] = None
+                    ) -> Iterator[List[List[Any]]]:
+    """Yield the results as lists of flat rows (fields, then data columns), chunk_rows at a time."""
+    total = len(results)
+    for start in range(0, total, chunk_rows):
+        rows = []
+        for result in results[start:start + chunk_rows]:
+            data = result.get('data', {})
+            rows.append([flat_value(result.get(field)) for field in fields]
+                        + [flat_value(data.get(column)) for column in data_columns])
+        yield rows
+        if progress is not None:
+            done = min(total, start + chunk_rows)
+            progress(done / total * 100, f"Exporting... {done}/{total} results")
+
+
+def write_csv(results: List[Dict[str, Any]], path: str, chunk_rows: int = EXPORT_CHUNK_ROWS,
+              progress: Optional[Callable[[float, str], None]] = None):
+    """Write results as CSV with a header row (UTF-8 with BOM, so Excel detects it)."""
+    fields, data_columns = export_columns(results)
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(fields + [str(column) for column in data_columns])
+        for rows in iter_row_chunks(results, fields, data_columns, chunk_rows, progress):
+            writer.writerows(rows)
+
+
+def write_jsonl(results: List[Dict[str, Any]], path: str, chunk_rows: int = EXPORT_CHUNK_ROWS,
+                progress: Optional[Callable[[float, str], None]] = None):
+    """Write one JSON object per result; Excel rows keep their cells under 'data'."""
+    fields, _ = export_columns(results)
+    fields.append('data')
+    total = len(results)
+    with open(path, 'w', encoding='utf-8') as f:
+        for start in range(0, total, chunk_rows):
+            f.writelines(json.dumps(to_jsonable({field: result[field] for field in fields
+                                                 if field in result}),
+                                    ensure_ascii=False) + '\n'
+                         for result in results[start:start + chunk_rows])
+            if progress is not None:
+                done = min(total, start + chunk_rows)
+                progress(done / total * 100, f"Exporting... {done}/{total} results")
+
+
+def write_xlsx(results: List[Dict[str, Any]], path: str, chunk_rows: int = EXPORT_CHUNK_ROWS,
+               progress: Optional[Callable[[float, str], None]] = None):
+    """Write results to a workbook in openpyxl's streaming write-only mode.
+
+    Results that do not fit on one worksheet continue on 'Results 2' and so on.
+    """
+    fields, data_columns = export_columns(results)
+    header = fields + [str(column) for column in data_columns]
+    # Control characters (e.g. form feeds from PDF text) are not allowed in cells
+    illegal = openpyxl.cell.cell.ILLEGAL_CHARACTERS_RE
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = None
+    sheet_rows = XLSX_MAX_ROWS
+    for rows in iter_row_chunks(results, fields, data_columns, chunk_rows, progress):
+        for row in rows:
+            if sheet_rows >= XLSX_MAX_ROWS:
+                sheet = workbook.create_sheet(f"Results {len(workbook.worksheets) + 1}"
+                                              if workbook.worksheets else "Results")
+                sheet.append(header)
+                sheet_rows = 1
+            sheet.append([illegal.sub('', value) if isinstance(value, str) else value
+                          for value in row])
+            sheet_rows += 1
+    if sheet is None:
+        workbook.create_sheet("Results").append(header)
+    workbook.save(path)
+
+
+def export_results(results: List[Dict[str, Any]], path: str, chunk_rows: int = EXPORT_CHUNK_ROWS,
+                   progress: Optional[Callable[[float, str], None]] = None) -> int:
+    """Write results to path in the format given by its extension (see EXPORT_FORMATS).
+
+    progress(percent, message) is called after each chunk. Returns the
+    number of results written.
+    """
+    writers = {'.csv': write_csv, '.jsonl': write_jsonl, '.xlsx': write_xlsx}
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in writers:
+        raise ValueError(f"Unsupported export format '{extension or path}' "
+                         f"(use {', '.join(EXPORT_FORMATS)})")
+    writers[extension](results, path, chunk_rows, progress)
+    return len(results)
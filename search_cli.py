@@ -0,0 +1,172 @@
+"""
+Batch Command-Line Search
+=========================
+
+Runs a list of queries against one or more PDF or Excel files without a
+display and writes every match as one JSON object per line (JSON Lines).
+Directories are searched recursively in parallel (corpus mode).
+
+Examples:
+    python search_cli.py contract.pdf -q warranty -q "payment terms"
+    python search_cli.py exports/*.xlsx --queries-file parts.txt --columns "Part No" -o hits.jsonl
+    python search_cli.py catalog.pdf --queries-file parts.txt --single-pass
+    python search_cli.py //fileserver/contracts -q indemnity --workers 8
+"""
+
+import argparse
+import json
+import os
+import multiprocessing
+import sys
+from typing import List, Dict, Any, Optional
+
+from pdf_extractors import DEFAULT_EXTRACTOR, available_extractors
+from search_engine import (
+    DEFAULT_EXTRACTION_WORKERS, SEARCH_MODES, ExcelFrameCache, PageTextCache, SearchEngine,
+    parse_page_range, to_jsonable
+)
+
+
+def read_queries(args: argparse.Namespace) -> List[str]:
+    """Collect queries from -q options and the optional queries file."""
+    queries = list(args.query or [])
+    if args.queries_file:
+        with open(args.queries_file, 'r', encoding='utf-8') as f:
+            queries.extend(line.strip() for line in f)
+    return [query for query in queries if query]
+
+
+def write_results(results: List[Dict[str, Any]], output, **tags):
+    """Write results as JSON Lines, adding the given tags to each record."""
+    for result in results:
+        record: Dict[str, Any] = dict(tags)
+        record.update(result)
+        output.write(json.dumps(to_jsonable(record), ensure_ascii=False) + '\n')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
+    parser = argparse.ArgumentParser(
+        description="Search PDF and Excel files and write matches as JSON Lines.")
+    parser.add_argument('files', nargs='+',
+                        help="PDF or Excel files, or directories to search recursively")
+    parser.add_argument('-q', '--query', action='append',
+                        help="Search query (may be given several times)")
+    parser.add_argument('--queries-file',
+                        help="Text file with one query per line")
+    parser.add_argument('-o', '--output',
+                        help="Write results to this .jsonl file (default: standard output)")
+    parser.add_argument('--columns',
+                        help="Comma-separated Excel columns to search (default: all columns)")
+    parser.add_argument('--case-sensitive', action='store_true',
+                        help="Match case exactly")
+    parser.add_argument('--mode', choices=SEARCH_MODES, default=SEARCH_MODES[0],
+                        help="Excel matching: substring, exact (whole cell equals the query, "
+                             "hash-indexed) or fuzzy (typo-tolerant, ranked by similarity with "
+                             "a 'score' per result)")
+    parser.add_argument('--single-pass', action='store_true',
+                        help="Match all queries in one pass per file; each result lists "
+                             "the matching queries under 'terms'")
+    parser.add_argument('--max-results', type=int,
+                        help="Stop each search after this many results")
+    parser.add_argument('--pages',
+                        help="Only search this PDF page range, e.g. 10-40 or 10-")
+    parser.add_argument('--first-hit', action='store_true',
+                        help="Report only the first matching line of each PDF page")
+    parser.add_argument('--workers', type=int, default=DEFAULT_EXTRACTION_WORKERS,
+                        help="Processes used to extract uncached PDF pages and parse workbook sheets")
+    parser.add_argument('--extractor', choices=available_extractors(), default=DEFAULT_EXTRACTOR,
+                        help="PDF text extraction backend (default: %(default)s)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Do not read or write the on-disk page text and workbook caches")
+    parser.add_argument('--low-memory', action='store_true',
+                        help="Stream .xlsx rows in chunks instead of loading whole workbooks")
+    parser.add_argument('--no-manifest', action='store_true',
+                        help="Search every file in a directory, even if unchanged since the last run")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run every query against every file; returns the process exit code."""
+    args = build_parser().parse_args(argv)
+    queries = read_queries(args)
+    if not queries:
+        print("Error: no queries given (use -q or --queries-file)", file=sys.stderr)
+        return 2
+    columns = [column.strip() for column in args.columns.split(',')] if args.columns else None
+    try:
+        page_range = parse_page_range(args.pages or '')
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    limits = {'max_results': args.max_results, 'page_range': page_range,
+              'first_hit': args.first_hit}
+
+    if args.no_cache:
+        engine = SearchEngine(page_cache=PageTextCache(cache_dir=None),
+                              frame_cache=ExcelFrameCache(cache_dir=None),
+                              extractor=args.extractor)
+    else:
+        engine = SearchEngine(extractor=args.extractor)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    exit_code = 0
+
+    try:
+        for file_path in args.files:
+            if os.path.isdir(file_path):
+                # Corpus mode - results stream out as each file finishes
+                results = engine.search_corpus(
+                    file_path, queries, args.case_sensitive, columns, args.workers,
+                    single_pass=args.single_pass,
+                    manifest_path=None if args.no_manifest else '',
+                    on_results=lambda batch: write_results(batch, output),
+                    low_memory=args.low_memory, mode=args.mode, **limits)
+                print(f"{file_path}: {len(results)} result(s)", file=sys.stderr)
+                continue
+
+            try:
+                status = engine.load_file(file_path, args.low_memory, args.workers)
+            except Exception as e:
+                print(f"Error: {file_path}: {e}", file=sys.stderr)
+                exit_code = 1
+                continue
+            print(f"{file_path}: {status}", file=sys.stderr)
+
+            if args.single_pass:
+                try:
+                    results = engine.search_terms(
+                        queries, args.case_sensitive, columns, args.workers,
+                        on_results=lambda batch: write_results(batch, output, file=file_path),
+                        **limits)
+                except Exception as e:
+                    print(f"Error: {file_path}: {e}", file=sys.stderr)
+                    exit_code = 1
+                    continue
+                print(f"{file_path}: {len(queries)} terms - {len(results)} result(s)", file=sys.stderr)
+                continue
+
+            for query in queries:
+                try:
+                    results = engine.search(
+                        query, args.case_sensitive, columns, args.workers,
+                        on_results=lambda batch: write_results(batch, output,
+                                                               file=file_path, query=query),
+                        mode=args.mode, **limits)
+                except Exception as e:
+                    print(f"Error: {file_path}: '{query}': {e}", file=sys.stderr)
+                    exit_code = 1
+                    continue
+
+                print(f"{file_path}: '{query}' - {len(results)} result(s)", file=sys.stderr)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        engine.shutdown()
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    # Required for extraction worker processes in frozen executables
+    multiprocessing.freeze_support()
+    sys.exit(main())
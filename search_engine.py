@@ -0,0 +1,2888 @@
+"""
+PDF and Excel Search Engine
+===========================
+
+Loading and matching logic for PDF and Excel files, with no Tkinter
+dependency. It is used by the desktop application (file_search_app.py) and
+the batch command-line tool (search_cli.py), and can be imported directly
+by scripts and scheduled jobs:
+
+    engine = SearchEngine()
+    engine.load_file("contract.pdf")
+    for result in engine.search("warranty"):
+        print(result['page'], result['context'])
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import re
+import sys
+import json
+import math
+import mmap
+import pickle
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from collections.abc import Sequence
+from contextlib import nullcontext
+from itertools import chain, compress, groupby
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Optional, Tuple, Set, Callable, Iterable, Iterator
+
+from pdf_extractors import (
+    DEFAULT_EXTRACTOR, PdfExtractor, available_extractors, open_extractor, preload_extractor
+)
+from timing import PhaseTimer
+
+logger = logging.getLogger(__name__)  # Warnings go to stderr unless logging is configured
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+    
+    pandas, numpy and openpyxl make up most of the start-up time of the
+    tools built on this module, so they are only imported once a file is
+    actually loaded (or warm_imports() is called).
+    """
+    
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        
+    def _import(self):
+        """Import the real module (once) and return it."""
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+        
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._import(), attribute)
+
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+openpyxl = LazyModule('openpyxl')
+
+
+# Page text cache settings
+DEFAULT_CACHE_DIR = os.environ.get(
+    'FILE_SEARCH_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.file_search_cache'))
+DEFAULT_CACHE_MEMORY_BYTES = 64 * 1024 * 1024  # 64 MB of page text in memory
+PAGE_CACHE_BATCH_PAGES = 100  # Extracted pages written to the disk store at a time
+
+# Excel workbook cache settings
+DEFAULT_FRAME_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, 'frames')
+DEFAULT_FRAME_CACHE_BYTES = int(os.environ.get('FILE_SEARCH_FRAME_CACHE_MB', '2048')) * 1024 * 1024
+
+# Search result cache settings
+DEFAULT_RESULT_CACHE_ENTRIES = 32  # Result sets kept in memory
+DEFAULT_RESULT_CACHE_RESULTS = 200000  # Results kept across all of them
+
+# Excel search modes
+SEARCH_MODES = ['substring', 'exact', 'fuzzy']
+FUZZY_MIN_COVERAGE = 0.6  # Share of the query's trigrams a cell must contain
+NARROWING_HISTORY = 5  # Complete searches remembered for narrowing longer queries
+
+# Low-memory Excel streaming settings
+EXCEL_STREAM_CHUNK_ROWS = 5000  # Rows parsed and matched at a time
+
+# Parallel page extraction settings
+DEFAULT_EXTRACTION_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+PARALLEL_MIN_PAGES = 20  # Fewer uncached pages than this are extracted serially
+PARALLEL_CHUNK_PAGES = 25  # Upper bound on pages handed to a worker at once
+
+# Supported file extensions
+PDF_EXTENSIONS = ['.pdf']
+EXCEL_EXTENSIONS = ['.xlsx', '.xls']
+
+# Corpus (folder) search settings
+CORPUS_MANIFEST_DIR = os.path.join(DEFAULT_CACHE_DIR, 'corpus')
+
+
+def warm_imports():
+    """Import the heavy libraries ahead of their first use.
+    
+    Meant for a background thread once an application's window is up, so
+    the first load does not pay for the imports.
+    """
+    for module in (np, pd, openpyxl):
+        module._import()
+    preload_extractor(DEFAULT_EXTRACTOR)
+
+
+def extract_page_texts(file_path: str, page_numbers: List[int],
+                       extractor: str = DEFAULT_EXTRACTOR) -> List[Tuple[int, Optional[str]]]:
+    """Extract several pages with a private extractor handle.
+    
+    Runs inside extraction worker processes, so it must stay importable at
+    module level.
+    """
+    with open_extractor(extractor, file_path) as pdf:
+        return [(page_num, pdf.extract_page(page_num)) for page_num in page_numbers]
+
+
+def read_excel_sheet(file_path: str, sheet_name: str) -> pd.DataFrame:
+    """Parse one worksheet (runs in extraction worker processes)."""
+    return pd.read_excel(file_path, sheet_name=sheet_name)
+
+
+def to_jsonable(value: Any) -> Any:
+    """Convert cell values (NaN, timestamps, NumPy scalars) to JSON-safe types."""
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        value = value.item()  # NumPy scalar -> Python scalar
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def find_corpus_files(directory: str) -> List[str]:
+    """List the supported files under a directory, largest first.
+    
+    Scheduling big files first keeps corpus search workers busy until the
+    end instead of leaving one worker on a huge file after the rest finish.
+    """
+    extensions = tuple(PDF_EXTENSIONS + EXCEL_EXTENSIONS)
+    sized_files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            if name.lower().endswith(extensions) and not name.startswith('~$'):
+                file_path = os.path.join(root, name)
+                try:
+                    sized_files.append((os.path.getsize(file_path), file_path))
+                except OSError:
+                    continue
+    sized_files.sort(key=lambda item: (-item[0], item[1]))
+    return [file_path for _, file_path in sized_files]
+
+
+def search_corpus_file(file_path: str, queries: List[str], case_sensitive: bool = False,
+                       columns: Optional[List[str]] = None, single_pass: bool = False,
+                       extractor: str = DEFAULT_EXTRACTOR, max_results: Optional[int] = None,
+                       page_range: Optional[Tuple[int, Optional[int]]] = None,
+                       first_hit: bool = False, low_memory: bool = False,
+                       mode: str = 'substring', page_cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                       frame_cache_dir: Optional[str] = DEFAULT_FRAME_CACHE_DIR
+                       ) -> List[Dict[str, Any]]:
+    """Search one corpus file for every query (runs in worker processes).
+    
+    Results are tagged with 'file' and 'query' (or 'terms' in single-pass
+    mode). Excel columns that a workbook does not have are ignored. The
+    limits and mode apply to each search as in SearchEngine.search. The
+    on-disk caches live in the given directories (None keeps them off).
+    """
+    limits = {'max_results': max_results, 'page_range': page_range, 'first_hit': first_hit}
+    engine = SearchEngine(page_cache=PageTextCache(cache_dir=page_cache_dir),
+                          frame_cache=ExcelFrameCache(cache_dir=frame_cache_dir),
+                          extractor=extractor)
+    try:
+        engine.load_file(file_path, low_memory)
+        file_columns = None
+        if engine.loaded_file_type == 'excel' and columns:
+            file_columns = [column for column in columns if column in engine.excel_columns]
+            if not file_columns:
+                return []
+                
+        if single_pass:
+            return [{**result, 'file': file_path}
+                    for result in engine.search_terms(queries, case_sensitive, file_columns, **limits)]
+            
+        results = []
+        for query in queries:
+            for result in engine.search(query, case_sensitive, file_columns, mode=mode, **limits):
+                result['file'] = file_path
+                result['query'] = query
+                results.append(result)
+        return results
+    finally:
+        engine.shutdown()
+
+
+class CorpusManifest:
+    """Stored record of a previous corpus search.
+    
+    For every file it keeps the size, modification time and a key of the
+    search options used, plus the results. Unchanged files searched with the
+    same options are answered from the manifest instead of being reopened.
+    """
+    
+    def __init__(self, path: str):
+        """Load the manifest at path, starting empty if it is missing or unreadable."""
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.files = json.load(f).get('files', {})
+        except (OSError, ValueError):
+            self.files = {}
+            
+    @staticmethod
+    def default_path(directory: str) -> str:
+        """Manifest location for a corpus directory (inside the cache directory)."""
+        key = hashlib.sha1(os.path.abspath(directory).encode('utf-8')).hexdigest()
+        return os.path.join(CORPUS_MANIFEST_DIR, f"{key}.json")
+        
+    @staticmethod
+    def search_key(queries: List[str], case_sensitive: bool, columns: Optional[List[str]],
+                   single_pass: bool, extractor: str = DEFAULT_EXTRACTOR,
+                   max_results: Optional[int] = None,
+                   page_range: Optional[Tuple[int, Optional[int]]] = None,
+                   first_hit: bool = False, mode: str = 'substring') -> str:
+        """Build a key identifying the search options."""
+        options = [queries, case_sensitive, columns, single_pass]
+        if extractor != DEFAULT_EXTRACTOR:
+            options.append(extractor)
+        if max_results is not None or page_range is not None or first_hit:
+            options.append([max_results, page_range, first_hit])
+        if mode != 'substring':
+            options.append(mode)
+        options = json.dumps(options, default=str)
+        return hashlib.sha1(options.encode('utf-8')).hexdigest()
+        
+    def lookup(self, file_path: str, search_key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return stored results if the file is unchanged and was searched the same way."""
+        entry = self.files.get(os.path.abspath(file_path))
+        if entry is None or entry.get('search_key') != search_key:
+            return None
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if entry.get('size') != stat.st_size or entry.get('mtime_ns') != stat.st_mtime_ns:
+            return None
+        return entry.get('results', [])
+        
+    def record(self, file_path: str, search_key: str, results: List[Dict[str, Any]]):
+        """Store the results of searching a file."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return
+        self.files[os.path.abspath(file_path)] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'search_key': search_key,
+            'results': to_jsonable(results)
+        }
+        
+    def save(self):
+        """Write the manifest to disk atomically."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'files': self.files}, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+
+def excel_header_names(header: Tuple[Any, ...]) -> List[Any]:
+    """Name header cells the way pd.read_excel does.
+    
+    Blank cells become 'Unnamed: <position>' and repeated names get '.1',
+    '.2', ... suffixes.
+    """
+    names: List[Any] = []
+    seen: Dict[Any, int] = {}
+    for position, name in enumerate(header):
+        if name is None or (isinstance(name, str) and not name.strip()):
+            name = f"Unnamed: {position}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+
+def excel_cell_value(value: Any) -> Any:
+    """Convert a cell value read by openpyxl the way pd.read_excel does.
+    
+    Empty cells become '' (read as missing) and whole-number floats become
+    ints.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def parse_excel_rows(rows: List[Tuple[Any, ...]], columns: List[Any],
+                     dtypes: Optional[Dict[Any, Any]] = None) -> pd.DataFrame:
+    """Build a frame from worksheet rows, inferring column types as pd.read_excel does.
+    
+    dtypes casts the given columns to a fixed type; object keeps their
+    cell values as they are.
+    """
+    data = [[excel_cell_value(value) for value in row] for row in rows]
+    parser = pd.io.parsers.TextParser(data, names=columns, header=None, dtype=dtypes or None,
+                                      skip_blank_lines=False)
+    return parser.read()
+
+
+def combine_excel_dtypes(dtypes: Set[Any], has_blanks: bool, bool_text: bool) -> Optional[Any]:
+    """Return the type pd.read_excel gives a column whose row chunks parse as dtypes.
+    
+    Returns None when every chunk already infers that type on its own.
+    Numbers and booleans combine like a single numeric column (float once
+    any cell is blank), but booleans written as text (bool_text) are not
+    numbers and are left to each chunk. Any other mix keeps the cells as
+    objects.
+    """
+    if bool_text and any(dtype.kind == 'b' for dtype in dtypes):
+        return None if len(dtypes) == 1 else np.dtype(object)
+    if all(dtype.kind in 'biuf' for dtype in dtypes):
+        if not dtypes:
+            return None
+        if has_blanks or any(dtype.kind == 'f' for dtype in dtypes):
+            return np.dtype(np.float64)
+        if any(dtype.kind in 'iu' for dtype in dtypes):
+            return np.dtype(np.int64)
+        return np.dtype(bool)
+    if len(dtypes) == 1:
+        # Chunks of blank dates still need to read as NaT rather than NaN
+        dtype = next(iter(dtypes))
+        return dtype if has_blanks and dtype.kind == 'M' else None
+    return np.dtype(object)
+
+
+def column_text(column: pd.Series) -> pd.Series:
+    """Return the str() form of a column's cells, as substring matching sees them."""
+    if column.dtype == object or pd.api.types.is_numeric_dtype(column):
+        return column.astype(str)
+    # Dates, categories etc. - keep exactly what str() gives per cell
+    return column.map(str)
+
+
+def group_positions(keys: List[Any], positions: np.ndarray) -> Dict[Any, np.ndarray]:
+    """Map each distinct key to the positions (in order) that carry it."""
+    if not len(positions):
+        return {}
+    codes, uniques = pd.factorize(pd.Series(keys, dtype=object))
+    order = np.argsort(codes, kind='stable')
+    boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+    return dict(zip(uniques, np.split(positions[order], boundaries)))
+
+
+def match_excel_column(column: pd.Series, query: str, case_sensitive: bool,
+                       numeric_query: Optional[float]) -> np.ndarray:
+    """Return a boolean mask of the cells in a column that match the query.
+    
+    A cell matches if its string form contains the query (the query must
+    already be lower-cased for case-insensitive searches) or if it is a
+    number equal to numeric_query. Missing values never match.
+    """
+    present = column.notna().to_numpy()
+    if not present.any():
+        return present
+        
+    # Text match on the cell's str() form, evaluated column-wise
+    if pd.api.types.is_integer_dtype(column) and query.strip('0123456789-'):
+        # Integers print as digits only, so no text match is possible
+        mask = np.zeros(len(column), dtype=bool)
+    else:
+        text = column_text(column)
+        if not case_sensitive:
+            text = text.str.lower()
+        mask = text.str.contains(query, regex=False).to_numpy(dtype=bool, na_value=False) & present
+    
+    # Also check for numeric exact match
+    if numeric_query is not None:
+        mask |= match_numeric_column(column, numeric_query)
+            
+    return mask
+
+
+def match_numeric_column(column: pd.Series, numeric_query: float) -> np.ndarray:
+    """Return a boolean mask of the numeric cells equal to numeric_query."""
+    kind = pd.api.types.infer_dtype(column, skipna=True)
+    if kind in ('integer', 'floating', 'mixed-integer-float', 'boolean', 'decimal'):
+        values = column.to_numpy(dtype=float, na_value=np.nan)
+        with np.errstate(invalid='ignore'):
+            return np.abs(values - numeric_query) < 1e-10
+    if kind in ('mixed', 'mixed-integer'):
+        return column.map(
+            lambda value: (isinstance(value, (int, float)) and not pd.isna(value)
+                           and abs(value - numeric_query) < 1e-10)
+        ).to_numpy(dtype=bool)
+    return np.zeros(len(column), dtype=bool)
+
+
+def parse_page_range(text: str) -> Optional[Tuple[int, Optional[int]]]:
+    """Parse a page range such as '12', '10-40', '10-' or '-40'.
+    
+    Returns (first, last) with 1-based inclusive pages (last is None for an
+    open end), or None for an empty string. Raises ValueError otherwise.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    try:
+        if '-' in text:
+            first_text, last_text = (part.strip() for part in text.split('-', 1))
+            first = int(first_text) if first_text else 1
+            last = int(last_text) if last_text else None
+        else:
+            first = last = int(text)
+    except ValueError:
+        raise ValueError(f"Invalid page range '{text}' (use e.g. 12, 10-40 or 10-)")
+    if first < 1 or (last is not None and last < first):
+        raise ValueError(f"Invalid page range '{text}' (use e.g. 12, 10-40 or 10-)")
+    return first, last
+
+
+def parse_numeric_query(query: str) -> Optional[float]:
+    """Convert query to a number for exact numeric matching, if it is one."""
+    try:
+        return float(query)
+    except ValueError:
+        return None
+
+
+def fold_case(text: str) -> str:
+    """Lower-case text without changing its length, so offsets still line up.
+    
+    The few characters whose lower case is longer (such as 'İ') are kept
+    as they are.
+    """
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return ''.join(char if len(char.lower()) != 1 else char.lower() for char in text)
+
+
+def check_pdf_query(query: str):
+    """Raise ValueError if a PDF query contains a line break.
+    
+    PDF results are single lines, and the page index records positions
+    within lines, so a query spanning lines would match on some search
+    paths (a scan of the whole page text) and not on others.
+    """
+    if '\n' in query or '\r' in query:
+        raise ValueError("PDF text is searched line by line; the query cannot contain a line break")
+
+
+def find_spans(text: str, query: str) -> List[Tuple[int, int]]:
+    """Return (start, end) offsets of every non-overlapping occurrence of query."""
+    spans = []
+    if not query:
+        return spans
+    start = text.find(query)
+    while start != -1:
+        spans.append((start, start + len(query)))
+        start = text.find(query, start + len(query))
+    return spans
+
+
+def confirm_spans(text: str, line_starts: List[int], line_hits: Dict[int, List[int]],
+                  query: str, case_sensitive: bool) -> List[Tuple[int, int]]:
+    """Return the (start, end) offsets in text of matches at candidate positions.
+    
+    line_hits maps 0-based line indices to sorted offsets within each line
+    where query may start (see PageIndex.candidate_starts). Overlapping
+    matches are dropped, as find_spans does.
+    """
+    spans = []
+    for line_idx in sorted(line_hits):
+        line_start = line_starts[line_idx]
+        line_end = line_starts[line_idx + 1] - 1 if line_idx + 1 < len(line_starts) else len(text)
+        line = text[line_start:line_end]
+        if not case_sensitive:
+            line = fold_case(line)
+        end = 0
+        for start in line_hits[line_idx]:
+            if start >= end and line.startswith(query, start):
+                end = start + len(query)
+                spans.append((line_start + start, line_start + end))
+    return spans
+
+
+def line_offsets(text: str) -> List[int]:
+    """Return the offset at which each line of text starts."""
+    starts = [0]
+    position = text.find('\n')
+    while position != -1:
+        starts.append(position + 1)
+        position = text.find('\n', position + 1)
+    return starts
+
+
+def line_context(text: str, line_starts: List[int], line_idx: int) -> Tuple[int, str]:
+    """Return a line with the lines either side of it, and where it starts in text.
+    
+    The context is stripped of surrounding whitespace; the returned offset
+    is that of its first remaining character.
+    """
+    start = line_starts[max(0, line_idx - 1)]
+    end_idx = line_idx + 2
+    end = line_starts[end_idx] - 1 if end_idx < len(line_starts) else len(text)
+    window = text[start:end]
+    context = window.strip()
+    return start + len(window) - len(window.lstrip()), context
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton that finds many terms in one pass over a text.
+    
+    Terms are lower-cased unless the automaton is case sensitive; texts
+    passed to find() must be prepared the same way (see prepare()).
+    """
+    
+    def __init__(self, terms: List[str], case_sensitive: bool = False):
+        """Build the automaton for a list of (non-empty) terms."""
+        self.terms = list(dict.fromkeys(term for term in terms if term))
+        self.case_sensitive = case_sensitive
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        
+        # Trie of all terms
+        for term_id, term in enumerate(self.terms):
+            state = 0
+            for char in self.prepare(term):
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(term_id)
+            
+        # Failure links, breadth first; outputs inherit their fallback's outputs
+        pending = deque(self._goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, next_state in self._goto[state].items():
+                pending.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = (self._output[next_state]
+                                            + self._output[self._fail[next_state]])
+                
+    def prepare(self, text: str) -> str:
+        """Apply the automaton's case folding to a text."""
+        return text if self.case_sensitive else fold_case(text)
+        
+    def find(self, text: str) -> List[Tuple[int, int]]:
+        """Return (end offset, term id) for every term occurrence in text."""
+        goto, fail, output = self._goto, self._fail, self._output
+        matches = []
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                matches.extend((position + 1, term_id) for term_id in output[state])
+        return matches
+
+
+class PageTextStore:
+    """Extracted text of a whole PDF in one memory-mapped file.
+
+    The file holds the page count, the byte offset of every page in a
+    UTF-8 blob of all page texts and in a case-folded copy of it (see
+    fold_case), and then the two blobs. Searches run mmap.find over the
+    blobs, so pages without a match are never decoded into Python strings
+    and resident memory stays small; the OS page cache keeps the file in
+    memory while it is in use.
+    """
+
+    MAGIC = b'PGTEXT01'
+
+    def __init__(self, path: str):
+        """Map an existing store file."""
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self._mm[:8] != self.MAGIC:
+                raise ValueError(f"Not a page text store: {path}")
+            self.page_count = int.from_bytes(self._mm[8:16], 'little')
+            table = np.frombuffer(self._mm, dtype='<i8', count=2 * (self.page_count + 1),
+                                  offset=16).copy()
+        except Exception:
+            self._mm.close()
+            raise
+        # Absolute file offsets; the folded blob follows the original one
+        data_start = 16 + table.nbytes
+        self.offsets = table[:self.page_count + 1] + data_start
+        self.folded_offsets = table[self.page_count + 1:] + int(self.offsets[-1])
+
+    @classmethod
+    def write(cls, path: str, page_count: int, texts: Iterable[str]) -> 'PageTextStore':
+        """Write page_count page texts (in page order) to a new store and map it."""
+        offsets = [0]
+        folded_offsets = [0]
+        header_bytes = 16 + 2 * 8 * (page_count + 1)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as out, tempfile.TemporaryFile() as folded:
+            # Room for the header, then the text blob; the folded blob goes
+            # to a scratch file until the text blob is complete
+            out.write(b'\0' * header_bytes)
+            for text in texts:
+                data = text.encode('utf-8')
+                folded_data = fold_case(text).encode('utf-8')
+                out.write(data)
+                folded.write(folded_data)
+                offsets.append(offsets[-1] + len(data))
+                folded_offsets.append(folded_offsets[-1] + len(folded_data))
+            if len(offsets) != page_count + 1:
+                raise ValueError(f"Expected {page_count} pages, got {len(offsets) - 1}")
+
+            folded.seek(0)
+            while True:
+                chunk = folded.read(1024 * 1024)
+                if not chunk:
+                    break
+                out.write(chunk)
+            out.seek(0)
+            out.write(cls.MAGIC + page_count.to_bytes(8, 'little'))
+            out.write(np.array(offsets + folded_offsets, dtype='<i8').tobytes())
+        os.replace(temp_path, path)
+        return cls(path)
+
+    def page_text(self, page: int) -> str:
+        """Decode the text of a 1-based page."""
+        start, end = int(self.offsets[page - 1]), int(self.offsets[page])
+        return self._mm[start:end].decode('utf-8')
+
+    def pages_containing(self, query: str, case_sensitive: bool = False) -> List[int]:
+        """Return the pages whose text contains query, with one byte-level find per page.
+
+        Case-insensitive queries are folded and looked up in the folded blob.
+        """
+        needle = (query if case_sensitive else fold_case(query)).encode('utf-8')
+        if not needle:
+            return []
+        offsets = self.offsets if case_sensitive else self.folded_offsets
+        end = int(offsets[-1])
+        pages = []
+        position = self._mm.find(needle, int(offsets[0]), end)
+        while position != -1:
+            index = int(np.searchsorted(offsets, position, side='right')) - 1
+            page_end = int(offsets[index + 1])
+            if position + len(needle) <= page_end:
+                # Skip straight to the next page once a page has a match
+                pages.append(index + 1)
+                position = self._mm.find(needle, page_end, end)
+            else:
+                # The hit runs into the next page, so it does not count
+                position = self._mm.find(needle, position + 1, end)
+        return pages
+
+    def close(self):
+        """Unmap the file."""
+        self._mm.close()
+
+
+class PageTextCache:
+    """Two-level cache of extracted PDF page text.
+
+    Recently used pages are kept in an in-memory LRU bounded by a byte
+    budget; every extracted page is also written to an on-disk SQLite store
+    keyed by the PDF's path, size and modification time, so repeat searches
+    and re-opening an unchanged PDF skip text extraction entirely. Once all
+    pages of a document are cached they can be compacted into a
+    PageTextStore file, which searches use instead.
+    """
+
+    def __init__(self, max_memory_bytes: int = DEFAULT_CACHE_MEMORY_BYTES,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        """Create the cache; pass cache_dir=None for a memory-only cache."""
+        self.max_memory_bytes = max_memory_bytes
+        self.cache_dir = cache_dir
+        self._memory: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._pending: Dict[Tuple[str, int], str] = {}  # Pages not yet written to disk
+        self._lock = threading.RLock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.store_dir = os.path.join(cache_dir, 'text') if cache_dir else None
+
+        if cache_dir:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                # Corpus search workers share the store: with write-ahead logging
+                # readers never block, and writers only wait for short batch commits
+                self._db = sqlite3.connect(os.path.join(cache_dir, 'page_text.sqlite3'),
+                                           timeout=30, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("CREATE TABLE IF NOT EXISTS pages ("
+                                 "doc_key TEXT NOT NULL, page INTEGER NOT NULL, "
+                                 "text TEXT NOT NULL, PRIMARY KEY (doc_key, page))")
+                self._db.execute("CREATE TABLE IF NOT EXISTS documents ("
+                                 "doc_key TEXT PRIMARY KEY, path TEXT NOT NULL, "
+                                 "extractor TEXT NOT NULL)")
+                self._db.commit()
+            except (OSError, sqlite3.Error) as e:
+                # Fall back to memory-only caching
+                logger.warning("Page text disk cache disabled: %s", e)
+                self._db = None
+
+    @staticmethod
+    def document_key(file_path: str, extractor: str = DEFAULT_EXTRACTOR) -> str:
+        """Build a cache key from the file's absolute path, size and mtime.
+        
+        Text from a non-default extractor backend is keyed separately.
+        """
+        stat = os.stat(file_path)
+        identity = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+        if extractor != DEFAULT_EXTRACTOR:
+            identity += f"|{extractor}"
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+    def register_document(self, doc_key: str, file_path: str,
+                          extractor: str = DEFAULT_EXTRACTOR):
+        """Record the file behind doc_key and drop the pages of its earlier versions.
+        
+        A PDF that changes on disk gets a new document key, so the text
+        cached for its old size and mtime (by the same backend) would never
+        be read again; it is deleted here, along with its PageTextStore.
+        """
+        path = os.path.abspath(file_path)
+        with self._lock:
+            if self._db is None:
+                return
+            try:
+                stale = [row[0] for row in self._db.execute(
+                    "SELECT doc_key FROM documents WHERE path = ? AND extractor = ? "
+                    "AND doc_key != ?", (path, extractor, doc_key))]
+                for key in stale:
+                    self._db.execute("DELETE FROM pages WHERE doc_key = ?", (key,))
+                    self._db.execute("DELETE FROM documents WHERE doc_key = ?", (key,))
+                self._db.execute("INSERT OR REPLACE INTO documents (doc_key, path, extractor) "
+                                 "VALUES (?, ?, ?)", (doc_key, path, extractor))
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning("Could not prune the page text cache: %s", e)
+                return
+            for key in [key for key in self._memory if key[0] in stale]:
+                self._memory_bytes -= sys.getsizeof(self._memory.pop(key))
+            for key in [key for key in self._pending if key[0] in stale]:
+                del self._pending[key]
+                
+        for key in stale:
+            path = os.path.join(self.store_dir, f"{key}.pgtext")
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning("Could not remove %s: %s", path, e)
+
+    def get(self, doc_key: str, page: int) -> Optional[str]:
+        """Return cached text for a page, or None if it was never extracted."""
+        key = (doc_key, page)
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                return text
+
+            text = self._pending.get(key)
+            if text is not None:
+                self._remember(key, text)
+                return text
+                
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT text FROM pages WHERE doc_key = ? AND page = ?",
+                                   key).fetchone()
+            if row is None:
+                return None
+            self._remember(key, row[0])
+            return row[0]
+
+    def put(self, doc_key: str, page: int, text: str):
+        """Store extracted page text in memory and queue it for the disk store.
+        
+        Queued pages are written in batches of PAGE_CACHE_BATCH_PAGES by flush,
+        so the database is only locked for the length of one short write.
+        """
+        key = (doc_key, page)
+        with self._lock:
+            self._remember(key, text)
+            if self._db is not None:
+                self._pending[key] = text
+                if len(self._pending) >= PAGE_CACHE_BATCH_PAGES:
+                    self.flush()
+
+    def cached_pages(self, doc_key: str) -> Set[int]:
+        """Return the page numbers already cached for a document."""
+        with self._lock:
+            pages = {page for (key, page) in self._memory if key == doc_key}
+            pages.update(page for (key, page) in self._pending if key == doc_key)
+            if self._db is not None:
+                rows = self._db.execute("SELECT page FROM pages WHERE doc_key = ?",
+                                        (doc_key,))
+                pages.update(row[0] for row in rows)
+            return pages
+
+    def open_store(self, doc_key: str) -> Optional[PageTextStore]:
+        """Map the document's PageTextStore, or return None if it has none."""
+        if self.store_dir is None:
+            return None
+        path = os.path.join(self.store_dir, f"{doc_key}.pgtext")
+        if not os.path.exists(path):
+            return None
+        try:
+            return PageTextStore(path)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable page text store %s: %s", path, e)
+            return None
+
+    def build_store(self, doc_key: str, page_count: int) -> Optional[PageTextStore]:
+        """Compact a fully cached document into a PageTextStore and map it.
+
+        Returns None if the disk cache is off or some page is not cached.
+        """
+        if self.store_dir is None:
+            return None
+        if len(self.cached_pages(doc_key)) < page_count:
+            return None
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            texts = (self.get(doc_key, page) or '' for page in range(1, page_count + 1))
+            return PageTextStore.write(os.path.join(self.store_dir, f"{doc_key}.pgtext"),
+                                       page_count, texts)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not write page text store: %s", e)
+            return None
+
+    def flush(self):
+        """Write queued pages to disk in one transaction.
+        
+        A failed write (such as another process holding the database past
+        the timeout) is logged and its pages dropped from the disk store;
+        they stay cached in memory and are extracted again next time.
+        """
+        with self._lock:
+            if self._db is None or not self._pending:
+                return
+            rows = [(doc_key, page, text) for (doc_key, page), text in self._pending.items()]
+            self._pending = {}
+            try:
+                with self._db:
+                    self._db.executemany("INSERT OR REPLACE INTO pages (doc_key, page, text) "
+                                         "VALUES (?, ?, ?)", rows)
+            except sqlite3.Error as e:
+                logger.warning("Could not write %d pages to the page text cache: %s", len(rows), e)
+
+    def clear(self):
+        """Drop every cached page from memory and disk."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._pending = {}
+            if self._db is not None:
+                try:
+                    with self._db:
+                        self._db.execute("DELETE FROM pages")
+                        self._db.execute("DELETE FROM documents")
+                except sqlite3.Error as e:
+                    logger.warning("Could not clear the page text cache: %s", e)
+            if self.store_dir and os.path.isdir(self.store_dir):
+                for name in os.listdir(self.store_dir):
+                    try:
+                        os.remove(os.path.join(self.store_dir, name))
+                    except OSError as e:
+                        logger.warning("Could not remove %s: %s", name, e)
+
+    def _remember(self, key: Tuple[str, int], text: str):
+        """Add text to the memory LRU, evicting old pages over the byte budget."""
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= sys.getsizeof(old)
+        self._memory[key] = text
+        self._memory_bytes += sys.getsizeof(text)
+
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= sys.getsizeof(evicted)
+
+
+class ExcelFrameCache:
+    """On-disk cache of parsed Excel workbooks.
+
+    Parsing .xlsx files with openpyxl dominates load time, so the sheets of
+    each loaded workbook (a dict of sheet name -> DataFrame) are pickled under
+    a key built from the workbook's path, size and modification time.
+    Re-opening an unchanged workbook unpickles them instead of parsing it
+    again. The least recently used entries are removed once the cache grows
+    past max_bytes.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_FRAME_CACHE_DIR,
+                 max_bytes: int = DEFAULT_FRAME_CACHE_BYTES):
+        """Create the cache; pass cache_dir=None to disable it."""
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        if cache_dir:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+            except OSError as e:
+                logger.warning("Excel workbook cache disabled: %s", e)
+                self.cache_dir = None
+
+    def _frame_path(self, file_path: str) -> str:
+        """Location of the cached sheets for the workbook's current version."""
+        return os.path.join(self.cache_dir, PageTextCache.document_key(file_path) + '.pkl')
+
+    def get(self, file_path: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """Return the cached sheets of an unchanged workbook, or None."""
+        if not self.cache_dir:
+            return None
+        try:
+            frame_path = self._frame_path(file_path)
+            with open(frame_path, 'rb') as f:
+                sheets = pickle.load(f)
+            os.utime(frame_path)  # Mark as recently used
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # Unreadable entry (e.g. written by another pandas version)
+            logger.warning("Ignoring cached frame for %s: %s", file_path, e)
+            return None
+        return sheets if isinstance(sheets, dict) else None
+
+    def put(self, file_path: str, sheets: Dict[str, pd.DataFrame]):
+        """Store a parsed workbook, then trim the cache to its size limit."""
+        if not self.cache_dir:
+            return
+        with self._lock:
+            try:
+                frame_path = self._frame_path(file_path)
+                temp_path = f"{frame_path}.{os.getpid()}.tmp"
+                with open(temp_path, 'wb') as f:
+                    pickle.dump(sheets, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, frame_path)
+            except Exception as e:
+                logger.warning("Could not cache %s: %s", file_path, e)
+                return
+            self.trim()
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """Return (last used, size, path) for every cached frame."""
+        entries = []
+        if not self.cache_dir:
+            return entries
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size_bytes(self) -> int:
+        """Total size of the cached frames on disk."""
+        return sum(size for _, size, _ in self.entries())
+
+    def trim(self, max_bytes: Optional[int] = None):
+        """Remove least recently used frames until the cache fits max_bytes."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove every cached frame."""
+        self.trim(0)
+
+
+class ResultCache:
+    """In-memory LRU of search result sets.
+
+    Entries are keyed by the searched file's identity (see file_identity)
+    and every option that affects the results. Switching back to an earlier
+    query or option therefore shows its results at once. A file that changes
+    on disk gets a new identity, and its old entries are dropped; the engine
+    drops a file's entries when another file is loaded. At most
+    max_entries result sets are kept, holding no more than max_results
+    results in total.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_RESULT_CACHE_ENTRIES,
+                 max_results: int = DEFAULT_RESULT_CACHE_RESULTS):
+        """Create the cache; pass max_entries=0 to disable it."""
+        self.max_entries = max_entries
+        self.max_results = max_results
+        self._entries: "OrderedDict[Tuple[Any, ...], Sequence]" = OrderedDict()
+        self._result_count = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def file_identity(file_path: str) -> Tuple[str, int, int]:
+        """Identify the current version of a file by its absolute path, size and mtime."""
+        stat = os.stat(file_path)
+        return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[Sequence]:
+        """Return a copy of the cached results for key, or None."""
+        with self._lock:
+            results = self._entries.get(key)
+            if results is None:
+                return None
+            self._entries.move_to_end(key)
+            return results[:]
+
+    def put(self, key: Tuple[Any, ...], results: Sequence):
+        """Cache results under key, whose first item must be a file_identity.
+
+        Entries for other versions of the same file are dropped, and result
+        sets too large for the cache are not stored.
+        """
+        if self.max_entries <= 0 or len(results) > self.max_results:
+            return
+        identity = key[0]
+        with self._lock:
+            for old_key in [old_key for old_key in self._entries
+                            if old_key[0][0] == identity[0] and old_key[0] != identity]:
+                self._discard(old_key)
+            self._discard(key)
+            self._entries[key] = results[:]  # ExcelMatches slices share their arrays
+            self._result_count += len(results)
+
+            while (len(self._entries) > self.max_entries
+                   or self._result_count > self.max_results):
+                self._discard(next(iter(self._entries)))
+
+    def drop_file(self, file_path: str):
+        """Forget the result sets of every version of a file."""
+        path = os.path.abspath(file_path)
+        with self._lock:
+            for key in [key for key in self._entries if key[0][0] == path]:
+                self._discard(key)
+
+    def clear(self):
+        """Forget every result set."""
+        with self._lock:
+            self._entries.clear()
+            self._result_count = 0
+
+    def _discard(self, key: Tuple[Any, ...]):
+        """Remove an entry if present (the lock must be held)."""
+        results = self._entries.pop(key, None)
+        if results is not None:
+            self._result_count -= len(results)
+
+
+class PageIndex:
+    """Positional inverted index over extracted PDF page text.
+    
+    Maps each case-folded word token to every place it occurs, stored as
+    (page << LINE_BITS | line) << OFFSET_BITS | offset keys, and keeps the
+    text of each indexed page so a hit is answered without extracting the
+    page again. Sorted copies of the vocabulary (and of its reversed words)
+    find the words a partial query token can begin or end without scanning
+    every word. Pages are added one at a time by a background indexer, so
+    queries can use the index for the pages covered so far.
+    """
+    
+    TOKEN_PATTERN = re.compile(r'\w+')
+    LINE_BITS = 32  # Bits of a line key that hold the line index
+    OFFSET_BITS = 32  # Low bits of a position key that hold the offset in the line
+    
+    def __init__(self):
+        """Create an empty index."""
+        self.postings: Dict[str, List[int]] = {}
+        self.texts: Dict[int, str] = {}
+        self._new_words: List[str] = []  # Words not yet in the sorted vocabulary
+        self._sorted_words: List[str] = []
+        self._sorted_reversed: List[str] = []  # Each word reversed, for suffix lookups
+        self._vocabulary_text = '\n'  # Sorted words between newlines, for infix lookups
+        self._lock = threading.Lock()
+        
+    def add_page(self, page_num: int, text: str):
+        """Index where each token occurs on every line of a page's text."""
+        page_postings: Dict[str, List[int]] = {}
+        for line_idx, line in enumerate(fold_case(text).split('\n')):
+            line_key = (page_num << self.LINE_BITS | line_idx) << self.OFFSET_BITS
+            for match in self.TOKEN_PATTERN.finditer(line):
+                page_postings.setdefault(match.group(), []).append(line_key | match.start())
+                
+        with self._lock:
+            for token, positions in page_postings.items():
+                posting = self.postings.get(token)
+                if posting is None:
+                    self.postings[token] = positions
+                    self._new_words.append(token)
+                else:
+                    posting.extend(positions)
+            self.texts[page_num] = text
+            
+    def snapshot_pages(self) -> Set[int]:
+        """Return a copy of the set of pages indexed so far."""
+        with self._lock:
+            return set(self.texts)
+            
+    def page_text(self, page_num: int) -> Optional[str]:
+        """Return the text of an indexed page, or None if it is not indexed yet."""
+        return self.texts.get(page_num)
+        
+    def _update_vocabulary(self):
+        """Merge the words indexed since the last lookup into the sorted vocabulary (lock held)."""
+        if not self._new_words:
+            return
+        # Both lists are mostly sorted runs already, which sorted() merges in linear time
+        self._sorted_words = sorted(self._sorted_words + self._new_words)
+        self._sorted_reversed = sorted(self._sorted_reversed
+                                       + [word[::-1] for word in self._new_words])
+        self._vocabulary_text = '\n' + '\n'.join(self._sorted_words) + '\n'
+        self._new_words = []
+        
+    @staticmethod
+    def _prefixed(words: List[str], prefix: str) -> List[str]:
+        """Return the words of a sorted list that start with prefix."""
+        first = bisect_left(words, prefix)
+        return words[first:bisect_left(words, prefix + '\U0010ffff', first)]
+        
+    def matching_words(self, token: str, starts: bool, ends: bool) -> Iterable[str]:
+        """Return the indexed words a query token can be part of (the lock must be held).
+        
+        With starts the token must begin the word, with ends it must end it.
+        """
+        if starts and ends:
+            return [token] if token in self.postings else []
+        if starts:
+            return self._prefixed(self._sorted_words, token)
+        if ends:
+            return [word[::-1] for word in self._prefixed(self._sorted_reversed, token[::-1])]
+            
+        # Anywhere inside a word: find it in the newline-separated vocabulary
+        text = self._vocabulary_text
+        words = []
+        position = text.find(token)
+        while position >= 0:
+            start = text.rfind('\n', 0, position) + 1
+            end = text.find('\n', position)
+            words.append(text[start:end])
+            position = text.find(token, end)
+        return words
+        
+    @staticmethod
+    def token_offsets(word: str, token: str, starts: bool, ends: bool) -> List[int]:
+        """Return where a query token can sit inside an indexed word (see matching_words)."""
+        if starts:
+            return [0]
+        if ends:
+            return [len(word) - len(token)]
+        offsets = []
+        position = word.find(token)
+        while position >= 0:
+            offsets.append(position)
+            position = word.find(token, position + 1)
+        return offsets
+        
+    def candidate_starts(self, query: str) -> Optional[Dict[int, Dict[int, List[int]]]]:
+        """Find where the query may start on the lines of indexed pages.
+        
+        Returns a mapping of page number to 0-based line index to sorted
+        offsets in the line, or None if the query has no word tokens and the
+        index cannot narrow it down. A substring match can begin and end
+        inside a word, so the first query token must end an indexed word,
+        the last must start one and the others must be whole words; a lone
+        token may lie anywhere inside one. Every match starts at one of the
+        returned offsets, and callers confirm each against the line text.
+        """
+        folded = fold_case(query)
+        tokens = list(self.TOKEN_PATTERN.finditer(folded))
+        if not tokens:
+            return None
+        roles = [(match.group(), number > 0, number < len(tokens) - 1, match.start())
+                 for number, match in enumerate(tokens)]
+        line_shift = self.OFFSET_BITS
+        offset_mask = (1 << self.OFFSET_BITS) - 1
+        
+        with self._lock:
+            self._update_vocabulary()
+            role_words = [(role, self.matching_words(*role[:3])) for role in roles]
+            
+            # Tokens with the fewest postings first to keep intersections small
+            role_words.sort(key=lambda item: sum(len(self.postings[word]) for word in item[1]))
+            candidates: Set[int] = set()
+            for number, (_, words) in enumerate(role_words):
+                lines = {key >> line_shift for word in words for key in self.postings[word]}
+                candidates = lines if number == 0 else candidates & lines
+                if not candidates:
+                    return {}
+                    
+            # The rarest token anchors the match: its position gives the query's start
+            (token, starts, ends, query_offset), words = role_words[0]
+            starts_by_line: Dict[int, Set[int]] = {}
+            for word in words:
+                offsets = self.token_offsets(word, token, starts, ends)
+                for key in self.postings[word]:
+                    line_key = key >> line_shift
+                    if line_key not in candidates:
+                        continue
+                    word_start = (key & offset_mask) - query_offset
+                    starts_by_line.setdefault(line_key, set()).update(
+                        word_start + offset for offset in offsets if word_start + offset >= 0)
+                        
+        result: Dict[int, Dict[int, List[int]]] = {}
+        line_mask = (1 << self.LINE_BITS) - 1
+        for line_key, line_starts in starts_by_line.items():
+            result.setdefault(line_key >> self.LINE_BITS, {})[line_key & line_mask] = sorted(line_starts)
+        return result
+        
+    def candidate_lines(self, query: str) -> Optional[Dict[int, Set[int]]]:
+        """Find the lines of indexed pages that may contain the query (see candidate_starts)."""
+        starts = self.candidate_starts(query)
+        if starts is None:
+            return None
+        return {page: set(lines) for page, lines in starts.items()}
+
+
+class ValueIndex:
+    """Hash index from exact cell values to row positions in one Excel column.
+    
+    Cells are keyed by their str() form (as substring search sees them) and,
+    for numeric cells, by float value, so an equality lookup is a dict probe
+    instead of a scan. The case-folded text keys are built on first use.
+    """
+    
+    def __init__(self, column: pd.Series):
+        """Index the non-empty cells of a column (by row position)."""
+        present = np.flatnonzero(column.notna().to_numpy())
+        values = column.iloc[present]
+        self.texts = group_positions(list(column_text(values)), present)
+        self._folded_texts: Optional[Dict[str, np.ndarray]] = None
+        
+        # Numeric cells, matched like match_numeric_column
+        kind = pd.api.types.infer_dtype(values, skipna=True)
+        if kind in ('integer', 'floating', 'mixed-integer-float', 'boolean', 'decimal'):
+            self.numbers = group_positions(list(values.to_numpy(dtype=float)), present)
+        elif kind in ('mixed', 'mixed-integer'):
+            numeric = [(position, float(value)) for position, value in zip(present, values)
+                       if isinstance(value, (int, float))]
+            self.numbers = group_positions([value for _, value in numeric],
+                                           np.array([position for position, _ in numeric],
+                                                    dtype=present.dtype))
+        else:
+            self.numbers = {}
+            
+    def lookup(self, query: str, case_sensitive: bool = False,
+               numeric_query: Optional[float] = None) -> np.ndarray:
+        """Return the sorted row positions whose cell equals the query."""
+        if case_sensitive:
+            matches = [self.texts.get(query)]
+        else:
+            if self._folded_texts is None:
+                # Regroup the distinct texts' positions under their lower-case form
+                groups = list(self.texts.values())
+                keys = np.repeat(np.array([text.lower() for text in self.texts], dtype=object),
+                                 [len(positions) for positions in groups])
+                positions = np.concatenate(groups) if groups else np.empty(0, dtype=np.int64)
+                order = np.argsort(positions, kind='stable')
+                self._folded_texts = group_positions(list(keys[order]), positions[order])
+            matches = [self._folded_texts.get(query.lower())]
+        if numeric_query is not None:
+            matches.append(self.numbers.get(numeric_query))
+            
+        matches = [positions for positions in matches if positions is not None]
+        if not matches:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(matches))
+
+
+class TrigramIndex:
+    """Trigram index over the cells of one Excel column, for fuzzy search.
+    
+    Each distinct (lower-cased, whitespace-collapsed) cell text is split
+    into padded character trigrams, and every trigram maps to the distinct
+    texts containing it. A query only touches the posting lists of its own
+    trigrams, so lookups cost about the same however many rows there are,
+    and misspellings still share most trigrams with the intended text.
+    """
+    
+    def __init__(self, column: pd.Series):
+        """Index the non-empty cells of a column (by row position)."""
+        present = np.flatnonzero(column.notna().to_numpy())
+        normalized = [' '.join(value.lower().split())
+                      for value in column_text(column.iloc[present])]
+        
+        # Distinct texts, each with the row positions that hold it
+        groups = group_positions(normalized, present)
+        self.texts = list(groups)
+        self.text_rows = list(groups.values())
+        
+        postings: Dict[str, List[int]] = {}
+        self.trigram_counts = np.zeros(len(self.texts), dtype=np.int32)
+        for text_id, value in enumerate(self.texts):
+            trigrams = self.trigrams(value)
+            self.trigram_counts[text_id] = len(trigrams)
+            for trigram in trigrams:
+                postings.setdefault(trigram, []).append(text_id)
+        self.postings = {trigram: np.array(ids, dtype=np.int32)
+                         for trigram, ids in postings.items()}
+        
+    @staticmethod
+    def trigrams(text: str) -> Set[str]:
+        """Padded character trigrams of each word of already-normalized text."""
+        result = set()
+        for word in text.split():
+            padded = f"  {word} "
+            result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        return result
+        
+    def lookup(self, query: str, min_coverage: float = FUZZY_MIN_COVERAGE
+               ) -> Dict[int, Tuple[float, float]]:
+        """Return {row position: (similarity, coverage)} for cells resembling the query.
+        
+        Cells qualify when they contain at least min_coverage of the query's
+        trigrams. Similarity is the trigram Jaccard index, which also
+        penalizes extra text in the cell, so "John Smith" ranks above
+        "Jonathan Smith" for the query "jon smith".
+        """
+        query_trigrams = self.trigrams(' '.join(query.lower().split()))
+        lists = [self.postings[trigram] for trigram in query_trigrams if trigram in self.postings]
+        if not lists:
+            return {}
+            
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.texts))
+        coverage = shared / len(query_trigrams)
+        text_ids = np.flatnonzero(coverage >= min_coverage)
+        jaccard = shared[text_ids] / (len(query_trigrams) + self.trigram_counts[text_ids]
+                                      - shared[text_ids])
+        
+        matches: Dict[int, Tuple[float, float]] = {}
+        for text_id, similarity in zip(text_ids, jaccard):
+            score = (float(similarity), float(coverage[text_id]))
+            for position in self.text_rows[text_id]:
+                matches[int(position)] = score
+        return matches
+
+
+class ExcelMatches(Sequence):
+    """Matching Excel rows, stored as row positions plus matched-column bitmasks.
+    
+    Behaves like a read-only list of search_excel result dicts ('sheet',
+    'row_index', 'matched_columns' and 'data'). Per matching row it only
+    keeps the row position and one bit per searched column. The values are
+    read from the DataFrame, a batch of rows at a time, when results are
+    accessed, e.g. to display or export them. Slicing gives another
+    ExcelMatches without reading any rows.
+    
+    Matches are kept in parts of (sheet, columns, positions, bits, extras),
+    usually one part per searched sheet in workbook order; sheet is None for
+    a frame searched on its own, and its results then have no 'sheet'.
+    extras maps further result keys (such as 'score' or 'terms') to one
+    value per row, aligned with positions. The frames themselves
+    are not kept: frames(sheet) looks each one up when rows are read (see
+    SearchEngine.sheet_frames), so cached results do not hold on to the
+    workbook.
+    """
+    
+    batch_rows = 1000  # Rows read from the frame at a time while iterating
+    
+    def __init__(self, parts: Iterable[Tuple[Optional[str], List[Any], np.ndarray, np.ndarray,
+                                             Dict[str, List[Any]]]] = (),
+                 frames: Optional[Callable[[Optional[str]], pd.DataFrame]] = None):
+        """Wrap match parts read through frames; see from_masks for building one."""
+        self.parts = [part for part in parts if len(part[2])]
+        self.frames = frames
+        self.offsets = [0]
+        for part in self.parts:
+            self.offsets.append(self.offsets[-1] + len(part[2]))
+            
+    @classmethod
+    def from_masks(cls, frames: Callable[[Optional[str]], pd.DataFrame], columns: List[Any],
+                   positions: np.ndarray, column_masks: List[np.ndarray],
+                   sheet: Optional[str] = None,
+                   extras: Optional[Dict[str, List[Any]]] = None) -> 'ExcelMatches':
+        """Build matches from row positions and one boolean mask per column (aligned with positions).
+        
+        extras adds result keys with one value per row (see the class docstring).
+        """
+        positions = np.asarray(positions)
+        positions = positions.astype(np.int32 if not len(positions) or positions.max() < 2 ** 31
+                                     else np.int64)
+        bits = np.packbits(np.column_stack(column_masks) if column_masks
+                           else np.zeros((len(positions), 0), dtype=bool),
+                           axis=1, bitorder='little')
+        return cls([(sheet, list(columns), positions, bits, extras or {})], frames)
+        
+    @classmethod
+    def concat(cls, matches: Iterable['ExcelMatches'], sheets: Optional[Iterable[str]] = None,
+               frames: Optional[Callable[[Optional[str]], pd.DataFrame]] = None
+               ) -> 'ExcelMatches':
+        """Join matches in order, optionally tagging each one's results with a sheet.
+        
+        The joined matches read their rows through frames, or through the
+        first match's lookup if frames is not given.
+        """
+        matches = list(matches)
+        sheets = [None] * len(matches) if sheets is None else list(sheets)
+        if frames is None and matches:
+            frames = matches[0].frames
+        return cls(((part[0] if sheet is None else sheet, *part[1:])
+                    for sheet, match in zip(sheets, matches) for part in match.parts), frames)
+        
+    def __len__(self) -> int:
+        return self.offsets[-1]
+        
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return list(self)[index]
+            parts = []
+            for part, offset in zip(self.parts, self.offsets):
+                first = max(start - offset, 0)
+                last = min(stop - offset, len(part[2]))
+                if first < last:
+                    parts.append((*part[:2], part[2][first:last], part[3][first:last],
+                                  {key: values[first:last] for key, values in part[4].items()}))
+            return ExcelMatches(parts, self.frames)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ExcelMatches index out of range")
+        number = bisect_right(self.offsets, index) - 1
+        position = index - self.offsets[number]
+        return next(self.read_rows(self.parts[number], position, position + 1))
+        
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for part in self.parts:
+            for start in range(0, len(part[2]), self.batch_rows):
+                yield from self.read_rows(part, start, start + self.batch_rows)
+                
+    def read_rows(self, part: Tuple[Optional[str], List[Any], np.ndarray, np.ndarray,
+                                    Dict[str, List[Any]]],
+                  start: int, stop: int) -> Iterator[Dict[str, Any]]:
+        """Materialize the result dicts of a slice of one part."""
+        sheet, columns, positions, bits, extras = part
+        flags = np.unpackbits(bits[start:stop], axis=1, count=len(columns),
+                              bitorder='little').astype(bool)
+        row_extras = [(key, values[start:stop]) for key, values in extras.items()]
+        matched_rows = self.frames(sheet).iloc[positions[start:stop]]
+        for number, (idx, row_flags, row_dict) in enumerate(zip(matched_rows.index, flags,
+                                                                matched_rows.to_dict('records'))):
+            result = {} if sheet is None else {'sheet': sheet}
+            result['row_index'] = idx + 2  # +2 because Excel is 1-indexed and has header
+            result['matched_columns'] = list(compress(columns, row_flags))
+            result['data'] = row_dict
+            for key, values in row_extras:
+                result[key] = values[number]
+            yield result
+            
+    def sheet_positions(self) -> Dict[Optional[str], np.ndarray]:
+        """Return the matched row positions of each sheet."""
+        positions: Dict[Optional[str], List[np.ndarray]] = {}
+        for part in self.parts:
+            positions.setdefault(part[0], []).append(part[2])
+        return {sheet: arrays[0] if len(arrays) == 1 else np.sort(np.concatenate(arrays))
+                for sheet, arrays in positions.items()}
+        
+    def data_columns(self) -> List[Any]:
+        """Return the columns of the searched frames, in first-seen order."""
+        return list(dict.fromkeys(column for part in self.parts
+                                  for column in self.frames(part[0]).columns))
+
+
+
+class SearchEngine:
+    """Loads one PDF or Excel file at a time and searches it.
+    
+    Long operations accept an optional progress(percent, message) callback
+    and stop early once cancel_loading is set, so callers can drive them
+    from a worker thread.
+    """
+    
+    def __init__(self, page_cache: Optional[PageTextCache] = None,
+                 frame_cache: Optional[ExcelFrameCache] = None,
+                 extractor: str = DEFAULT_EXTRACTOR,
+                 result_cache: Optional[ResultCache] = None):
+        """Initialize the engine with optional shared caches and a PDF extractor backend."""
+        self.loaded_file_type: Optional[str] = None  # 'pdf' or 'excel'
+        self.file_identity: Optional[Tuple[str, int, int]] = None  # Loaded file version, keys cached results
+        self.excel_data: Optional[pd.DataFrame] = None  # First sheet of the workbook
+        self.excel_sheets: Dict[str, pd.DataFrame] = {}  # Every sheet, in workbook order
+        self.excel_sheet_columns: Dict[str, List[Any]] = {}  # Column names per sheet
+        self.excel_columns: List[Any] = []  # Column names across all sheets
+        self.excel_stream_path: Optional[str] = None  # Workbook read in low-memory mode
+        self.excel_stream_dtypes: Dict[str, Dict[Any, Any]] = {}  # Column types per streamed sheet
+        self.trigram_indexes: Dict[Tuple[str, Any], TrigramIndex] = {}  # Built on first fuzzy search
+        self.value_indexes: Dict[Tuple[str, Any], ValueIndex] = {}  # Built on first exact search
+        self.match_history: List[Dict[str, Any]] = []  # Recent complete searches, for narrowing
+        self.pdf_text_data: List[Dict[str, Any]] = []  # Store text by page
+        self.pdf_file_path: Optional[str] = None  # For lazy loading
+        self.pdf_doc_key: Optional[str] = None  # Page text cache key
+        self.text_store: Optional[PageTextStore] = None  # Compacted text of the whole PDF
+        self._store_lock = threading.Lock()
+        self.extractor = DEFAULT_EXTRACTOR  # PDF text extraction backend
+        self.set_extractor(extractor)
+        self.page_cache = page_cache if page_cache is not None else PageTextCache()
+        self.frame_cache = frame_cache if frame_cache is not None else ExcelFrameCache()
+        self.result_cache = result_cache if result_cache is not None else ResultCache()
+        self.extraction_executor: Optional[ProcessPoolExecutor] = None
+        self.extraction_executor_workers = 0
+        self.page_index: Optional[PageIndex] = None
+        self.index_thread: Optional[threading.Thread] = None
+        self.index_stop = threading.Event()
+        self.index_progress = 0  # Pages indexed by the background indexer
+        self.cancel_loading = False  # Flag for canceling long operations
+        self.timer: Optional[PhaseTimer] = None  # Phase timings of the running operation
+        
+    def phase(self, name: str):
+        """Context manager timing a block towards a phase of the current operation."""
+        return self.timer.span(name) if self.timer is not None else nullcontext()
+        
+    def timed_iter(self, name: str, items: Iterable[Any]) -> Iterable[Any]:
+        """Count the time spent producing items towards a phase of the current operation."""
+        return self.timer.iterate(name, items) if self.timer is not None else items
+        
+    def load_file(self, file_path: str, low_memory: bool = False, workers: int = 1) -> str:
+        """Load a PDF or Excel file, choosing the loader by extension.
+        
+        With low_memory, .xlsx workbooks are streamed while searching
+        instead of being loaded into memory. The sheets of a workbook are
+        parsed across up to workers processes.
+        """
+        file_ext = os.path.splitext(file_path)[1].lower()
+        if file_ext in PDF_EXTENSIONS:
+            return self.load_pdf_file(file_path)
+        if file_ext in EXCEL_EXTENSIONS:
+            if low_memory:
+                return self.load_excel_stream(file_path)
+            return self.load_excel_file(file_path, workers)
+        raise ValueError("Unsupported file format. Please select a PDF or Excel file.")
+        
+    def load_pdf_file(self, file_path: str) -> str:
+        """Ultra-fast PDF loading - just stores file reference.
+        
+        Returns a status message describing the loaded file.
+        """
+        self.stop_page_index()
+        self.release_results(file_path)
+        self.loaded_file_type = 'pdf'
+        self.pdf_text_data = []
+        self.pdf_file_path = file_path
+        
+        try:
+            # Only open PDF to get page count - no text extraction
+            with self.phase('open'), open_extractor(self.extractor, file_path) as pdf:
+                total_pages = pdf.page_count
+                
+            # Store only minimal page references - no text extraction at all
+            self.pdf_text_data = [{'page': page_num, 'loaded': False}
+                                  for page_num in range(1, total_pages + 1)]
+            self.file_identity = ResultCache.file_identity(file_path)
+            with self.phase('cache'):
+                self.refresh_cached_pages()
+                
+            cached_count = sum(1 for page_data in self.pdf_text_data if page_data['loaded'])
+            if cached_count:
+                return (f"PDF loaded instantly - {total_pages} pages ready for search "
+                        f"({cached_count} cached)")
+            return f"PDF loaded instantly - {total_pages} pages ready for search"
+            
+        except Exception as e:
+            raise Exception(f"Failed to load PDF: {str(e)}")
+        
+    def load_excel_file(self, file_path: str, workers: int = 1) -> str:
+        """Load and process every sheet of an Excel file.
+        
+        Returns a status message describing the loaded file.
+        """
+        self.stop_page_index()
+        self.close_text_store()
+        self.release_results(file_path)
+        self.loaded_file_type = 'excel'
+        self.excel_stream_path = None
+        
+        # Unchanged workbooks come straight from the frame cache
+        with self.phase('cache'):
+            sheets = self.frame_cache.get(file_path)
+        cached = sheets is not None
+        if sheets is None:
+            with self.phase('parse'):
+                sheets = self.read_excel_sheets(file_path, workers)
+            with self.phase('cache'):
+                self.frame_cache.put(file_path, sheets)
+            
+        self.excel_sheets = sheets
+        self.excel_data = next(iter(sheets.values()), None)
+        self.file_identity = ResultCache.file_identity(file_path)
+        self.set_sheet_columns({sheet: list(frame.columns) for sheet, frame in sheets.items()})
+        
+        loaded = "Excel loaded from cache" if cached else "Excel loaded"
+        total_rows = sum(len(frame) for frame in sheets.values())
+        if len(sheets) > 1:
+            return (f"{loaded} - {len(sheets)} sheets, {total_rows} rows, "
+                    f"{len(self.excel_columns)} columns")
+        return f"{loaded} - {total_rows} rows, {len(self.excel_columns)} columns"
+        
+    def read_excel_sheets(self, file_path: str, workers: int = 1) -> Dict[str, pd.DataFrame]:
+        """Parse every sheet of a workbook, one sheet per extraction worker."""
+        with pd.ExcelFile(file_path) as workbook:
+            sheet_names = workbook.sheet_names
+            if workers <= 1 or len(sheet_names) == 1:
+                return {name: workbook.parse(name) for name in sheet_names}
+                
+        executor = self.get_extraction_executor(workers)
+        futures = [executor.submit(read_excel_sheet, file_path, name) for name in sheet_names]
+        return {name: future.result() for name, future in zip(sheet_names, futures)}
+        
+    def set_sheet_columns(self, sheet_columns: Dict[str, List[Any]]):
+        """Record the columns of each sheet and their combined list."""
+        self.trigram_indexes = {}
+        self.value_indexes = {}
+        self.match_history = []
+        self.excel_stream_dtypes = {}
+        self.excel_sheet_columns = sheet_columns
+        self.excel_columns = list(dict.fromkeys(
+            column for columns in sheet_columns.values() for column in columns))
+        
+    def load_excel_stream(self, file_path: str) -> str:
+        """Open an .xlsx workbook in low-memory mode.
+        
+        Only the header row is read now; searches stream the rows in chunks
+        of EXCEL_STREAM_CHUNK_ROWS, so memory use does not grow with the
+        size of the sheet. Returns a status message.
+        """
+        if os.path.splitext(file_path)[1].lower() == '.xls':
+            raise ValueError("Low-memory mode supports .xlsx workbooks only")
+            
+        self.stop_page_index()
+        self.close_text_store()
+        self.release_results(file_path)
+        sheet_columns = {}
+        total_rows = 0
+        with self.phase('open'):
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                header = next(sheet.iter_rows(max_row=1, values_only=True), ())
+                sheet_columns[sheet.title] = excel_header_names(header)
+                total_rows += max(0, (sheet.max_row or 1) - 1)
+        finally:
+            workbook.close()
+            
+        self.loaded_file_type = 'excel'
+        self.excel_data = None
+        self.excel_sheets = {}
+        self.excel_stream_path = file_path
+        self.file_identity = ResultCache.file_identity(file_path)
+        self.set_sheet_columns(sheet_columns)
+        sheets = f"{len(sheet_columns)} sheets, " if len(sheet_columns) > 1 else ""
+        return (f"Excel opened in low-memory mode - {sheets}about {total_rows} rows, "
+                f"{len(self.excel_columns)} columns (rows are read while searching)")
+        
+    def iter_sheet_rows(self, sheet: Any, width: int, chunk_rows: int
+                        ) -> Iterator[Tuple[List[Tuple[Any, ...]], List[int], int]]:
+        """Yield (rows, row positions, rows read so far) for chunks of a worksheet's data rows.
+        
+        Positions are those pd.read_excel would give (the sheet row less
+        two). Blank rows are left out but still count towards the positions
+        of the rows after them; rows are padded or cut to width cells.
+        """
+        rows = enumerate(sheet.iter_rows(min_row=2, values_only=True))
+        rows_read = 0
+        while not self.cancel_loading:
+            chunk = []
+            positions = []
+            for position, values in rows:
+                rows_read += 1
+                if any(value is not None for value in values):
+                    chunk.append(tuple(values[:width]) + (None,) * (width - len(values)))
+                    positions.append(position)
+                    if len(chunk) >= chunk_rows:
+                        break
+            if not chunk:
+                return
+            yield chunk, positions, rows_read
+            
+    def stream_column_types(self, sheet: Any, chunk_rows: int) -> Dict[Any, Any]:
+        """Work out the types to cast a streamed sheet's chunks to (see combine_excel_dtypes).
+        
+        Types are inferred per chunk, so a column could parse differently
+        from one chunk to the next and from pd.read_excel's sheet-wide
+        inference. The first search of a sheet therefore reads it once to
+        combine the chunk types; the result is kept until another file is
+        loaded.
+        """
+        columns = self.excel_sheet_columns[sheet.title]
+        dtypes = self.excel_stream_dtypes.get(sheet.title)
+        if dtypes is not None:
+            return dtypes
+            
+        chunk_dtypes: Dict[Any, Set[Any]] = {column: set() for column in columns}
+        blank_columns: Set[Any] = set()
+        bool_text_columns: Set[Any] = set()
+        next_position = 0
+        for chunk, positions, _ in self.iter_sheet_rows(sheet, len(columns), chunk_rows):
+            # Blank rows between data rows are read as all-missing rows
+            if positions[-1] - next_position + 1 > len(positions):
+                blank_columns.update(columns)
+            next_position = positions[-1] + 1
+            frame = parse_excel_rows(chunk, columns)
+            for number, column in enumerate(columns):
+                present = frame[column].notna()
+                if not present.all():
+                    blank_columns.add(column)
+                if present.any():
+                    chunk_dtypes[column].add(frame[column].dtype)
+                if frame[column].dtype.kind == 'b' and any(isinstance(row[number], str)
+                                                           for row in chunk):
+                    bool_text_columns.add(column)
+        if self.cancel_loading:
+            return {}
+            
+        dtypes = {}
+        for column in columns:
+            dtype = combine_excel_dtypes(chunk_dtypes[column], column in blank_columns,
+                                         column in bool_text_columns)
+            if dtype is not None:
+                dtypes[column] = dtype
+        self.excel_stream_dtypes[sheet.title] = dtypes
+        return dtypes
+        
+    def iter_excel_chunks(self, sheet_names: Optional[List[str]] = None,
+                          chunk_rows: int = EXCEL_STREAM_CHUNK_ROWS
+                          ) -> Iterator[Tuple[str, pd.DataFrame, float]]:
+        """Yield (sheet, frame, percent done) for successive row chunks of the streamed workbook.
+        
+        Sheets (all of them unless sheet_names is given) are read one after
+        another. Each frame's index holds the row positions pd.read_excel
+        would give, so results carry the same 'row_index', and its columns
+        have the types pd.read_excel gives the whole sheet (see
+        stream_column_types). Blank rows cannot match and are left out.
+        """
+        if sheet_names is None:
+            sheet_names = list(self.excel_sheet_columns)
+        workbook = openpyxl.load_workbook(self.excel_stream_path, read_only=True, data_only=True)
+        try:
+            sheets = [workbook[name] for name in sheet_names]
+            total_rows = max(1, sum((sheet.max_row or 1) - 1 for sheet in sheets))
+            rows_before = 0
+            for sheet in sheets:
+                columns = self.excel_sheet_columns[sheet.title]
+                dtypes = self.stream_column_types(sheet, chunk_rows)
+                rows_read = 0
+                for chunk, positions, rows_read in self.iter_sheet_rows(sheet, len(columns),
+                                                                        chunk_rows):
+                    frame = parse_excel_rows(chunk, columns, dtypes)
+                    frame.index = pd.Index(positions)
+                    yield sheet.title, frame, min(100.0, (rows_before + rows_read) * 100.0 / total_rows)
+                rows_before += rows_read
+        finally:
+            workbook.close()
+            
+    def search_excel_stream(self, query: str, selected_columns: Optional[List[str]] = None,
+                            case_sensitive: bool = False, terms: Optional[List[str]] = None,
+                            on_results: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                            progress: Optional[Callable[[float, str], None]] = None,
+                            max_results: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Search the streamed workbook one chunk at a time.
+        
+        Each chunk is matched with search_excel (or search_excel_terms when
+        terms are given) and its results are handed to on_results at once.
+        Reading stops once max_results matches are found.
+        """
+        plan = self.plan_sheet_columns(selected_columns)
+        results = []
+        for sheet, frame, percent in self.timed_iter('read', self.iter_excel_chunks(list(plan))):
+            with self.phase('match'):
+                if terms is not None:
+                    chunk_results = self.search_excel_terms(terms, plan[sheet],
+                                                            case_sensitive, data=frame)
+                else:
+                    chunk_results = self.search_excel(query, plan[sheet],
+                                                      case_sensitive, data=frame)
+            # Materialized now, so the chunk's frame is not kept alive by its matches
+            chunk_results = [{'sheet': sheet, **result} for result in chunk_results]
+            if max_results is not None:
+                chunk_results = chunk_results[:max_results - len(results)]
+            if chunk_results:
+                results.extend(chunk_results)
+                if on_results is not None:
+                    on_results(chunk_results)
+            if progress is not None:
+                progress(percent, f"Searching rows... {len(results)} matches so far")
+            if max_results is not None and len(results) >= max_results:
+                break
+                
+        return results
+        
+    def clear(self):
+        """Forget the loaded file and its cached results."""
+        self.stop_page_index()
+        self.close_text_store()
+        self.release_results()
+        self.loaded_file_type = None
+        self.excel_data = None
+        self.excel_sheets = {}
+        self.excel_sheet_columns = {}
+        self.excel_columns = []
+        self.excel_stream_path = None
+        self.excel_stream_dtypes = {}
+        self.trigram_indexes = {}
+        self.value_indexes = {}
+        self.pdf_text_data = []
+        self.pdf_file_path = None
+        self.pdf_doc_key = None
+        
+    def release_results(self, file_path: Optional[str] = None):
+        """Forget the cached and remembered results of the loaded file.
+        
+        Called before a file is loaded (file_path) or the engine cleared, so
+        the result sets of the previous file (and any data they refer to)
+        can be freed. Reloading the same file unchanged keeps them.
+        """
+        if file_path is not None and self.file_identity is not None:
+            try:
+                if ResultCache.file_identity(file_path) == self.file_identity:
+                    return
+            except OSError:
+                pass
+        if self.file_identity is not None:
+            self.result_cache.drop_file(self.file_identity[0])
+        self.file_identity = None
+        self.match_history = []
+        
+    def set_extractor(self, extractor: str):
+        """Choose the PDF text extraction backend.
+        
+        A loaded PDF is kept, but its text is now read from (and cached
+        under) the new backend, and any background index is discarded.
+        """
+        if extractor not in available_extractors():
+            raise ValueError(f"PDF extractor '{extractor}' is not available "
+                             f"(choose from: {', '.join(available_extractors())})")
+        if extractor == self.extractor:
+            return
+        self.extractor = extractor
+        if self.loaded_file_type == 'pdf':
+            self.stop_page_index()
+            self.refresh_cached_pages()
+            
+    def refresh_cached_pages(self):
+        """Key the loaded PDF for the current backend and mark its cached pages."""
+        # Pages extracted in an earlier session are already in the cache
+        self.pdf_doc_key = PageTextCache.document_key(self.pdf_file_path, self.extractor)
+        self.match_history = []
+        self.close_text_store()
+        self.page_cache.register_document(self.pdf_doc_key, self.pdf_file_path, self.extractor)
+        store = self.page_cache.open_store(self.pdf_doc_key)
+        if store is not None and store.page_count != len(self.pdf_text_data):
+            store.close()
+            store = None
+        self.text_store = store
+        cached_pages = self.page_cache.cached_pages(self.pdf_doc_key) if store is None else None
+        for page_data in self.pdf_text_data:
+            # Text is in the page cache (or the text store)
+            page_data['loaded'] = store is not None or page_data['page'] in cached_pages
+            
+    def build_text_store(self, doc_key: str):
+        """Compact the loaded PDF's text into a PageTextStore once every page is cached."""
+        with self._store_lock:
+            if self.text_store is not None or doc_key != self.pdf_doc_key:
+                return
+            self.page_cache.flush()
+            store = self.page_cache.build_store(doc_key, len(self.pdf_text_data))
+            if store is not None and doc_key != self.pdf_doc_key:
+                # Another file was loaded meanwhile
+                store.close()
+                store = None
+            self.text_store = store
+            
+    def close_text_store(self):
+        """Unmap the loaded PDF's text store, if one is open."""
+        with self._store_lock:
+            if self.text_store is not None:
+                self.text_store.close()
+                self.text_store = None
+            
+    def clear_caches(self):
+        """Empty the page text, Excel workbook and search result caches."""
+        self.close_text_store()
+        self.page_cache.clear()
+        self.frame_cache.clear()
+        self.result_cache.clear()
+        
+    def start_page_index(self):
+        """Build a PageIndex for the loaded PDF on a background thread."""
+        self.stop_page_index()
+        self.page_index = PageIndex()
+        self.index_stop = threading.Event()
+        self.index_progress = 0
+        self.index_thread = threading.Thread(
+            target=self.build_page_index,
+            args=(self.page_index, self.pdf_file_path, self.pdf_doc_key, self.extractor,
+                  len(self.pdf_text_data), self.index_stop),
+            daemon=True)
+        self.index_thread.start()
+        
+    def index_running(self) -> bool:
+        """Return True while the background indexer is still working."""
+        return self.index_thread is not None and self.index_thread.is_alive()
+        
+    def stop_page_index(self):
+        """Stop the background indexer and discard its index."""
+        self.index_stop.set()
+        self.page_index = None
+        self.index_thread = None
+        
+    def build_page_index(self, index: PageIndex, file_path: str, doc_key: str, extractor: str,
+                         total_pages: int, stop: threading.Event):
+        """Index every page of a PDF (runs on the indexer thread).
+        
+        Pages come from the page cache when possible; the rest are extracted
+        with a private extractor handle and cached for later searches.
+        """
+        pdf: Optional[PdfExtractor] = None
+        try:
+            for page_num in range(1, total_pages + 1):
+                if stop.is_set():
+                    return
+                text = self.page_cache.get(doc_key, page_num)
+                if text is None:
+                    if pdf is None:
+                        pdf = open_extractor(extractor, file_path)
+                    text = pdf.extract_page(page_num)
+                    if text is None:
+                        continue
+                    self.page_cache.put(doc_key, page_num, text)
+                index.add_page(page_num, text)
+                self.index_progress = page_num
+            self.build_text_store(doc_key)
+        except Exception as e:
+            logger.warning("Background indexing stopped: %s", e)
+        finally:
+            if pdf is not None:
+                pdf.close()
+            self.page_cache.flush()
+            
+    def get_extraction_executor(self, workers: int) -> ProcessPoolExecutor:
+        """Get the process pool for page extraction, resizing it if needed."""
+        if self.extraction_executor is None or self.extraction_executor_workers != workers:
+            self.shutdown_extraction_executor()
+            self.extraction_executor = ProcessPoolExecutor(max_workers=workers)
+            self.extraction_executor_workers = workers
+        return self.extraction_executor
+        
+    def shutdown_extraction_executor(self):
+        """Stop the extraction worker processes."""
+        if self.extraction_executor is not None:
+            self.extraction_executor.shutdown(wait=False, cancel_futures=True)
+            self.extraction_executor = None
+            self.extraction_executor_workers = 0
+            
+    def shutdown(self):
+        """Stop background work and release worker processes."""
+        self.cancel_loading = True
+        self.stop_page_index()
+        self.shutdown_extraction_executor()
+        self.close_text_store()
+        self.page_cache.flush()
+        
+    def iter_page_texts(self, pages: Optional[List[Dict[str, Any]]] = None,
+                        workers: int = 1):
+        """Yield (page_data, text) for every page (or the given pages) in page order.
+        
+        Cached pages are served from the page cache. Missing pages are
+        extracted on this thread, or split across a process pool when enough
+        of them are missing and more than one extraction worker is configured.
+        Text is None for pages that could not be extracted. Once every page
+        of the PDF has been cached, the text is compacted into a
+        PageTextStore, which later calls read from instead.
+        """
+        doc_key = self.pdf_doc_key
+        if pages is None:
+            pages = self.pdf_text_data
+        store = self.text_store
+        if store is not None:
+            for page_data in pages:
+                if self.cancel_loading:
+                    break
+                yield page_data, store.page_text(page_data['page'])
+            return
+            
+        # One query finds the cached pages; their text is read once, in the loop below
+        cached_pages = self.page_cache.cached_pages(doc_key)
+        missing = [page_data['page'] for page_data in pages if page_data['page'] not in cached_pages]
+        extracted: Dict[int, Optional[str]] = {}  # Pool results for pages not reached yet
+        
+        # Map each missing page to the pool job that extracts it
+        page_jobs: Dict[int, Future] = {}
+        if workers > 1 and len(missing) >= PARALLEL_MIN_PAGES:
+            executor = self.get_extraction_executor(workers)
+            chunk_size = max(1, min(PARALLEL_CHUNK_PAGES, len(missing) // (workers * 4)))
+            for start in range(0, len(missing), chunk_size):
+                chunk = missing[start:start + chunk_size]
+                future = executor.submit(extract_page_texts, self.pdf_file_path, chunk,
+                                         self.extractor)
+                for page_num in chunk:
+                    page_jobs[page_num] = future
+        
+        # The PDF is opened here only if some page must be extracted serially
+        pdf: Optional[PdfExtractor] = None
+        try:
+            for page_data in pages:
+                if self.cancel_loading:
+                    break
+                    
+                page_num = page_data['page']
+                if page_num in extracted:
+                    text = extracted.pop(page_num)
+                elif page_num in page_jobs:
+                    # Wait for the worker, checking for cancel while it runs
+                    future = page_jobs[page_num]
+                    while not future.done() and not self.cancel_loading:
+                        wait([future], timeout=0.05)
+                    if self.cancel_loading:
+                        break
+                    for extracted_page, extracted_text in future.result():
+                        page_jobs.pop(extracted_page, None)
+                        extracted[extracted_page] = extracted_text
+                        if extracted_text is not None:
+                            self.page_cache.put(doc_key, extracted_page, extracted_text)
+                    text = extracted.pop(page_num)
+                else:
+                    text = self.page_cache.get(doc_key, page_num)
+                    if text is None:
+                        if pdf is None:
+                            pdf = open_extractor(self.extractor, self.pdf_file_path)
+                        text = pdf.extract_page(page_num)
+                        if text is not None:
+                            self.page_cache.put(doc_key, page_num, text)
+                            
+                if text is not None:
+                    page_data['loaded'] = True
+                yield page_data, text
+        finally:
+            # Drop queued chunks that are no longer needed (e.g. after cancel)
+            for future in set(page_jobs.values()):
+                future.cancel()
+            if pdf is not None:
+                pdf.close()
+            self.page_cache.flush()
+            
+        if not self.cancel_loading and all(page_data['loaded'] for page_data in self.pdf_text_data):
+            self.build_text_store(doc_key)
+            
+    def pages_in_range(self, page_range: Optional[Tuple[int, Optional[int]]] = None
+                       ) -> List[Dict[str, Any]]:
+        """Return the loaded PDF's page entries within an inclusive 1-based range."""
+        if page_range is None:
+            return self.pdf_text_data
+        first, last = page_range
+        return self.pdf_text_data[max(1, first) - 1:last]
+        
+    def search_pdf_ultra_fast(self, query: str, case_sensitive: bool = False, workers: int = 1,
+                              on_results: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                              progress: Optional[Callable[[float, str], None]] = None,
+                              max_results: Optional[int] = None,
+                              page_range: Optional[Tuple[int, Optional[int]]] = None,
+                              first_hit: bool = False,
+                              within_pages: Optional[Set[int]] = None) -> List[Dict[str, Any]]:
+        """Ultra-fast PDF search - loads and searches pages on-demand.
+        
+        Pages already covered by the background index are answered from the
+        text it holds: only the candidate lines are checked, at the offsets
+        where the index says a match can start. Other pages are extracted
+        and scanned live.
+        Each page's matches are passed to on_results as soon as it is done.
+        Every result carries 'match_spans': the (start, end) offsets of each
+        match within its context, so callers can highlight without rescanning.
+        
+        To bound latency the search can be limited to page_range (see
+        parse_page_range), stop once max_results matches are found, and
+        with first_hit report only the first matching line of each page.
+        within_pages skips every page not in it (see narrowed_scope).
+        """
+        check_pdf_query(query)
+        results = []
+        if progress is None:
+            progress = lambda value, message: None
+        
+        # Prepare search pattern
+        query_check = query if case_sensitive else fold_case(query)
+        
+        # Decide which pages need a live scan and which the index answers
+        pages = self.pages_in_range(page_range)
+        if within_pages is not None:
+            pages = [page_data for page_data in pages if page_data['page'] in within_pages]
+        index = self.page_index
+        index_starts: Dict[int, Dict[int, List[int]]] = {}
+        if index is not None:
+            indexed_pages = index.snapshot_pages()
+            candidates = index.candidate_starts(query) if indexed_pages else None
+            if candidates is not None:
+                index_starts = candidates
+                pages = [page_data for page_data in pages
+                         if page_data['page'] not in indexed_pages
+                         or page_data['page'] in candidates]
+        if self.text_store is not None:
+            # Byte-level find over the mapped text; other pages are never decoded
+            with self.phase('match'):
+                hits = set(self.text_store.pages_containing(query, case_sensitive))
+            pages = [page_data for page_data in pages if page_data['page'] in hits]
+        total_pages = len(pages)
+        
+        # Only pages the index does not cover are read from the cache or extracted
+        live_pages = [page_data for page_data in pages if page_data['page'] not in index_starts]
+        page_texts = iter(self.timed_iter('extract', self.iter_page_texts(live_pages, workers)))
+        
+        progress(0, "Starting search...")
+        
+        try:
+            for i, page_data in enumerate(pages):
+                page_num = page_data['page']
+                
+                # Update progress every 10 pages
+                if i % 10 == 0:
+                    percent = (i / total_pages) * 100
+                    progress(percent, f"Searching page {page_num}/{total_pages}...")
+                
+                line_hits = index_starts.get(page_num)
+                if line_hits is None:
+                    live = next(page_texts, None)
+                    if live is None:
+                        break  # Extraction was cancelled
+                    text = live[1]
+                else:
+                    text = index.page_text(page_num)
+                if not text:
+                    continue
+                
+                with self.phase('match'):
+                    line_starts = line_offsets(text)
+                    if line_hits is None:
+                        # One pass over the page finds every match offset
+                        spans = find_spans(text if case_sensitive else fold_case(text), query_check)
+                    else:
+                        # The index gives where matches can start; only those lines are checked
+                        spans = confirm_spans(text, line_starts, line_hits, query_check, case_sensitive)
+                if not spans:
+                    continue
+                with self.phase('context'):
+                    span_starts = [start for start, _ in spans]
+                    
+                    # One result per matching line, keyed by its unique context
+                    matching_lines = []
+                    seen_contexts: Set[str] = set()
+                    last_line = -1
+                    for start, _ in spans:
+                        line_idx = bisect_right(line_starts, start) - 1
+                        if line_idx == last_line:
+                            continue
+                        last_line = line_idx
+                        
+                        # Get context around matching line, as offsets into the page
+                        context_start, context = line_context(text, line_starts, line_idx)
+                        if not context or context in seen_contexts:
+                            continue
+                        seen_contexts.add(context)
+                        
+                        # Every match inside the context, relative to its start
+                        first = bisect_left(span_starts, context_start)
+                        last = bisect_right(span_starts, context_start + len(context) - len(query_check))
+                        matching_lines.append({
+                            'context': context,
+                            'line_number': line_idx + 1,
+                            'match_spans': [(span_start - context_start, span_end - context_start)
+                                            for span_start, span_end in spans[first:last]]
+                        })
+                        if first_hit:
+                            break
+                    
+                    # Add all unique contexts from this page
+                    page_results = [{
+                        'page': page_num,
+                        'context': match_info['context'],
+                        'line_number': match_info['line_number'],
+                        'match_spans': match_info['match_spans']
+                    } for match_info in matching_lines]
+                if max_results is not None:
+                    page_results = page_results[:max_results - len(results)]
+                results.extend(page_results)
+                if page_results and on_results is not None:
+                    on_results(page_results)
+                if max_results is not None and len(results) >= max_results:
+                    break
+            else:
+                # Run extraction to its end, which compacts a fully cached PDF into a text store
+                next(page_texts, None)
+                    
+        except Exception as e:
+            raise Exception(f"Search failed: {str(e)}")
+        finally:
+            # Cancels any extraction still queued when the search stops early
+            page_texts.close()
+        
+        return results
+
+    def search_pdf(self, query: str, case_sensitive: bool = False, workers: int = 1,
+                   on_results: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                   progress: Optional[Callable[[float, str], None]] = None,
+                   max_results: Optional[int] = None,
+                   page_range: Optional[Tuple[int, Optional[int]]] = None,
+                   first_hit: bool = False,
+                   within_pages: Optional[Set[int]] = None) -> List[Dict[str, Any]]:
+        """Search through PDF content - uses ultra-fast method."""
+        # Always use ultra-fast search for instant loading
+        return self.search_pdf_ultra_fast(query, case_sensitive, workers, on_results, progress,
+                                          max_results, page_range, first_hit, within_pages)
+        
+    def search_excel(self, query: str, selected_columns: Optional[List[str]] = None,
+                     case_sensitive: bool = False, data: Optional[pd.DataFrame] = None,
+                     rows: Optional[Any] = None) -> ExcelMatches:
+        """Search through Excel content (all columns if none are selected).
+        
+        Without data every sheet of the loaded workbook is searched and each
+        result carries its 'sheet'; streamed searches pass each chunk instead.
+        rows limits the search to some row positions: an array of positions
+        within data, or without data a dict of them per sheet (sheets left
+        out are skipped). The results are ExcelMatches, so row values are
+        only read from the frame when a result is accessed.
+        """
+        if data is None:
+            plan = self.plan_sheet_columns(selected_columns)
+            if rows is not None:
+                plan = {sheet: columns for sheet, columns in plan.items() if sheet in rows}
+            sheet_matches = self.map_sheets(
+                lambda sheet: self.search_excel(query, plan[sheet], case_sensitive,
+                                                self.excel_sheets[sheet],
+                                                None if rows is None else rows[sheet]),
+                list(plan))
+            return ExcelMatches.concat(sheet_matches, plan, self.sheet_frames())
+        if not selected_columns:
+            selected_columns = list(data.columns)
+        unknown = [column for column in selected_columns if column not in data.columns]
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(map(str, unknown))}")
+        frame = data if rows is None else data.iloc[rows]
+        
+        # Convert query to appropriate type for numeric searches
+        numeric_query = parse_numeric_query(query)
+            
+        # One boolean mask per column, combined with a vectorized OR
+        query_check = query if case_sensitive else query.lower()
+        column_masks = [match_excel_column(frame[column], query_check,
+                                           case_sensitive, numeric_query)
+                        for column in selected_columns]
+        positions = np.flatnonzero(np.logical_or.reduce(column_masks))
+        
+        # Keep positions in data (not in the narrowed frame) and which columns matched
+        column_masks = [mask[positions] for mask in column_masks]
+        if rows is not None:
+            positions = np.asarray(rows)[positions]
+        return ExcelMatches.from_masks(lambda sheet: data, selected_columns, positions,
+                                       column_masks)
+        
+    def sheet_frames(self) -> Callable[[Optional[str]], pd.DataFrame]:
+        """Return a lookup of the loaded sheets by name, for ExcelMatches to read rows through.
+        
+        Once another file is loaded the lookup raises ValueError instead of
+        reading rows of the wrong workbook.
+        """
+        identity = self.file_identity
+        
+        def frame(sheet: Optional[str]) -> pd.DataFrame:
+            if self.file_identity != identity or sheet not in self.excel_sheets:
+                raise ValueError("These results belong to a workbook that is no longer loaded")
+            return self.excel_sheets[sheet]
+            
+        return frame
+        
+    def plan_sheet_columns(self, selected_columns: Optional[List[str]] = None
+                           ) -> Dict[str, List[Any]]:
+        """Map each sheet to the selected columns it has (all columns if none are selected).
+        
+        Sheets without any of the columns are left out; columns no sheet has
+        raise ValueError.
+        """
+        if not selected_columns:
+            return {sheet: list(columns) for sheet, columns in self.excel_sheet_columns.items()
+                    if columns}
+        unknown = [column for column in selected_columns if column not in self.excel_columns]
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(map(str, unknown))}")
+            
+        plan = {}
+        for sheet, columns in self.excel_sheet_columns.items():
+            present = [column for column in selected_columns if column in columns]
+            if present:
+                plan[sheet] = present
+        return plan
+        
+    def search_sheets(self, search_sheet: Callable[[pd.DataFrame, List[Any]], ExcelMatches],
+                      selected_columns: Optional[List[str]] = None) -> ExcelMatches:
+        """Run search_sheet(frame, columns) on every loaded sheet concurrently.
+        
+        Matches come back in workbook order, each tagged with its 'sheet'.
+        """
+        plan = self.plan_sheet_columns(selected_columns)
+        sheet_matches = self.map_sheets(
+            lambda sheet: search_sheet(self.excel_sheets[sheet], plan[sheet]), list(plan))
+        return ExcelMatches.concat(sheet_matches, plan, self.sheet_frames())
+        
+    def map_sheets(self, function: Callable[[str], Any], sheets: List[str]) -> List[Any]:
+        """Call function(sheet) for each loaded sheet concurrently, returning results in order."""
+        if len(sheets) > 1:
+            # Threads, not processes - the frames are already in memory here and
+            # would otherwise be copied to every worker
+            with ThreadPoolExecutor(max_workers=min(len(sheets), DEFAULT_EXTRACTION_WORKERS + 1)) as pool:
+                return list(pool.map(function, sheets))
+        return [function(sheet) for sheet in sheets]
+        
+    def search_excel_exact(self, query: str, selected_columns: Optional[List[str]] = None,
+                           case_sensitive: bool = False,
+                           max_results: Optional[int] = None) -> ExcelMatches:
+        """Find rows with a cell equal to the query, through per-column hash indexes.
+        
+        A cell matches if its text equals the query or it is a number equal
+        to the query. A ValueIndex is built for each searched column the
+        first time it is needed and reused afterwards, so repeat lookups do
+        not scan the sheet. Results match search_excel's shape and order.
+        """
+        if self.excel_stream_path:
+            raise ValueError("Exact search needs the workbook loaded in memory "
+                             "(turn off low-memory mode)")
+        plan = self.plan_sheet_columns(selected_columns)
+        numeric_query = parse_numeric_query(query)
+        frames = self.sheet_frames()
+        
+        sheet_matches = []
+        found = 0
+        for sheet, columns in plan.items():
+            frame = self.excel_sheets[sheet]
+            column_positions = []
+            for column in columns:
+                index = self.value_indexes.get((sheet, column))
+                if index is None:
+                    with self.phase('index'):
+                        index = self.value_indexes[(sheet, column)] = ValueIndex(frame[column])
+                with self.phase('match'):
+                    column_positions.append(index.lookup(query, case_sensitive, numeric_query))
+                    
+            positions = np.unique(np.concatenate(column_positions))
+            if max_results is not None:
+                positions = positions[:max_results - found]
+            column_masks = [np.isin(positions, matches) for matches in column_positions]
+            sheet_matches.append(ExcelMatches.from_masks(frames, columns, positions, column_masks,
+                                                         sheet))
+            found += len(positions)
+            if max_results is not None and found >= max_results:
+                break
+                
+        return ExcelMatches.concat(sheet_matches, frames=frames)
+        
+    def search_excel_fuzzy(self, query: str, selected_columns: Optional[List[str]] = None,
+                           min_coverage: float = FUZZY_MIN_COVERAGE,
+                           max_results: Optional[int] = None) -> ExcelMatches:
+        """Typo-tolerant Excel search ranked by trigram similarity.
+        
+        A TrigramIndex is built for each searched column the first time it
+        is needed. Results are ordered best match first and carry a 'score'
+        (the trigram similarity of the best matching cell, 0-1). Matching
+        ignores case.
+        """
+        if self.excel_stream_path:
+            raise ValueError("Fuzzy search needs the workbook loaded in memory "
+                             "(turn off low-memory mode)")
+        plan = self.plan_sheet_columns(selected_columns)
+        
+        ranked = []
+        for sheet, columns in plan.items():
+            frame = self.excel_sheets[sheet]
+            row_matches: Dict[int, Tuple[Tuple[float, float], List[Any]]] = {}
+            for column in columns:
+                index = self.trigram_indexes.get((sheet, column))
+                if index is None:
+                    with self.phase('index'):
+                        index = self.trigram_indexes[(sheet, column)] = TrigramIndex(frame[column])
+                with self.phase('match'):
+                    scores = index.lookup(query, min_coverage)
+                for position, score in scores.items():
+                    best, matched_columns = row_matches.setdefault(position, (score, []))
+                    matched_columns.append(column)
+                    if score > best:
+                        row_matches[position] = (score, matched_columns)
+            ranked.extend((score, sheet, position, matched_columns)
+                          for position, (score, matched_columns) in row_matches.items())
+            
+        # Best first; equal scores keep workbook order
+        sheet_order = {sheet: number for number, sheet in enumerate(plan)}
+        ranked.sort(key=lambda item: (-item[0][0], -item[0][1], sheet_order[item[1]], item[2]))
+        
+        ranked = ranked[:max_results]
+        
+        # One part per run of ranked rows from the same sheet; rows are read when accessed
+        frames = self.sheet_frames()
+        sheet_matches = []
+        for sheet, run in groupby(ranked, key=lambda item: item[1]):
+            run = list(run)
+            columns = plan[sheet]
+            positions = np.array([position for _, _, position, _ in run], dtype=np.int64)
+            column_masks = [np.array([column in matched_columns for *_, matched_columns in run],
+                                     dtype=bool)
+                            for column in columns]
+            scores = [round(score[0], 3) for score, *_ in run]
+            sheet_matches.append(ExcelMatches.from_masks(frames, columns, positions, column_masks,
+                                                         sheet, {'score': scores}))
+        return ExcelMatches.concat(sheet_matches, frames=frames)
+        
+    def search_pdf_terms(self, terms: List[str], case_sensitive: bool = False, workers: int = 1,
+                         on_results: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                         progress: Optional[Callable[[float, str], None]] = None,
+                         max_results: Optional[int] = None,
+                         page_range: Optional[Tuple[int, Optional[int]]] = None,
+                         first_hit: bool = False) -> List[Dict[str, Any]]:
+        """Search a PDF for many terms with one automaton pass per page.
+        
+        Each result is a matching line with its context, like search_pdf,
+        plus 'terms': the terms found on that line. 'match_spans', max_results,
+        page_range and first_hit work as in search_pdf_ultra_fast.
+        """
+        for term in terms:
+            check_pdf_query(term)
+        results = []
+        if progress is None:
+            progress = lambda value, message: None
+        automaton = AhoCorasick(terms, case_sensitive)
+        pages = self.pages_in_range(page_range)
+        if self.text_store is not None:
+            # Only pages the mapped text says contain some term are decoded
+            with self.phase('match'):
+                hits = set()
+                for term in automaton.terms:
+                    hits.update(self.text_store.pages_containing(term, case_sensitive))
+            pages = [page_data for page_data in pages if page_data['page'] in hits]
+        total_pages = len(pages)
+        
+        progress(0, f"Searching for {len(automaton.terms)} terms...")
+        
+        for i, (page_data, text) in enumerate(self.timed_iter('extract', self.iter_page_texts(pages, workers))):
+            page_num = page_data['page']
+            
+            # Update progress every 10 pages
+            if i % 10 == 0:
+                percent = (i / total_pages) * 100
+                progress(percent, f"Searching page {page_num}/{total_pages}...")
+                
+            if not text:
+                continue
+            with self.phase('match'):
+                matches = automaton.find(automaton.prepare(text))
+            if not matches:
+                continue
+                
+            with self.phase('context'):
+                # Map match offsets to lines; case folding keeps offsets in place
+                line_starts = line_offsets(text)
+                spans = sorted((end - len(automaton.prepare(automaton.terms[term_id])), end)
+                               for end, term_id in matches)
+                span_starts = [start for start, _ in spans]
+                line_terms: Dict[int, Set[int]] = {}
+                for end, term_id in matches:
+                    line_idx = bisect_right(line_starts, end - 1) - 1
+                    line_terms.setdefault(line_idx, set()).add(term_id)
+                    
+                page_results: List[Dict[str, Any]] = []
+                by_context: Dict[str, Dict[str, Any]] = {}
+                for line_idx in sorted(line_terms):
+                    # Get context around matching line
+                    context_start, context = line_context(text, line_starts, line_idx)
+                    if not context:
+                        continue
+                        
+                    found = [automaton.terms[term_id] for term_id in sorted(line_terms[line_idx])]
+                    if context in by_context:
+                        existing = by_context[context]['terms']
+                        existing.extend(term for term in found if term not in existing)
+                        continue
+                        
+                    # Every term occurrence inside the context, relative to its start
+                    context_end = context_start + len(context)
+                    first = bisect_left(span_starts, context_start)
+                    last = bisect_left(span_starts, context_end)
+                    result = {
+                        'page': page_num,
+                        'context': context,
+                        'line_number': line_idx + 1,
+                        'terms': found,
+                        'match_spans': [(span_start - context_start, span_end - context_start)
+                                        for span_start, span_end in spans[first:last]
+                                        if span_end <= context_end]
+                    }
+                    by_context[context] = result
+                    page_results.append(result)
+                    if first_hit:
+                        break
+                    
+            if max_results is not None:
+                page_results = page_results[:max_results - len(results)]
+            results.extend(page_results)
+            if page_results and on_results is not None:
+                on_results(page_results)
+            if max_results is not None and len(results) >= max_results:
+                break
+                
+        return results
+        
+    def search_excel_terms(self, terms: List[str], selected_columns: Optional[List[str]] = None,
+                           case_sensitive: bool = False,
+                           data: Optional[pd.DataFrame] = None) -> ExcelMatches:
+        """Search Excel cells for many terms with one automaton pass per column.
+        
+        Each result is a matching row, like search_excel, plus 'terms': the
+        terms found in it. Numeric terms also match equal numeric cells.
+        Without data every sheet of the loaded workbook is searched.
+        """
+        if data is None:
+            return self.search_sheets(
+                lambda frame, columns: self.search_excel_terms(terms, columns, case_sensitive, frame),
+                selected_columns)
+        if not selected_columns:
+            selected_columns = list(data.columns)
+        unknown = [column for column in selected_columns if column not in data.columns]
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(map(str, unknown))}")
+            
+        automaton = AhoCorasick(terms, case_sensitive)
+        numeric_terms = [(term_id, parse_numeric_query(term))
+                         for term_id, term in enumerate(automaton.terms)]
+        numeric_terms = [(term_id, value) for term_id, value in numeric_terms if value is not None]
+        
+        # (row position, column) -> term ids found in that cell
+        cell_terms: Dict[Tuple[int, str], Set[int]] = {}
+        for column in selected_columns:
+            values = data[column]
+            present = np.flatnonzero(values.notna().to_numpy())
+            if len(present):
+                # Scan the whole column as one text; NUL separators keep
+                # matches from spanning cells
+                cells = [automaton.prepare(str(value)) for value in values.iloc[present]]
+                cell_starts = np.cumsum([0] + [len(cell) + 1 for cell in cells[:-1]])
+                for end, term_id in automaton.find('\0'.join(cells)):
+                    position = present[np.searchsorted(cell_starts, end - 1, side='right') - 1]
+                    cell_terms.setdefault((position, column), set()).add(term_id)
+                    
+            for term_id, numeric_query in numeric_terms:
+                for position in np.flatnonzero(match_numeric_column(values, numeric_query)):
+                    cell_terms.setdefault((position, column), set()).add(term_id)
+                    
+        # Group cells by row, keeping rows in sheet order
+        row_terms: Dict[int, Set[int]] = {}
+        for (position, _), term_ids in cell_terms.items():
+            row_terms.setdefault(position, set()).update(term_ids)
+        positions = sorted(row_terms)
+        column_masks = [np.array([(position, column) in cell_terms for position in positions],
+                                 dtype=bool)
+                        for column in selected_columns]
+        terms_found = [[automaton.terms[term_id] for term_id in sorted(row_terms[position])]
+                       for position in positions]
+        return ExcelMatches.from_masks(lambda sheet: data, selected_columns, positions,
+                                       column_masks, extras={'terms': terms_found})
+        
+    def search_terms(self, terms: List[str], case_sensitive: bool = False,
+                     columns: Optional[List[str]] = None, workers: int = 1,
+                     on_results: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                     progress: Optional[Callable[[float, str], None]] = None,
+                     max_results: Optional[int] = None,
+                     page_range: Optional[Tuple[int, Optional[int]]] = None,
+                     first_hit: bool = False) -> List[Dict[str, Any]]:
+        """Search the loaded file for a list of terms in a single pass.
+        
+        page_range and first_hit only apply to PDFs.
+        """
+        if self.loaded_file_type == 'pdf':
+            return self.search_pdf_terms(terms, case_sensitive, workers, on_results, progress,
+                                         max_results, page_range, first_hit)
+        if self.loaded_file_type == 'excel':
+            if self.excel_stream_path:
+                return self.search_excel_stream('', columns, case_sensitive, terms,
+                                                on_results, progress, max_results)
+            with self.phase('match'):
+                results = self.search_excel_terms(terms, columns, case_sensitive)[:max_results]
+            if results and on_results is not None:
+                on_results(results)
+            return results
+        raise ValueError("No file loaded")
+        
+    def search_corpus(self, directory: str, queries: List[str], case_sensitive: bool = False,
+                      columns: Optional[List[str]] = None, workers: int = DEFAULT_EXTRACTION_WORKERS,
+                      single_pass: bool = False, manifest_path: Optional[str] = '',
+                      on_results: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                      progress: Optional[Callable[[float, str], None]] = None,
+                      max_results: Optional[int] = None,
+                      page_range: Optional[Tuple[int, Optional[int]]] = None,
+                      first_hit: bool = False, low_memory: bool = False,
+                      mode: str = 'substring') -> List[Dict[str, Any]]:
+        """Search every PDF and workbook under a directory (recursively).
+        
+        Files are searched in the extraction process pool, largest first, and
+        each file's results are passed to on_results as soon as it finishes,
+        tagged with 'file'. Files unchanged since the last search with the
+        same options are answered from the manifest; pass manifest_path=None
+        to disable it ('' uses the default location). max_results,
+        page_range and first_hit limit the search of each file, mode picks
+        how workbooks are matched and low_memory streams them (see search and
+        load_file). Workers use the same on-disk caches as this engine. The
+        loaded file is not affected.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'")
+        limits = {'max_results': max_results, 'page_range': page_range, 'first_hit': first_hit}
+        if progress is None:
+            progress = lambda value, message: None
+        files = find_corpus_files(directory)
+        total_files = len(files)
+        manifest = None
+        if manifest_path is not None:
+            manifest = CorpusManifest(manifest_path or CorpusManifest.default_path(directory))
+        search_key = CorpusManifest.search_key(queries, case_sensitive, columns, single_pass,
+                                               self.extractor, mode=mode, **limits)
+        
+        results: List[Dict[str, Any]] = []
+        done = 0
+        
+        def collect(file_path: str, file_results: List[Dict[str, Any]]):
+            nonlocal done
+            done += 1
+            results.extend(file_results)
+            if file_results and on_results is not None:
+                on_results(file_results)
+            progress(done / max(1, total_files) * 100,
+                     f"Searched {done}/{total_files} files - {len(results)} results")
+            
+        # Unchanged files come straight from the manifest
+        pending = []
+        for file_path in files:
+            stored = manifest.lookup(file_path, search_key) if manifest is not None else None
+            if stored is None:
+                pending.append(file_path)
+            else:
+                collect(file_path, stored)
+                
+        progress(done / max(1, total_files) * 100,
+                 f"Searching {len(pending)} of {total_files} files...")
+        futures: Dict[Future, str] = {}
+        try:
+            if pending:
+                executor = self.get_extraction_executor(max(1, workers))
+                futures = {executor.submit(search_corpus_file, file_path, queries, case_sensitive,
+                                           columns, single_pass, self.extractor,
+                                           low_memory=low_memory, mode=mode,
+                                           page_cache_dir=self.page_cache.cache_dir,
+                                           frame_cache_dir=self.frame_cache.cache_dir,
+                                           **limits): file_path
+                           for file_path in pending}
+            remaining = set(futures)
+            while remaining and not self.cancel_loading:
+                finished, remaining = wait(remaining, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    file_path = futures[future]
+                    try:
+                        file_results = future.result()
+                    except Exception as e:
+                        logger.warning("Could not search %s: %s", file_path, e)
+                        file_results = []
+                    else:
+                        if manifest is not None:
+                            manifest.record(file_path, search_key, file_results)
+                    collect(file_path, file_results)
+        finally:
+            for future in futures:
+                future.cancel()
+            if manifest is not None:
+                try:
+                    manifest.save()
+                except OSError as e:
+                    logger.warning("Could not save corpus manifest: %s", e)
+                    
+        return results
+        
+    def search(self, query: str, case_sensitive: bool = False,
+               columns: Optional[List[str]] = None, workers: int = 1,
+               on_results: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+               progress: Optional[Callable[[float, str], None]] = None,
+               max_results: Optional[int] = None,
+               page_range: Optional[Tuple[int, Optional[int]]] = None,
+               first_hit: bool = False, mode: str = 'substring',
+               narrow: bool = False) -> List[Dict[str, Any]]:
+        """Search the loaded file, whichever type it is.
+        
+        page_range and first_hit only apply to PDFs; mode (one of
+        SEARCH_MODES) only to Excel files. With narrow, a substring search
+        whose query extends an earlier one only reads the pages or rows that
+        one matched (see narrowed_scope), so refining a query gets cheaper.
+        Results of searches that ran to the end are kept in result_cache, and
+        repeating the search returns them without reading the file.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'")
+            
+        # Repeated searches are answered from the result cache
+        cache_key = self.result_cache_key(query, case_sensitive, columns, max_results,
+                                          page_range, first_hit, mode)
+        results = self.result_cache.get(cache_key) if cache_key is not None else None
+        if results is None:
+            results = self.search_uncached(query, case_sensitive, columns, workers, on_results,
+                                           progress, max_results, page_range, first_hit, mode,
+                                           narrow)
+            if cache_key is not None and not self.cancel_loading:
+                self.result_cache.put(cache_key, results)
+        elif results and on_results is not None:
+            on_results(results)
+        return results
+        
+    def result_cache_key(self, query: str, case_sensitive: bool, columns: Optional[List[str]],
+                         max_results: Optional[int],
+                         page_range: Optional[Tuple[int, Optional[int]]],
+                         first_hit: bool, mode: str) -> Optional[Tuple[Any, ...]]:
+        """Key a search in the result cache by the loaded file and the options that apply to it.
+        
+        Returns None (the search is not cached) if the file has changed on
+        disk since it was loaded, or can no longer be read.
+        """
+        if self.file_identity is None:
+            return None
+        try:
+            if ResultCache.file_identity(self.file_identity[0]) != self.file_identity:
+                return None
+        except OSError:
+            return None
+        if self.loaded_file_type == 'pdf':
+            return (self.file_identity, self.extractor, query, case_sensitive, max_results,
+                    page_range, first_hit)
+        return (self.file_identity, bool(self.excel_stream_path), mode, query, case_sensitive,
+                tuple(columns or ()), max_results)
+        
+    def search_uncached(self, query: str, case_sensitive: bool = False,
+                        columns: Optional[List[str]] = None, workers: int = 1,
+                        on_results: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                        progress: Optional[Callable[[float, str], None]] = None,
+                        max_results: Optional[int] = None,
+                        page_range: Optional[Tuple[int, Optional[int]]] = None,
+                        first_hit: bool = False, mode: str = 'substring',
+                        narrow: bool = False) -> List[Dict[str, Any]]:
+        """Search the loaded file without consulting the result cache (see search)."""
+        if mode != 'substring':
+            if self.loaded_file_type != 'excel':
+                raise ValueError(f"{mode.capitalize()} search is only available for Excel files")
+            if mode == 'exact':
+                results = self.search_excel_exact(query, columns, case_sensitive, max_results)
+            else:
+                results = self.search_excel_fuzzy(query, columns, max_results=max_results)
+            if results and on_results is not None:
+                on_results(results)
+            return results
+        if self.loaded_file_type == 'excel' and self.excel_stream_path:
+            return self.search_excel_stream(query, columns, case_sensitive,
+                                            on_results=on_results, progress=progress,
+                                            max_results=max_results)
+            
+        scope = self.narrowed_scope(query, case_sensitive, columns, page_range) if narrow else None
+        if self.loaded_file_type == 'pdf':
+            results = self.search_pdf(query, case_sensitive, workers, on_results, progress,
+                                      max_results, page_range, first_hit, within_pages=scope)
+            complete = max_results is None or len(results) < max_results
+        elif self.loaded_file_type == 'excel':
+            with self.phase('match'):
+                results = self.search_excel(query, columns, case_sensitive, rows=scope)
+            complete = True
+        else:
+            raise ValueError("No file loaded")
+            
+        # Only a search that saw every match can narrow later ones
+        if narrow and complete and not self.cancel_loading:
+            self.remember_matches(query, case_sensitive, columns, page_range, results)
+        if self.loaded_file_type == 'excel':
+            results = results[:max_results]
+            if results and on_results is not None:
+                on_results(results)
+        return results
+        
+    def narrowing_key(self, query: str, case_sensitive: bool, columns: Optional[List[str]],
+                      page_range: Optional[Tuple[int, Optional[int]]]) -> Optional[Tuple[Any, str]]:
+        """Return the search options and the query as matching compares it.
+        
+        None means the loaded file's searches cannot be narrowed.
+        """
+        if self.loaded_file_type == 'pdf':
+            return (case_sensitive, page_range), query if case_sensitive else fold_case(query)
+        if self.loaded_file_type == 'excel' and not self.excel_stream_path:
+            return (case_sensitive, tuple(columns or ())), query if case_sensitive else query.lower()
+        return None
+        
+    def narrowed_scope(self, query: str, case_sensitive: bool = False,
+                       columns: Optional[List[str]] = None,
+                       page_range: Optional[Tuple[int, Optional[int]]] = None) -> Optional[Any]:
+        """Return what an earlier search matched, if every match of query lies within it.
+        
+        Any text containing query also contains each part of it, so a query
+        that contains an earlier query (searched with the same options) can
+        only match where that one did. The smallest such remembered match
+        set is returned - page numbers for a PDF, row positions per sheet
+        for Excel - or None when the whole file must be searched.
+        """
+        narrowing = self.narrowing_key(query, case_sensitive, columns, page_range)
+        if narrowing is None:
+            return None
+        if self.loaded_file_type == 'excel' and parse_numeric_query(query) is not None:
+            # Numbers also match equal cells, whose text may not contain the earlier query
+            return None
+        key, query_check = narrowing
+        earlier = [entry for entry in self.match_history
+                   if entry['key'] == key and entry['query'] in query_check]
+        if not earlier:
+            return None
+        return min(earlier, key=lambda entry: entry['size'])['scope']
+        
+    def remember_matches(self, query: str, case_sensitive: bool, columns: Optional[List[str]],
+                         page_range: Optional[Tuple[int, Optional[int]]],
+                         results: Sequence):
+        """Record the pages or rows a complete search matched, for narrowed_scope."""
+        narrowing = self.narrowing_key(query, case_sensitive, columns, page_range)
+        if narrowing is None:
+            return
+        key, query_check = narrowing
+        if self.loaded_file_type == 'pdf':
+            scope = {result['page'] for result in results}
+            size = len(scope)
+        else:
+            scope = results.sheet_positions()
+            size = len(results)
+            
+        self.match_history = [entry for entry in self.match_history
+                              if (entry['key'], entry['query']) != narrowing]
+        self.match_history.append({'key': key, 'query': query_check, 'scope': scope, 'size': size})
+        del self.match_history[:-NARROWING_HISTORY]
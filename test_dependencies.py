@@ -40,6 +40,13 @@ def test_dependencies():
         print("❌ tkinter: Not available")
         return False
     
+    # Optional faster PDF text extraction backend
+    try:
+        import pypdf
+        print("✅ pypdf (optional):", pypdf.__version__)
+    except ImportError:
+        print("ℹ️ pypdf (optional): Not installed - pdfplumber and pdfminer backends available")
+    
     print("\n🎉 All dependencies are properly installed!")
     print("You can now run the application with: python file_search_app.py")
     return True
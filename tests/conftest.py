@@ -0,0 +1,41 @@
+"""Shared pytest fixtures; makes the top-level modules importable from the tests."""
+
+import datetime
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_suite import write_synthetic_pdf  # noqa: E402
+
+
+@pytest.fixture
+def staff_workbook(tmp_path):
+    """A two-sheet workbook mixing text, integer, float, date and empty cells."""
+    path = str(tmp_path / 'staff.xlsx')
+    staff = pd.DataFrame({
+        'Name': ['John Smith', 'Jonathan Smith', 'jane doe', 'Alice Brown', None, 'Bob 12'],
+        'Age': [30, 12, 45, 12, 28, 51],
+        'Salary': [75000.0, 12.5, None, 51000.25, 60000.0, 12.0],
+        'Department': ['IT', 'Sales', 'it', 'HR', 'Sales', 'Smithing'],
+        'Started': pd.to_datetime(['2020-01-02', '2019-05-06', '2021-12-12',
+                                   '2018-03-04', '2022-07-08', '2012-01-01']),
+    })
+    offices = pd.DataFrame({'Office': ['London', 'Smithfield', 'Oslo'],
+                            'Name': ['Alice Brown', 'John Smith', 'nobody'],
+                            'Opened': [datetime.date(2001, 1, 1), None, datetime.date(2012, 2, 2)]})
+    with pd.ExcelWriter(path) as writer:
+        staff.to_excel(writer, sheet_name='Staff', index=False)
+        offices.to_excel(writer, sheet_name='Offices', index=False)
+    return path
+
+
+@pytest.fixture
+def synthetic_pdf(tmp_path):
+    """A 12-page text-only PDF of 40 numbered lines per page."""
+    path = str(tmp_path / 'synthetic.pdf')
+    write_synthetic_pdf(path, pages=12)
+    return path
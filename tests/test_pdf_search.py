@@ -0,0 +1,256 @@
+"""Tests for searching PDFs (run with: python -m pytest)."""
+
+import logging
+import os
+import sqlite3
+
+import pytest
+
+import search_engine
+from benchmark_suite import write_synthetic_pdf
+from search_engine import ExcelFrameCache, PageTextCache, PageTextStore, ResultCache, SearchEngine
+
+
+def new_engine(**kwargs):
+    """An engine that keeps no caches on disk and does not reuse results."""
+    kwargs.setdefault('page_cache', PageTextCache(cache_dir=None))
+    kwargs.setdefault('result_cache', ResultCache(0))
+    return SearchEngine(frame_cache=ExcelFrameCache(cache_dir=None), **kwargs)
+
+
+def indexed_engine(path):
+    """An engine with the PDF loaded and fully indexed."""
+    engine = new_engine()
+    engine.load_pdf_file(path)
+    engine.start_page_index()
+    engine.index_thread.join()
+    return engine
+
+
+QUERIES = ['warranty', 'WARRANTY', 'arran', 'Section 3.1', 'ion 3', 'price quantity',
+           'e pay', 'PN-', 'zzz']
+
+
+@pytest.mark.parametrize('case_sensitive', [False, True])
+def test_page_index_matches_a_live_scan(synthetic_pdf, case_sensitive):
+    engine = indexed_engine(synthetic_pdf)
+    assert len(engine.page_index.snapshot_pages()) == 12
+    index = engine.page_index
+    for query in QUERIES:
+        engine.page_index = None
+        expected = engine.search_pdf(query, case_sensitive)
+        engine.page_index = index
+        assert engine.search_pdf(query, case_sensitive) == expected, query
+
+
+def test_page_index_answers_without_extracting(synthetic_pdf, monkeypatch):
+    engine = indexed_engine(synthetic_pdf)
+    expected = engine.search_pdf('warranty')
+    assert expected
+
+    # Neither the page cache nor the PDF is read for indexed pages
+    engine.page_cache.clear()
+    monkeypatch.setattr(search_engine, 'open_extractor',
+                        lambda *args: pytest.fail("page extracted again"))
+    assert engine.search_pdf('warranty') == expected
+
+
+def test_partly_built_index_falls_back_to_live_pages(synthetic_pdf):
+    engine = new_engine()
+    engine.load_pdf_file(synthetic_pdf)
+    expected = engine.search_pdf('warranty')
+
+    engine.page_index = search_engine.PageIndex()
+    for page_data, text in engine.iter_page_texts(engine.pdf_text_data[:5]):
+        engine.page_index.add_page(page_data['page'], text)
+    assert engine.search_pdf('warranty') == expected
+
+
+@pytest.mark.parametrize('indexed', [False, True])
+def test_match_spans_locate_every_match_in_the_context(synthetic_pdf, indexed):
+    engine = indexed_engine(synthetic_pdf) if indexed else new_engine()
+    if not indexed:
+        engine.load_pdf_file(synthetic_pdf)
+
+    results = engine.search_pdf('Warranty')
+    assert results
+    for result in results:
+        context = result['context']
+        expected = []
+        position = context.lower().find('warranty')
+        while position != -1:
+            expected.append((position, position + len('warranty')))
+            position = context.lower().find('warranty', position + 1)
+        assert result['match_spans'] == expected
+
+
+def test_each_context_is_reported_once(synthetic_pdf):
+    engine = new_engine()
+    engine.load_pdf_file(synthetic_pdf)
+    results = engine.search_pdf('Section')
+    contexts = [(result['page'], result['context']) for result in results]
+    assert len(contexts) == len(set(contexts))
+    assert {result['page'] for result in results} == set(range(1, 13))
+
+
+def test_reopened_pdf_is_read_from_the_disk_cache(synthetic_pdf, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / 'cache')
+    engine = new_engine(page_cache=PageTextCache(cache_dir=cache_dir))
+    engine.load_pdf_file(synthetic_pdf)
+    expected = engine.search_pdf('warranty')
+    engine.shutdown()
+
+    engine = new_engine(page_cache=PageTextCache(cache_dir=cache_dir))
+    engine.load_pdf_file(synthetic_pdf)
+    monkeypatch.setattr(search_engine, 'open_extractor',
+                        lambda *args: pytest.fail("page extracted again"))
+    assert engine.page_cache.cached_pages(engine.pdf_doc_key) == set(range(1, 13))
+    assert engine.search_pdf('warranty') == expected
+
+
+def test_changed_pdf_drops_the_pages_of_its_old_version(synthetic_pdf, tmp_path):
+    cache = PageTextCache(cache_dir=str(tmp_path / 'cache'))
+    engine = new_engine(page_cache=cache)
+    engine.load_pdf_file(synthetic_pdf)
+    engine.search_pdf('warranty')
+    cache.flush()
+    old_key = engine.pdf_doc_key
+    assert cache.cached_pages(old_key)
+
+    write_synthetic_pdf(synthetic_pdf, pages=3, seed=2)
+    stat = os.stat(synthetic_pdf)
+    os.utime(synthetic_pdf, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    engine.load_pdf_file(synthetic_pdf)
+    assert engine.pdf_doc_key != old_key
+    assert cache.cached_pages(old_key) == set()
+    assert not os.path.exists(os.path.join(cache.store_dir, f"{old_key}.pgtext"))
+    assert {result['page'] for result in engine.search_pdf('Section')} == {1, 2, 3}
+
+
+def test_locked_page_cache_does_not_break_searches(synthetic_pdf, tmp_path, caplog):
+    cache = PageTextCache(cache_dir=str(tmp_path / 'cache'))
+    cache._db.execute("PRAGMA busy_timeout = 50")
+    engine = new_engine(page_cache=cache)
+    engine.load_pdf_file(synthetic_pdf)
+
+    # Another process holds the write lock while this one extracts pages
+    other = sqlite3.connect(os.path.join(cache.cache_dir, 'page_text.sqlite3'))
+    other.execute("BEGIN IMMEDIATE")
+    with caplog.at_level(logging.WARNING, logger='search_engine'):
+        results = engine.search_pdf('warranty')
+        cache.flush()
+    other.rollback()
+    other.close()
+
+    assert results
+    assert "Could not write" in caplog.text
+    assert engine.search_pdf('warranty') == results
+
+
+def test_process_pool_extraction_matches_serial_extraction(synthetic_pdf, monkeypatch):
+    serial = new_engine()
+    serial.load_pdf_file(synthetic_pdf)
+    expected = serial.search_pdf('warranty')
+
+    monkeypatch.setattr(search_engine, 'PARALLEL_MIN_PAGES', 2)
+    engine = new_engine()
+    engine.load_pdf_file(synthetic_pdf)
+    try:
+        assert engine.search_pdf('warranty', workers=3) == expected
+        assert engine.extraction_executor is not None
+    finally:
+        engine.shutdown()
+
+
+def test_cancel_stops_process_pool_extraction(synthetic_pdf, monkeypatch):
+    monkeypatch.setattr(search_engine, 'PARALLEL_MIN_PAGES', 2)
+    engine = new_engine()
+    engine.load_pdf_file(synthetic_pdf)
+    pages = []
+    try:
+        for page_data, text in engine.iter_page_texts(workers=2):
+            assert text.startswith(f"Section {page_data['page']}.1 ")
+            pages.append(page_data['page'])
+            if len(pages) == 3:
+                engine.cancel_loading = True
+    finally:
+        engine.shutdown()
+    assert pages == [1, 2, 3]
+
+
+def test_term_search_finds_the_lines_of_each_term(synthetic_pdf):
+    engine = new_engine()
+    engine.load_pdf_file(synthetic_pdf)
+    terms = ['warranty', 'Invoice', 'PN-0', 'ice', 'zzz']
+    results = engine.search_pdf_terms(terms)
+    line_terms = {(result['page'], result['line_number']): result['terms'] for result in results}
+
+    for term in terms:
+        lines = {(result['page'], result['line_number']) for result in engine.search_pdf(term)}
+        assert lines == {line for line, found in line_terms.items() if term in found}, term
+    for result in results:
+        matched = {result['context'][start:end].lower() for start, end in result['match_spans']}
+        assert matched <= {term.lower() for term in terms}
+
+
+def test_max_results_stops_the_search(synthetic_pdf):
+    engine = new_engine()
+    engine.load_pdf_file(synthetic_pdf)
+    full = engine.search_pdf('Section')
+    assert engine.search_pdf('Section', max_results=5) == full[:5]
+
+
+def test_page_range_limits_the_pages_searched(synthetic_pdf):
+    engine = new_engine()
+    engine.load_pdf_file(synthetic_pdf)
+    full = engine.search_pdf('warranty')
+    assert engine.search_pdf('warranty', page_range=(3, 4)) == [
+        result for result in full if 3 <= result['page'] <= 4]
+    assert {result['page'] for result in engine.search_pdf('Section', page_range=(11, None))} == {11, 12}
+
+
+def test_first_hit_reports_one_line_per_page(synthetic_pdf):
+    engine = new_engine()
+    engine.load_pdf_file(synthetic_pdf)
+    first_lines = {}
+    for result in engine.search_pdf('warranty'):
+        first_lines.setdefault(result['page'], result)
+    assert engine.search_pdf('warranty', first_hit=True) == list(first_lines.values())
+
+
+def test_corpus_search_limits_each_file(synthetic_pdf, tmp_path):
+    engine = new_engine()
+    results = engine.search_corpus(str(tmp_path), ['Section'], workers=1, manifest_path=None,
+                                   max_results=3, page_range=(2, 3), first_hit=True)
+    assert [(result['page'], result['line_number']) for result in results] == [(2, 1), (3, 1)]
+    assert all(result['file'] == synthetic_pdf for result in results)
+
+
+def test_searches_use_the_text_store_once_every_page_is_cached(synthetic_pdf, tmp_path):
+    engine = new_engine(page_cache=PageTextCache(cache_dir=str(tmp_path / 'cache')))
+    engine.load_pdf_file(synthetic_pdf)
+    expected = engine.search_pdf('warranty')
+    store = engine.text_store
+    assert store is not None and store.page_count == 12
+    assert all(store.page_text(page) == engine.page_cache.get(engine.pdf_doc_key, page)
+               for page in range(1, 13))
+
+    assert store.pages_containing('WARRANTY') == sorted({result['page'] for result in expected})
+    assert store.pages_containing('WARRANTY', case_sensitive=True) == []
+    assert engine.search_pdf('warranty') == expected
+    engine.shutdown()
+
+
+def test_text_store_finds_folded_text_within_pages(tmp_path):
+    texts = ['Straße in İstanbul', '', 'the end', 'ab']
+    store = PageTextStore.write(str(tmp_path / 'doc.pgtext'), len(texts), texts)
+    try:
+        assert [store.page_text(page) for page in range(1, 5)] == texts
+        assert store.pages_containing('STRASSE') == []
+        assert store.pages_containing('straße') == [1]
+        assert store.pages_containing('İstanbul', case_sensitive=True) == [1]
+        assert store.pages_containing('e') == [1, 3]
+        # A match running from one page into the next does not count
+        assert store.pages_containing('endab') == []
+    finally:
+        store.close()
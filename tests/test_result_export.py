@@ -0,0 +1,101 @@
+"""Tests for writing search results to CSV, JSON Lines and .xlsx files."""
+
+import csv
+import json
+
+import openpyxl
+import pytest
+
+from result_export import RESULT_FIELDS, export_results
+from search_engine import ExcelFrameCache, PageTextCache, SearchEngine
+
+PDF_RESULTS = [
+    {'page': 1, 'line_number': 3, 'context': 'Payment terms\fnet 30', 'match_spans': [(0, 7)]},
+    {'page': 4, 'line_number': 12, 'context': 'Late payment: 2% "interest"', 'match_spans': [(5, 12)]},
+]
+
+
+@pytest.fixture
+def excel_results(staff_workbook):
+    engine = SearchEngine(page_cache=PageTextCache(cache_dir=None),
+                          frame_cache=ExcelFrameCache(cache_dir=None))
+    engine.load_file(staff_workbook)
+    return engine.search('smith')
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        return list(csv.reader(f))
+
+
+def read_xlsx(path):
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    rows = [list(row) for sheet in workbook.worksheets for row in sheet.iter_rows(values_only=True)]
+    workbook.close()
+    return rows
+
+
+def test_excel_results_round_trip(excel_results, tmp_path):
+    header = ['sheet', 'row_index', 'matched_columns', 'Name', 'Age', 'Salary', 'Department',
+              'Started', 'Office', 'Opened']
+    expected = [[result['sheet'], result['row_index'], '; '.join(result['matched_columns']),
+                 result['data'].get('Name')] for result in excel_results]
+    assert len(expected) == 4
+
+    assert export_results(excel_results, str(tmp_path / 'hits.csv'), chunk_rows=3) == 4
+    rows = read_csv(tmp_path / 'hits.csv')
+    assert rows[0] == header
+    assert [row[:4] for row in rows[1:]] == [[str(value) for value in row] for row in expected]
+
+    export_results(excel_results, str(tmp_path / 'hits.xlsx'), chunk_rows=3)
+    rows = read_xlsx(tmp_path / 'hits.xlsx')
+    assert rows[0] == header
+    assert [row[:4] for row in rows[1:]] == expected
+
+    export_results(excel_results, str(tmp_path / 'hits.jsonl'), chunk_rows=3)
+    with open(tmp_path / 'hits.jsonl', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [[record['sheet'], record['row_index'], '; '.join(record['matched_columns']),
+             record['data']['Name']] for record in records] == expected
+    assert records[0]['data']['Started'] == '2020-01-02 00:00:00'
+
+
+def test_term_results_export_their_terms(staff_workbook, tmp_path):
+    engine = SearchEngine(page_cache=PageTextCache(cache_dir=None),
+                          frame_cache=ExcelFrameCache(cache_dir=None))
+    engine.load_file(staff_workbook)
+    results = engine.search_terms(['smith', 'Oslo'])
+    export_results(results, str(tmp_path / 'hits.csv'))
+    rows = read_csv(tmp_path / 'hits.csv')
+    assert rows[0][:4] == ['terms', 'sheet', 'row_index', 'matched_columns']
+    assert [row[:4] for row in rows[-2:]] == [['smith', 'Offices', '3', 'Office; Name'],
+                                             ['Oslo', 'Offices', '4', 'Office']]
+
+
+def test_pdf_results_round_trip(tmp_path):
+    fields = [field for field in RESULT_FIELDS if field in ('page', 'line_number', 'context')]
+    export_results(PDF_RESULTS, str(tmp_path / 'hits.csv'))
+    assert read_csv(tmp_path / 'hits.csv') == [fields] + [
+        [str(result['page']), str(result['line_number']), result['context']]
+        for result in PDF_RESULTS]
+
+    export_results(PDF_RESULTS, str(tmp_path / 'hits.xlsx'))
+    rows = read_xlsx(tmp_path / 'hits.xlsx')
+    assert rows[1] == [1, 3, 'Payment termsnet 30']  # Form feeds are not allowed in cells
+
+    export_results(PDF_RESULTS, str(tmp_path / 'hits.jsonl'))
+    with open(tmp_path / 'hits.jsonl', encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == [
+            {field: result[field] for field in fields} for result in PDF_RESULTS]
+
+
+def test_empty_results_write_a_header(tmp_path):
+    assert export_results([], str(tmp_path / 'none.csv')) == 0
+    assert read_csv(tmp_path / 'none.csv') == [[]]
+    export_results([], str(tmp_path / 'none.xlsx'))
+    assert len(read_xlsx(tmp_path / 'none.xlsx')) <= 1
+
+
+def test_unsupported_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        export_results(PDF_RESULTS, str(tmp_path / 'hits.txt'))
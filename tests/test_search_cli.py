@@ -0,0 +1,54 @@
+"""Tests for the batch command-line search."""
+
+import json
+
+import pytest
+
+from search_cli import main
+
+
+def run(capsys, *argv):
+    """Run the CLI without disk caches; returns the exit code and the JSON records written."""
+    code = main([*argv, '--no-cache', '--no-manifest', '--workers', '1'])
+    out = capsys.readouterr().out
+    return code, [json.loads(line) for line in out.splitlines()]
+
+
+def test_results_are_written_as_json_lines(staff_workbook, capsys):
+    code, records = run(capsys, staff_workbook, '-q', 'smith', '-q', 'oslo')
+    assert code == 0
+    assert [(record['query'], record['sheet'], record['row_index']) for record in records] == [
+        ('smith', 'Staff', 2), ('smith', 'Staff', 3), ('smith', 'Staff', 7),
+        ('smith', 'Offices', 3), ('oslo', 'Offices', 4)]
+    assert all(record['file'] == staff_workbook for record in records)
+
+
+def test_output_file_and_options(staff_workbook, tmp_path, capsys):
+    output = tmp_path / 'hits.jsonl'
+    code, records = run(capsys, staff_workbook, '-q', 'it', '--mode', 'exact',
+                        '--columns', 'Department', '-o', str(output))
+    assert code == 0 and records == []
+    with open(output, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert [record['data']['Name'] for record in records] == ['John Smith', 'jane doe']
+
+    _, records = run(capsys, staff_workbook, '-q', 'smith', '--max-results', '2')
+    assert len(records) == 2
+
+
+def test_directory_search_applies_mode_and_limits(staff_workbook, tmp_path, capsys):
+    directory = str(tmp_path)
+    _, records = run(capsys, directory, '-q', 'smith')
+    assert len(records) == 4
+    _, records = run(capsys, directory, '-q', 'smith', '--max-results', '1')
+    assert len(records) == 1
+    _, records = run(capsys, directory, '-q', 'it', '--mode', 'exact')
+    assert [record['data']['Name'] for record in records] == ['John Smith', 'jane doe']
+
+
+def test_missing_queries_and_files_are_errors(staff_workbook, tmp_path, capsys):
+    assert main([staff_workbook]) == 2
+    code, records = run(capsys, str(tmp_path / 'missing.xlsx'), '-q', 'smith')
+    assert code == 1 and records == []
+    with pytest.raises(SystemExit):
+        main([staff_workbook, '-q', 'smith', '--mode', 'regex'])
@@ -0,0 +1,326 @@
+"""Tests for the search engine (run with: python -m pytest)."""
+
+import functools
+import os
+import time
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from search_engine import (ExcelFrameCache, ExcelMatches, PageIndex, PageTextCache, ResultCache,
+                           SearchEngine)
+
+
+def new_engine(**kwargs):
+    """An engine that keeps no caches on disk."""
+    kwargs.setdefault('result_cache', ResultCache())
+    return SearchEngine(page_cache=PageTextCache(cache_dir=None),
+                        frame_cache=ExcelFrameCache(cache_dir=None), **kwargs)
+
+
+@pytest.fixture
+def blank_rows_workbook(tmp_path):
+    """A workbook with blank rows after the header, between rows and at the end."""
+    path = str(tmp_path / 'blank_rows.xlsx')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for row in [('Name', 'Age'), (None, None), ('alice', 1), ('bob smith', 2),
+                (None, None), ('carol smith', 3), (None, None), (None, None)]:
+        sheet.append(row)
+    workbook.save(path)
+    return path
+
+
+def row_numbers(results):
+    return [(result['data']['Name'], result['row_index']) for result in results]
+
+
+def comparable(results):
+    """Results with empty cells as None, so that they compare equal (NaN != NaN)."""
+    return [{**result, 'data': {column: None if pd.isna(value) else value
+                                for column, value in result['data'].items()}}
+            for result in results]
+
+
+def test_low_memory_row_index_counts_blank_rows(blank_rows_workbook):
+    engine = new_engine()
+    engine.load_file(blank_rows_workbook)
+    expected = row_numbers(engine.search('smith'))
+    assert expected == [('bob smith', 4), ('carol smith', 6)]
+
+    engine = new_engine()
+    engine.load_file(blank_rows_workbook, low_memory=True)
+    assert row_numbers(engine.search('smith')) == expected
+
+
+def test_low_memory_row_index_across_chunks(blank_rows_workbook):
+    engine = new_engine()
+    engine.load_file(blank_rows_workbook, low_memory=True)
+    chunks = list(engine.iter_excel_chunks(chunk_rows=1))
+    assert [list(frame.index) for _, frame, _ in chunks] == [[1], [2], [4]]
+
+
+@pytest.fixture
+def mixed_types_workbook(tmp_path):
+    """A workbook whose columns mix booleans, numbers, text and blank cells."""
+    path = str(tmp_path / 'mixed_types.xlsx')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for row in [('Name', 'Flag', 'Amount', 'Code'), ('a', True, 75000, '001'),
+                ('b', False, 12, '002'), (None, None, None, None), ('c', True, None, 'x'),
+                ('d', None, 5, '004'), ('e', False, 7.5, '005')]:
+        sheet.append(row)
+    workbook.save(path)
+    return path
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 2, 1000])
+def test_low_memory_matches_in_memory_search(mixed_types_workbook, chunk_rows):
+    engine = new_engine()
+    engine.load_file(mixed_types_workbook)
+    streamed = new_engine()
+    streamed.load_file(mixed_types_workbook, low_memory=True)
+    streamed.iter_excel_chunks = functools.partial(streamed.iter_excel_chunks,
+                                                   chunk_rows=chunk_rows)
+
+    for query in ['True', 'tru', 'false', '.0', '1', '12', '75000', '7.5', '001', '00', 'x']:
+        expected = comparable(engine.search(query))
+        assert comparable(streamed.search(query)) == expected, query
+
+
+def test_loading_another_file_drops_cached_results(blank_rows_workbook, tmp_path):
+    other = str(tmp_path / 'other.xlsx')
+    workbook = openpyxl.Workbook()
+    workbook.active.append(('Name',))
+    workbook.active.append(('dave smith',))
+    workbook.save(other)
+
+    engine = new_engine()
+    engine.load_file(blank_rows_workbook)
+    engine.search('smith')
+    assert len(engine.result_cache._entries) == 1
+    engine.load_file(other)
+    assert len(engine.result_cache._entries) == 0
+    assert engine.match_history == []
+    assert row_numbers(engine.search('smith')) == [('dave smith', 2)]
+
+
+def test_excel_matches_do_not_keep_frames(blank_rows_workbook):
+    engine = new_engine()
+    engine.load_file(blank_rows_workbook)
+    results = engine.search('smith')
+    assert all(not isinstance(item, pd.DataFrame) for part in results.parts for item in part)
+    assert row_numbers(results[1:]) == [('carol smith', 6)]
+
+    engine.clear()
+    with pytest.raises(ValueError):
+        list(results)
+
+
+def test_page_index_candidate_lines():
+    pages = {1: "Payment terms\nnet thirty days\nsecurity deposit",
+             2: "Terms of payment\nsecure storage\nsecurity terms apply"}
+    index = PageIndex()
+    for page, text in pages.items():
+        index.add_page(page, text)
+
+    for query in ['terms', 'erm', 'ment terms', 'rity ter', 'of pay', 'net thirty d',
+                  'zzz', 'secu']:
+        matching = {(page, line) for page, text in pages.items()
+                    for line, line_text in enumerate(text.split('\n'))
+                    if query.lower() in line_text.lower()}
+        candidates = index.candidate_lines(query)
+        found = {(page, line) for page, lines in candidates.items() for line in lines}
+        assert matching <= found, query
+
+    # Partial words only match at the query's ends, whole words in between
+    assert index.candidate_lines('rity ter') == {2: {2}}
+    assert index.candidate_lines('net thirty d') == {1: {1}}
+    assert index.candidate_lines('zzz') == {}
+    assert index.candidate_lines('?!') is None
+
+    # Offsets in the line where each candidate match would start
+    assert index.candidate_starts('rity ter') == {2: {2: [4]}}
+    assert index.candidate_starts('erm') == {1: {0: [9]}, 2: {0: [1], 2: [10]}}
+
+
+def test_page_cache_prunes_earlier_versions_of_a_file(tmp_path):
+    cache = PageTextCache(cache_dir=str(tmp_path / 'cache'))
+    pdf_path = str(tmp_path / 'doc.pdf')
+    cache.register_document('old', pdf_path)
+    cache.put('old', 1, 'first version')
+    cache.register_document('other', str(tmp_path / 'other.pdf'))
+    cache.put('other', 1, 'another file')
+    cache.flush()
+
+    cache.register_document('new', pdf_path)
+    assert cache.get('old', 1) is None
+    assert cache.cached_pages('old') == set()
+    assert cache.get('other', 1) == 'another file'
+
+
+def test_pdf_queries_cannot_span_lines():
+    engine = new_engine()
+    with pytest.raises(ValueError):
+        engine.search_pdf('ty\nSec')
+    with pytest.raises(ValueError):
+        engine.search_pdf_terms(['terms', 'ty\r\nSec'])
+
+
+def scan_excel(frame, query, columns, case_sensitive):
+    """The original row-by-row Excel search, as a reference for the vectorized one."""
+    numeric_query = None
+    try:
+        numeric_query = float(query)
+    except ValueError:
+        pass
+    results = []
+    for idx, row in frame.iterrows():
+        matched_columns = []
+        for column in columns:
+            cell_value = row[column]
+            if pd.isna(cell_value):
+                continue
+            cell_str = str(cell_value)
+            if case_sensitive:
+                text_match = query in cell_str
+            else:
+                text_match = query.lower() in cell_str.lower()
+            numeric_match = (numeric_query is not None and isinstance(cell_value, (int, float))
+                             and abs(cell_value - numeric_query) < 1e-10)
+            if text_match or numeric_match:
+                matched_columns.append(column)
+        if matched_columns:
+            results.append((idx + 2, matched_columns))
+    return results
+
+
+@pytest.mark.parametrize('query', ['smith', 'SMITH', 'it', '12', '12.5', '51000.25', '2020-01',
+                                   'o', 'zzz'])
+@pytest.mark.parametrize('case_sensitive', [False, True])
+@pytest.mark.parametrize('columns', [None, ['Name'], ['Name', 'Age', 'Salary']])
+def test_search_excel_matches_row_scan(staff_workbook, query, case_sensitive, columns):
+    engine = new_engine()
+    engine.load_file(staff_workbook)
+    results = engine.search(query, case_sensitive, columns)
+
+    expected = []
+    for sheet, frame in engine.excel_sheets.items():
+        sheet_columns = [column for column in (columns or frame.columns) if column in frame]
+        expected.extend((sheet, row_index, matched)
+                        for row_index, matched in scan_excel(frame, query, sheet_columns,
+                                                             case_sensitive))
+    assert [(result['sheet'], result['row_index'], result['matched_columns'])
+            for result in results] == expected
+    rows = [{'data': engine.excel_sheets[result['sheet']].iloc[result['row_index'] - 2].to_dict()}
+            for result in results]
+    assert [result['data'] for result in comparable(results)] == [
+        row['data'] for row in comparable(rows)]
+
+
+def test_exact_mode_matches_whole_cells(staff_workbook):
+    engine = new_engine()
+    engine.load_file(staff_workbook)
+    results = engine.search('it', mode='exact')
+    assert [(result['data']['Name'], result['matched_columns']) for result in results] == [
+        ('John Smith', ['Department']), ('jane doe', ['Department'])]
+    assert len(engine.search('it', True, mode='exact')) == 1
+    assert [result['row_index'] for result in engine.search('12', mode='exact')] == [3, 5, 7]
+    assert len(engine.search('smith', mode='exact')) == 0
+
+
+def test_fuzzy_mode_ranks_closest_cells_first(staff_workbook):
+    engine = new_engine()
+    engine.load_file(staff_workbook)
+    results = engine.search('jon smith', columns=['Name'], mode='fuzzy')
+    names = [result['data']['Name'] for result in results]
+    assert names[:2] == ['John Smith', 'John Smith']
+    assert 'Jonathan Smith' in names
+    assert [result['score'] for result in results] == sorted(
+        (result['score'] for result in results), reverse=True)
+    assert list(engine.search('jon smith', columns=['Name'], mode='fuzzy',
+                              max_results=1)) == list(results[:1])
+
+
+def test_fuzzy_and_term_matches_read_rows_when_accessed(staff_workbook):
+    engine = new_engine()
+    engine.load_file(staff_workbook)
+    fuzzy = engine.search('jon smith', columns=['Name'], mode='fuzzy')
+    terms = engine.search_terms(['smith', 'Oslo'])
+    for results in [fuzzy, terms]:
+        assert isinstance(results, ExcelMatches)
+        assert all(not isinstance(item, pd.DataFrame) for part in results.parts for item in part)
+
+    assert [(result['sheet'], result['row_index'], result['matched_columns'], result['terms'])
+            for result in terms] == [
+        ('Staff', 2, ['Name'], ['smith']), ('Staff', 3, ['Name'], ['smith']),
+        ('Staff', 7, ['Department'], ['smith']), ('Offices', 3, ['Office', 'Name'], ['smith']),
+        ('Offices', 4, ['Office'], ['Oslo'])]
+    # Slices keep each row's terms and score
+    assert [result['terms'] for result in terms[3:]] == [['smith'], ['Oslo']]
+    assert [result['score'] for result in fuzzy[1:3]] == [result['score'] for result in list(fuzzy)[1:3]]
+
+
+def test_unknown_mode_is_rejected(staff_workbook):
+    engine = new_engine()
+    engine.load_file(staff_workbook)
+    with pytest.raises(ValueError):
+        engine.search('smith', mode='regex')
+
+
+def test_narrowed_searches_match_full_searches(staff_workbook):
+    narrowed = new_engine()
+    narrowed.load_file(staff_workbook)
+    full = new_engine(result_cache=ResultCache(max_entries=0))
+    full.load_file(staff_workbook)
+
+    for query in ['s', 'sm', 'smi', 'smith', 'o', 'jo', 'john', '1', '12']:
+        assert comparable(narrowed.search(query, narrow=True)) == comparable(full.search(query))
+    assert narrowed.narrowed_scope('johnny') is not None
+    assert narrowed.narrowed_scope('xyz') is None
+
+
+def test_result_cache_returns_cached_results(staff_workbook, monkeypatch):
+    engine = new_engine()
+    engine.load_file(staff_workbook)
+    first = list(engine.search('smith'))
+    monkeypatch.setattr(engine, 'search_uncached', None)  # Any uncached search would fail
+    assert list(engine.search('smith')) == first
+
+
+def test_result_cache_is_invalidated_when_the_file_changes(tmp_path):
+    path = str(tmp_path / 'changing.xlsx')
+    pd.DataFrame({'Name': ['alice smith']}).to_excel(path, index=False)
+    engine = new_engine()
+    engine.load_file(path)
+    assert len(engine.search('smith')) == 1
+
+    pd.DataFrame({'Name': ['alice smith', 'bob smith']}).to_excel(path, index=False)
+    mtime = time.time() + 10
+    os.utime(path, (mtime, mtime))
+    engine.load_file(path)
+    assert len(engine.search('smith')) == 2
+
+
+def test_result_cache_is_bypassed_once_the_loaded_file_changes(tmp_path):
+    path = str(tmp_path / 'changing.xlsx')
+    pd.DataFrame({'Name': ['alice smith']}).to_excel(path, index=False)
+    engine = new_engine()
+    engine.load_file(path, low_memory=True)
+    assert len(engine.search('smith')) == 1
+
+    # Streamed workbooks are read while searching, so the change shows without a reload
+    pd.DataFrame({'Name': ['alice smith', 'bob smith']}).to_excel(path, index=False)
+    mtime = time.time() + 10
+    os.utime(path, (mtime, mtime))
+    assert len(engine.search('smith')) == 2
+
+
+def test_reloading_an_unchanged_file_keeps_cached_results(staff_workbook, monkeypatch):
+    engine = new_engine()
+    engine.load_file(staff_workbook)
+    first = list(engine.search('smith'))
+    engine.load_file(staff_workbook)
+    monkeypatch.setattr(engine, 'search_uncached', None)  # Any uncached search would fail
+    assert list(engine.search('smith')) == first
@@ -0,0 +1,45 @@
+"""Tests for operation timing."""
+
+import json
+import time
+
+from timing import PhaseTimer, append_timing_log, format_seconds
+
+
+def test_phase_timer_breakdown():
+    timer = PhaseTimer('search', query='terms')
+    with timer.span('extract'):
+        time.sleep(0.02)
+    timer.add('match', 0.5)
+    assert list(timer.iterate('read', [1, 2, 3])) == [1, 2, 3]
+    timer.stop()
+
+    phases = timer.breakdown()
+    assert list(phases)[:3] == ['extract', 'match', 'read']
+    assert phases['extract'] >= 0.02
+    assert phases['match'] == 0.5
+    assert timer.total >= phases['extract']
+
+    record = timer.record()
+    assert record['operation'] == 'search'
+    assert record['query'] == 'terms'
+    assert set(record['phases']) == set(phases)
+
+
+def test_summary_and_format_seconds():
+    assert format_seconds(0.0042) == '4.2ms'
+    assert format_seconds(2.314) == '2.31s'
+    timer = PhaseTimer('load')
+    timer.add('parse', 1.25)
+    timer.stop()
+    assert timer.summary().startswith('parse 1.25s')
+    assert '(total ' in timer.summary()
+
+
+def test_append_timing_log(tmp_path):
+    path = tmp_path / 'logs' / 'timing.jsonl'
+    append_timing_log({'operation': 'search', 'total_seconds': 0.1}, str(path))
+    append_timing_log({'operation': 'load', 'total_seconds': 0.2}, str(path))
+    append_timing_log({'operation': 'ignored'}, '')
+    with open(path, encoding='utf-8') as f:
+        assert [json.loads(line)['operation'] for line in f] == ['search', 'load']
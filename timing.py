@@ -0,0 +1,158 @@
+"""
+Operation Timing and Profiling
+==============================
+
+Lightweight instrumentation for loads and searches. A PhaseTimer collects
+the wall-clock time spent in each named phase of one operation (opening
+the file, extracting text, matching, building context, rendering...), so a
+slow search can be attributed to the step that was slow:
+
+    timer = PhaseTimer('search')
+    with timer.span('match'):
+        ...
+    print(timer.summary())
+
+Finished operations can be appended to a JSON Lines log with
+append_timing_log, and profile_call runs a function under cProfile and
+saves the stats for later inspection (python -m pstats <file>).
+"""
+
+import cProfile
+import datetime
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+logger = logging.getLogger(__name__)
+
+
+class PhaseTimer:
+    """Accumulated wall-clock time per phase of one operation.
+
+    Spans may be recorded from several threads (e.g. a worker searching
+    while the UI thread renders); time spent outside any span is reported
+    as 'other'. Spans should not be nested, or their time counts twice.
+    """
+
+    def __init__(self, operation: str, **details: Any):
+        """Start timing an operation; details (file, query...) go into its log record."""
+        self.operation = operation
+        self.details = details
+        self.started = datetime.datetime.now()
+        self.phases: Dict[str, float] = {}
+        self._start = time.perf_counter()
+        self._end: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, phase: str) -> Iterator[None]:
+        """Add the time spent in the with block to phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    def add(self, phase: str, seconds: float):
+        """Add seconds to phase."""
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def iterate(self, phase: str, items: Iterable[T]) -> Iterator[T]:
+        """Yield from items, counting the time spent producing each one towards phase."""
+        iterator = iter(items)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.add(phase, time.perf_counter() - start)
+            yield item
+
+    def stop(self):
+        """Fix the operation's total time (later spans are still recorded)."""
+        if self._end is None:
+            self._end = time.perf_counter()
+
+    @property
+    def total(self) -> float:
+        """Seconds from the start of the operation until stop() (or now)."""
+        end = self._end if self._end is not None else time.perf_counter()
+        return end - self._start
+
+    def breakdown(self) -> Dict[str, float]:
+        """Seconds per phase in the order first seen, plus the unattributed 'other'."""
+        with self._lock:
+            phases = dict(self.phases)
+        other = self.total - sum(phases.values())
+        if other > 0.0005:
+            phases['other'] = other
+        return phases
+
+    def summary(self) -> str:
+        """One-line breakdown such as 'extract 2.31s, match 0.04s (total 2.40s)'."""
+        parts = [f"{phase} {format_seconds(seconds)}"
+                 for phase, seconds in self.breakdown().items()]
+        return f"{', '.join(parts)} (total {format_seconds(self.total)})"
+
+    def record(self) -> Dict[str, Any]:
+        """The operation as a JSON-serializable log record."""
+        return {
+            'time': self.started.isoformat(timespec='seconds'),
+            'operation': self.operation,
+            **self.details,
+            'total_seconds': round(self.total, 6),
+            'phases': {phase: round(seconds, 6) for phase, seconds in self.breakdown().items()}
+        }
+
+
+def format_seconds(seconds: float) -> str:
+    """Format a duration compactly for the status bar."""
+    if seconds < 0.01:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds:.2f}s"
+
+
+def append_timing_log(record: Dict[str, Any], path: Optional[str]):
+    """Append a record to a JSON Lines log; does nothing if path is empty."""
+    if not path:
+        return
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+    except OSError as e:
+        # Timing is diagnostic only
+        logger.warning("Could not write timing log %s: %s", path, e)
+
+
+def profile_call(function: Callable[[], T], directory: str, operation: str) -> Tuple[T, str]:
+    """Run function under cProfile and save the stats in directory.
+
+    Returns the function's result and the path of the .prof file. Only the
+    calling thread is profiled, so work done in extraction worker processes
+    shows up as time spent waiting for them.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = function()
+    finally:
+        profiler.disable()
+        os.makedirs(directory, exist_ok=True)
+        name = re.sub(r'[^A-Za-z0-9_-]+', '_', operation)
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        path = os.path.join(directory, f"{name}-{stamp}.prof")
+        profiler.dump_stats(path)
+    return result, path